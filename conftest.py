@@ -6,8 +6,11 @@ from requests.exceptions import Timeout
 import requests_mock
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 
+from solenoid.elements.cache import invalidate_journal_policies
+
 PAGE_ONE = (
     "<xml page='1'><object><url position='next' "
     "href='mock://api.com/page2'></url></object></xml>"
@@ -19,6 +22,12 @@ PAGE_TWO = (
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    invalidate_journal_policies()
+
+
 @pytest.fixture()
 def author_xml():
     return _get_file("author.xml")
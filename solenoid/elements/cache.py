@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_POLICY_PREFIX = "elements:journal-policy"
+RESPONSE_PREFIX = "elements:response"
+
+
+class LRUCache(object):
+    """A small thread-safe, in-process LRU cache whose entries expire after
+    ttl seconds. Used in front of the Django cache so that lookups repeated
+    within one worker don't even need a round trip to Redis.
+    """
+
+    def __init__(self, maxsize: int, ttl: int) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return None
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_journal_policies = LRUCache(
+    maxsize=settings.ELEMENTS_POLICY_CACHE_SIZE,
+    ttl=settings.ELEMENTS_POLICY_CACHE_LOCAL_TTL,
+)
+
+
+def _generation():
+    """Journal policy keys include a generation number, so that invalidating
+    every cached policy is a single increment rather than a key scan."""
+    return cache.get_or_set(f"{JOURNAL_POLICY_PREFIX}:generation", 0, timeout=None)
+
+
+def journal_policy_key(journal_url):
+    url_hash = hashlib.md5(journal_url.encode("utf-8")).hexdigest()
+    return f"{JOURNAL_POLICY_PREFIX}:{_generation()}:{url_hash}"
+
+
+def get_cached_journal_policies(journal_url):
+    """Return the cached policy data for a journal URL, or None."""
+    if (policy_data := _journal_policies.get(journal_url)) is not None:
+        return policy_data
+    policy_data = cache.get(journal_policy_key(journal_url))
+    if policy_data is not None:
+        _journal_policies.set(journal_url, policy_data)
+    return policy_data
+
+
+def set_cached_journal_policies(journal_url, policy_data):
+    _journal_policies.set(journal_url, policy_data)
+    cache.set(
+        journal_policy_key(journal_url),
+        policy_data,
+        timeout=settings.ELEMENTS_POLICY_CACHE_TTL,
+    )
+
+
+def invalidate_journal_policies(journal_urls=None):
+    """Drop cached policy data for the given journal URLs, or for all
+    journals if none are given. Other worker processes keep their in-process
+    copies for at most ELEMENTS_POLICY_CACHE_LOCAL_TTL seconds."""
+    if journal_urls:
+        for journal_url in journal_urls:
+            _journal_policies.delete(journal_url)
+            cache.delete(journal_policy_key(journal_url))
+        logger.info(f"Invalidated cached journal policies for {journal_urls}")
+        return
+
+    _journal_policies.clear()
+    key = f"{JOURNAL_POLICY_PREFIX}:generation"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+    logger.info("Invalidated all cached journal policies")
+
+
+def _response_cache(url):
+    # Feeds filtered by modified-since are never requested again: the filter
+    # changes with every import (see records.tasks._publications_url).
+    if settings.ELEMENTS_RESPONSE_CACHE and "modified-since=" not in url:
+        return caches[settings.ELEMENTS_RESPONSE_CACHE]
+    return None
+
+
+def response_key(url):
+    url_hash = hashlib.md5(url.encode("utf-8")).hexdigest()
+    return f"{RESPONSE_PREFIX}:{url_hash}"
+
+
+def get_cached_response(url):
+    """Return the cached response for a URL as a dict with its text and the
+    validators it came with ("etag", "last_modified"), or None."""
+    if (response_cache := _response_cache(url)) is None:
+        return None
+    return response_cache.get(response_key(url))
+
+
+def set_cached_response(url, response):
+    """Keep a response's text if it came with an ETag or Last-Modified header,
+    so the next request for the URL can be conditional. Responses larger than
+    ELEMENTS_RESPONSE_CACHE_MAX_BYTES are not kept."""
+    if (response_cache := _response_cache(url)) is None:
+        return
+    if len(response.content) > settings.ELEMENTS_RESPONSE_CACHE_MAX_BYTES:
+        return
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not (etag or last_modified):
+        return
+    response_cache.set(
+        response_key(url),
+        {"etag": etag, "last_modified": last_modified, "text": response.text},
+        timeout=settings.ELEMENTS_RESPONSE_CACHE_TTL,
+    )
+
+
+def conditional_headers(cached_response):
+    """Request headers that ask Elements to answer 304 Not Modified if the
+    cached response is still current."""
+    headers = {}
+    if cached_response:
+        if cached_response["etag"]:
+            headers["If-None-Match"] = cached_response["etag"]
+        if cached_response["last_modified"]:
+            headers["If-Modified-Since"] = cached_response["last_modified"]
+    return headers
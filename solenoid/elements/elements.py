@@ -1,64 +1,254 @@
 import logging
-import xml.etree.ElementTree as ET
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import backoff
 import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, HTTPError, Timeout
 
 from django.conf import settings
 
-from .errors import RetryError
-from .xml_handlers import NS
+from .cache import (
+    conditional_headers,
+    get_cached_journal_policies,
+    get_cached_response,
+    set_cached_journal_policies,
+    set_cached_response,
+)
+from .errors import CircuitOpenError, RetryError
+from .traffic import check_circuit, record_failure, record_success, wait_for_slot
+from .xml_handlers import find_next_page_url, parse_journal_policies
 
 logger = logging.getLogger(__name__)
 
-AUTH = (settings.ELEMENTS_USER, settings.ELEMENTS_PASSWORD)
-
 PROXIES = {
     "http": settings.QUOTAGUARD_URL,
     "https": settings.QUOTAGUARD_URL,
 }
 
 
-@backoff.on_exception(backoff.expo, RetryError, max_tries=5)
-def get_from_elements(url):
-    """Issue a get request to the Elements API for a given URL. Return the
-    response text. Retries up to 5 times for known Elements API retry status
-    codes.
+class ElementsClient(object):
+    """Holds a pooled, keep-alive requests.Session for talking to the
+    Elements API, so that consecutive calls reuse the same TCP+TLS connection
+    through the proxy rather than handshaking every time. Auth and proxies are
+    set once on the session instead of being passed with every request.
+    """
+
+    def __init__(self, pool_size=None, timeout=None):
+        self.pool_size = pool_size or settings.ELEMENTS_POOL_SIZE
+        self.timeout = timeout or settings.ELEMENTS_TIMEOUT
+        self.session = requests.Session()
+        self.session.auth = (settings.ELEMENTS_USER, settings.ELEMENTS_PASSWORD)
+        self.session.proxies.update(PROXIES)
+        self.session.headers.update({"Connection": "keep-alive"})
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url, headers=None):
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def patch(self, url, xml_data):
+        return self.session.patch(
+            url,
+            data=xml_data,
+            headers={"Content-Type": "text/xml"},
+            timeout=self.timeout,
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_pid = None
+
+
+def get_client():
+    """Return the ElementsClient for this process, creating it on first use.
+    Celery and gunicorn fork their workers, and a pooled connection must never
+    be shared across a fork, so the client is keyed to the current pid.
     """
-    response = requests.get(url, proxies=PROXIES, auth=AUTH, timeout=10)
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        _client = ElementsClient()
+        _client_pid = os.getpid()
+    return _client
+
+
+def reset_client():
+    """Close and discard this process's ElementsClient (e.g. after changing
+    Elements settings)."""
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        _client.close()
+    _client = None
+    _client_pid = None
+
+
+class RequestStats(object):
+    """Counts the Elements requests made, and the bytes they fetched, while it
+    is being tracked (see track_requests), along with the responses and
+    journal policies that came from a cache instead. Safe to update from the
+    threads that fetch pages and papers in the background."""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_fetched = 0
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+
+    def add_request(self, response):
+        with self._lock:
+            self.requests += 1
+            self.bytes_fetched += len(response.content)
+
+    def add_cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+
+_request_stats: ContextVar = ContextVar("elements_request_stats", default=None)
+
+
+@contextmanager
+def track_requests():
+    """Count the Elements requests made within the block, including those
+    made by the background threads of get_paged and anything else that
+    submits work with submit_in_context, into the RequestStats it yields."""
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit, running fn in a copy of the current context, so that
+    requests it makes are counted by any track_requests block around the
+    caller."""
+    return executor.submit(copy_context().run, fn, *args, **kwargs)
+
+
+def _count_cache_hit():
+    if (stats := _request_stats.get()) is not None:
+        stats.add_cache_hit()
+
+
+def _check_response(response):
     if response.status_code in [409, 500, 504]:
         raise RetryError(
             f"Elements response status {response.status_code} requires retry"
         )
     response.raise_for_status()
+
+
+def _call_elements(method, *args, **kwargs):
+    """Make one Elements API call through the shared rate limiter and circuit
+    breaker (see traffic.py) and check its response."""
+    trial = check_circuit()
+    wait_for_slot()
+    try:
+        response = method(*args, **kwargs)
+        if (stats := _request_stats.get()) is not None:
+            stats.add_request(response)
+        _check_response(response)
+    except (RetryError, Timeout, ConnectionError):
+        record_failure(trial)
+        raise
+    except HTTPError:
+        # Elements answered, so it has recovered, even if not with success.
+        record_success(trial)
+        raise
+    record_success(trial)
+    return response
+
+
+def _circuit_open(e):
+    # Retrying straight away can't help while the breaker is open; leave it to
+    # the caller (e.g. a Celery task's autoretry) to try again later.
+    return isinstance(e, CircuitOpenError)
+
+
+@backoff.on_exception(backoff.expo, RetryError, max_tries=5, giveup=_circuit_open)
+def get_from_elements(url):
+    """Issue a get request to the Elements API for a given URL. Return the
+    response text. Retries up to 5 times for known Elements API retry status
+    codes.
+
+    Responses with an ETag or Last-Modified header are cached (see
+    ELEMENTS_RESPONSE_CACHE), and later requests for the same URL are made
+    conditional; if Elements answers 304 Not Modified, the cached text is
+    returned.
+    """
+    cached = get_cached_response(url)
+    response = _call_elements(get_client().get, url, headers=conditional_headers(cached))
+    if response.status_code == 304 and cached:
+        logger.info(f"Using cached response for {url}")
+        _count_cache_hit()
+        return cached["text"]
+    set_cached_response(url, response)
     return response.text
 
 
-def get_paged(url):
-    page = get_from_elements(url)
-    yield (page)
-    next = ET.fromstring(page).find(".//*[@position='next']", NS)
-    if next is not None:
-        url = next.get("href")
-        yield from get_paged(url)
+def get_paged(url, per_page=None):
+    """Yield (page, next_url) for each page of a paged Elements feed, starting
+    at url; next_url is None on the last page. While the caller works on one
+    page, the next one is already being fetched in the background. Pages are
+    walked iteratively, so long feeds don't grow the stack, and each page is
+    only scanned as far as its next-page link; the full parse is left to the
+    consumer, which can reuse next_url rather than looking for it again. If
+    per_page is given (or set in ELEMENTS_PAGE_SIZE), it is sent as the feed's
+    per-page size.
+    """
+    per_page = per_page or settings.ELEMENTS_PAGE_SIZE
+    if per_page:
+        url = _set_query_param(url, "per-page", per_page)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = submit_in_context(executor, get_from_elements, url)
+        while future is not None:
+            page = future.result()
+            if next_url := find_next_page_url(page):
+                future = submit_in_context(executor, get_from_elements, next_url)
+            else:
+                future = None
+            yield page, next_url
 
 
-@backoff.on_exception(backoff.expo, RetryError, max_tries=5)
+def _set_query_param(url, name, value):
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != name]
+    query.append((name, str(value)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+@backoff.on_exception(backoff.expo, RetryError, max_tries=5, giveup=_circuit_open)
 def patch_elements_record(url, xml_data):
     """Issue a patch to the Elements API for a given item record URL, with the
     given update data. Return the response. Retries up to 5 times for known Elements
     API retry status codes."""
-    response = requests.patch(
-        url,
-        data=xml_data,
-        headers={"Content-Type": "text/xml"},
-        proxies=PROXIES,
-        auth=AUTH,
-        timeout=10,
-    )
-    if response.status_code in [409, 500, 504]:
-        raise RetryError(
-            f"Elements response status {response.status_code} requires retry"
-        )
-    response.raise_for_status()
+    response = _call_elements(get_client().patch, url, xml_data)
     return response.text
+
+
+def get_journal_policies(journal_url):
+    """Return parsed policy data for the journal at the given Elements URL.
+    Journal policies rarely change and an author's papers tend to cluster in a
+    few journals, so results are cached (see solenoid.elements.cache) and
+    Elements is only asked on a cache miss."""
+    if (policy_data := get_cached_journal_policies(journal_url)) is not None:
+        logger.info(f"Using cached policies for journal {journal_url}")
+        _count_cache_hit()
+        return policy_data
+    policy_xml = get_from_elements(f"{journal_url}/policies?detail=full")
+    policy_data = parse_journal_policies(policy_xml)
+    set_cached_journal_policies(journal_url, policy_data)
+    return policy_data
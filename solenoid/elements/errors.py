@@ -10,3 +10,12 @@ class RetryError(Error):
     """
 
     pass
+
+
+class CircuitOpenError(RetryError):
+    """Exception raised instead of calling the Symplectic Elements API while
+    the circuit breaker is open (see traffic.py). Like any RetryError, the
+    call is worth trying again later.
+    """
+
+    pass
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from solenoid.elements.cache import invalidate_journal_policies
+
+
+class Command(BaseCommand):
+    help = (
+        "Clear cached Elements journal policies, either for the given journal "
+        "URLs or, if none are given, for all journals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "journal_urls",
+            nargs="*",
+            help="Elements URLs of journals to clear, e.g. "
+            "https://pubdata.mit.edu:8091/secure-api/v5.5/journals/1234",
+        )
+
+    def handle(self, *args, **options):
+        invalidate_journal_policies(options["journal_urls"])
+        if options["journal_urls"]:
+            self.stdout.write(
+                f"Cleared cached policies for {len(options['journal_urls'])} journal(s)."
+            )
+        else:
+            self.stdout.write("Cleared all cached journal policies.")
@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from solenoid.elements.stub import ElementsStub, make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Elements API, serving users, "
+        "publications feeds, publications and journal policies generated from "
+        "the XML fixtures, for trying out and timing imports offline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8091)
+        parser.add_argument(
+            "--authors", type=int, default=10, help="Number of users to serve."
+        )
+        parser.add_argument(
+            "--papers", type=int, default=50, help="Number of publications per user."
+        )
+        parser.add_argument(
+            "--journals",
+            type=int,
+            default=5,
+            help="Number of journals the publications are spread over.",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=25,
+            help="Publications per feed page, unless the request gives per-page.",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.0,
+            help="Seconds to wait before answering each request.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Fraction (0-1) of requests to answer with an error status.",
+        )
+        parser.add_argument(
+            "--errors",
+            default="409,500,504",
+            help="Comma-separated error statuses to choose from.",
+        )
+        parser.add_argument(
+            "--seed", type=int, help="Random seed, for repeatable error injection."
+        )
+
+    def handle(self, *args, **options):
+        if options["authors"] < 1:
+            raise CommandError("--authors must be at least 1")
+        if not 0 <= options["error_rate"] <= 1:
+            raise CommandError("--error-rate must be between 0 and 1")
+        try:
+            error_statuses = tuple(int(s) for s in options["errors"].split(","))
+        except ValueError:
+            raise CommandError(f"Invalid --errors: {options['errors']}")
+
+        base_url = f"http://{options['host']}:{options['port']}/secure-api/v5.5/"
+        try:
+            stub = ElementsStub(
+                base_url,
+                authors=options["authors"],
+                papers_per_author=options["papers"],
+                journals=options["journals"],
+                page_size=options["page_size"],
+                latency=options["latency"],
+                error_rate=options["error_rate"],
+                error_statuses=error_statuses,
+                seed=options["seed"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        server = make_server(stub, options["host"], options["port"])
+
+        self.stdout.write(
+            f"Serving {options['authors']} authors with {options['papers']} "
+            f"publications each at {base_url}\n"
+            f"Set DJANGO_ELEMENTS_ENDPOINT={base_url} to import from it; "
+            f"Elements user IDs are "
+            f"{stub.user_ids[0]}-{stub.user_ids[-1]}."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from solenoid.elements.traffic import get_traffic_state, reset_traffic_state
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the state of the Elements rate limiter and circuit breaker, "
+        "shared by all processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Close the circuit breaker and zero the counters.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            reset_traffic_state()
+            self.stdout.write("Reset Elements traffic state.")
+        for name, value in get_traffic_state().items():
+            self.stdout.write(f"{name}: {value}")
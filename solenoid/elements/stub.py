@@ -0,0 +1,275 @@
+import datetime as dt
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# The fixtures were captured from an Elements instance at this address; the
+# stub rewrites it to its own.
+FIXTURE_ENDPOINT = "https://org-url:port/secure-api/v5.5/"
+FIXTURE_USER_ID = "98765"
+FIXTURE_PAPER_ID = "12345"
+FIXTURE_TITLE = "I am the Title of a Publication"
+# Every generated publication was last modified when the fixture was.
+LAST_MODIFIED = dt.datetime(2020, 2, 4, 3, 35, 51, tzinfo=dt.timezone.utc)
+
+# Stub user IDs start here; a paper ID is its author's user ID followed by the
+# paper's five-digit number within the author's feed.
+FIRST_USER_ID = 100001
+PAPER_DIGITS = 5
+
+ENTRY_RE = re.compile(r"<entry>.*</entry>", re.DOTALL)
+
+FEED_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:api="http://www.symplectic.co.uk/publications/api">
+  <api:schema-version>5.5</api:schema-version>
+  <id>tag:elements@organisation,5.16:/secure-api/v5.5/feeds/users/{user_id}/publications</id>
+  <title>Publications related to the user: Author, Person</title>
+  <api:pagination results-count="{count}" items-per-page="{per_page}">{pages}</api:pagination>
+{entries}
+</feed>
+"""
+
+PAGE_TEMPLATE = '<api:page position="{position}" number="{number}" href="{href}"/>'
+
+
+def _read_fixture(filename):
+    with open(os.path.join(settings.FIXTURE_DIRS[0], filename), "r") as f:
+        return f.read()
+
+
+class ElementsStub(object):
+    """A stand-in for the Symplectic Elements API, generating its responses
+    from the XML fixtures in solenoid/fixtures, so that imports can be run and
+    timed without a real Elements instance (see the elements_stub command).
+
+    It serves a corpus of `authors` users, each with `papers_per_author`
+    importable journal articles spread over `journals` journals: the users,
+    their paged publications feeds (with the full publication object in each
+    entry, as with detail=full), the publications, and the journals'
+    policies. Updates to publications (PATCH) are accepted and discarded.
+    Over HTTP (see make_server), successful GETs carry an ETag, and a request
+    whose If-None-Match matches it gets a 304 with no body.
+
+    Each response is delayed by `latency` seconds, and a fraction
+    `error_rate` of them fail instead with one of `error_statuses`, to
+    exercise retries, the rate limiter and the circuit breaker.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        authors=10,
+        papers_per_author=50,
+        journals=5,
+        page_size=25,
+        latency=0.0,
+        error_rate=0.0,
+        error_statuses=(409, 500, 504),
+        seed=None,
+    ):
+        if papers_per_author >= 10**PAPER_DIGITS:
+            raise ValueError(f"At most {10**PAPER_DIGITS - 1} papers per author")
+        self.base_url = base_url
+        self.base_path = urlsplit(base_url).path
+        self.authors = authors
+        self.papers_per_author = papers_per_author
+        self.journals = journals
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.random = random.Random(seed)
+
+        self.user_template = self._localize(_read_fixture("author.xml"))
+        self.paper_template = self._localize(_read_fixture("publication.xml"))
+        self.entry_template = ENTRY_RE.search(self.paper_template).group(0)
+        self.policies_template = self._localize(_read_fixture("journal-policies.xml"))
+
+    def _localize(self, xml):
+        xml = xml.replace(FIXTURE_ENDPOINT, self.base_url)
+        return xml.replace("mock://api.com/", self.base_url)
+
+    @property
+    def user_ids(self):
+        return [str(FIRST_USER_ID + i) for i in range(self.authors)]
+
+    def _is_user(self, user_id):
+        return (
+            user_id.isdigit()
+            and FIRST_USER_ID <= int(user_id) < FIRST_USER_ID + self.authors
+        )
+
+    def _paper_ids(self, user_id):
+        return [
+            f"{user_id}{number:0{PAPER_DIGITS}d}"
+            for number in range(1, self.papers_per_author + 1)
+        ]
+
+    def _is_paper(self, paper_id):
+        user_id, number = paper_id[:-PAPER_DIGITS], paper_id[-PAPER_DIGITS:]
+        return (
+            self._is_user(user_id)
+            and number.isdigit()
+            and 0 < int(number) <= self.papers_per_author
+        )
+
+    def user_xml(self, user_id):
+        return (
+            self.user_template.replace(FIXTURE_USER_ID, user_id)
+            .replace('proprietary-id="MITID"', f'proprietary-id="MIT{user_id}"')
+            .replace("PERSONA", f"PERSON{user_id}")
+            .replace("<api:first-name>Person</", f"<api:first-name>Person {user_id}</")
+        )
+
+    def _paper(self, template, paper_id):
+        user_id = paper_id[:-PAPER_DIGITS]
+        journal = int(paper_id) % self.journals
+        return (
+            template.replace(FIXTURE_PAPER_ID, paper_id)
+            .replace(FIXTURE_USER_ID, user_id)
+            .replace(FIXTURE_TITLE, f"{FIXTURE_TITLE} {paper_id}")
+            .replace("journals/0000", f"journals/{journal:04d}")
+        )
+
+    def paper_xml(self, paper_id):
+        return self._paper(self.paper_template, paper_id)
+
+    def feed_xml(self, user_id, query):
+        """One page of the user's publications feed. Pages are numbered from
+        1 and hold per-page entries (or page_size if not given). If
+        modified-since is given and later than the publications' last
+        modification, the feed is empty, as after an import that is up to
+        date; a modified-since without a time zone is taken to be in UTC.
+        Raises ValueError if any of these parameters is malformed."""
+        paper_ids = self._paper_ids(user_id)
+        if since := query.get("modified-since"):
+            since = dt.datetime.fromisoformat(since)
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=dt.timezone.utc)
+            if since >= LAST_MODIFIED:
+                paper_ids = []
+        per_page = int(query.get("per-page") or self.page_size)
+        number = int(query.get("page") or 1)
+        if per_page < 1 or number < 1:
+            raise ValueError("page and per-page must be at least 1")
+        start = (number - 1) * per_page
+
+        def page(position, page_number):
+            href = f"{self.base_url}users/{user_id}/publications?" + urlencode(
+                dict(query, page=page_number)
+            )
+            return PAGE_TEMPLATE.format(
+                position=position, number=page_number, href=href.replace("&", "&amp;")
+            )
+
+        pages = page("this", number)
+        if start + per_page < len(paper_ids):
+            pages += page("next", number + 1)
+        return FEED_TEMPLATE.format(
+            user_id=user_id,
+            count=len(paper_ids),
+            per_page=per_page,
+            pages=pages,
+            entries="\n".join(
+                self._paper(self.entry_template, paper_id)
+                for paper_id in paper_ids[start : start + per_page]
+            ),
+        )
+
+    def policies_xml(self, journal):
+        return self.policies_template.replace("journals/0000", f"journals/{journal}")
+
+    def respond(self, method, path, query=None):
+        """Return the status and body of the response to a request for the
+        given path (relative to base_url) and query parameters. Malformed
+        feed parameters get a 400 response."""
+        query = query or {}
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self.random.choice(self.error_statuses), ""
+
+        parts = path.strip("/").split("/")
+        if method == "PATCH":
+            if (
+                len(parts) == 2
+                and parts[0] == "publications"
+                and self._is_paper(parts[1])
+            ):
+                return 200, ""
+        elif parts[0] == "users" and len(parts) in (2, 3):
+            if self._is_user(parts[1]):
+                if len(parts) == 2:
+                    return 200, self.user_xml(parts[1])
+                if parts[2] == "publications":
+                    try:
+                        return 200, self.feed_xml(parts[1], query)
+                    except ValueError as e:
+                        return 400, str(e)
+        elif parts[0] == "publications" and len(parts) == 2:
+            if self._is_paper(parts[1]):
+                return 200, self.paper_xml(parts[1])
+        elif parts[0] == "journals" and len(parts) == 3 and parts[2] == "policies":
+            return 200, self.policies_xml(parts[1])
+        return 404, ""
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        url = urlsplit(self.path)
+        if length := int(self.headers.get("Content-Length") or 0):
+            self.rfile.read(length)
+        status, body = self.server.stub.respond(
+            self.command,
+            url.path.removeprefix(self.server.stub.base_path),
+            dict(parse_qsl(url.query)),
+        )
+        content = body.encode("utf-8")
+        if self.command == "GET" and status == 200:
+            etag = f'"{hashlib.md5(content).hexdigest()}"'
+            if etag in self._if_none_match():
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        else:
+            etag = None
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _if_none_match(self):
+        return [
+            tag.strip().removeprefix("W/")
+            for tag in self.headers.get("If-None-Match", "").split(",")
+        ]
+
+    do_GET = _respond
+    do_PATCH = _respond
+
+    def log_message(self, format, *args):
+        logger.info(format % args)
+
+
+def make_server(stub, host, port):
+    """An HTTP server answering requests with the given ElementsStub, one
+    thread per connection."""
+    server = ThreadingHTTPServer((host, port), StubRequestHandler)
+    server.daemon_threads = True
+    server.stub = stub
+    return server
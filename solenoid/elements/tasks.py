@@ -1,5 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from celery import shared_task
+from celery.exceptions import MaxRetriesExceededError
 from celery.utils.log import get_task_logger
+from requests.exceptions import RequestException
+
+from django.conf import settings
 
 from .elements import patch_elements_record
 from .errors import RetryError
@@ -10,3 +16,50 @@ logger = get_task_logger(__name__)
 @shared_task(bind=True, autoretry_for=(RetryError,), retry_backoff=True)
 def task_patch_elements_record(self, url, xml_data):
     return patch_elements_record(url, xml_data)
+
+
+@shared_task(bind=True, max_retries=3)
+def task_patch_elements_records(self, paper_ids, xml_data, outcomes=None):
+    """Patch the Elements record of each paper with the same update, e.g. all
+    the papers in one sent email. Each paper is patched once, however often it
+    is listed, with at most ELEMENTS_PATCH_CONCURRENCY patches in flight over
+    the pooled Elements session.
+
+    Papers that still need a retry after patch_elements_record's own backoff
+    are retried together later, up to max_retries times; the outcomes of the
+    papers patched so far are passed on to the retry as outcomes. Returns the
+    outcome for each paper, keyed by paper ID.
+    """
+    paper_ids = list(dict.fromkeys(paper_ids))
+    logger.info(f"Patching {len(paper_ids)} Elements records")
+
+    def patch(paper_id):
+        url = f"{settings.ELEMENTS_ENDPOINT}publications/{paper_id}"
+        return patch_elements_record(url, xml_data)
+
+    outcomes = dict(outcomes or {})
+    to_retry = []
+    with ThreadPoolExecutor(max_workers=settings.ELEMENTS_PATCH_CONCURRENCY) as executor:
+        futures = [(paper_id, executor.submit(patch, paper_id)) for paper_id in paper_ids]
+        for paper_id, future in futures:
+            try:
+                future.result()
+                outcomes[paper_id] = "Patched"
+            except RetryError as e:
+                to_retry.append(paper_id)
+                outcomes[paper_id] = f"Failed: {e}"
+            except RequestException as e:
+                outcomes[paper_id] = f"Failed: {e}"
+            logger.info(f"Elements record for paper #{paper_id}: {outcomes[paper_id]}")
+
+    if to_retry and not self.request.called_directly:
+        try:
+            raise self.retry(
+                args=(to_retry, xml_data),
+                kwargs={"outcomes": outcomes},
+                countdown=60 * 2**self.request.retries,
+            )
+        except MaxRetriesExceededError:
+            logger.warning(f"Giving up patching Elements records for {to_retry}")
+
+    return outcomes
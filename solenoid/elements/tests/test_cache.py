@@ -0,0 +1,118 @@
+import pytest
+
+from django.core.management import call_command
+
+from solenoid.elements.cache import (
+    LRUCache,
+    get_cached_journal_policies,
+    get_cached_response,
+    invalidate_journal_policies,
+    set_cached_journal_policies,
+)
+from solenoid.elements.elements import get_from_elements, get_journal_policies
+
+JOURNAL_URL = "mock://api.com/journals/0000"
+
+
+@pytest.fixture()
+def response_cache(settings):
+    settings.ELEMENTS_RESPONSE_CACHE = "default"
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2, ttl=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert lru.get("a") == 1
+    assert lru.get("b") is None
+    assert lru.get("c") == 3
+
+
+def test_lru_cache_expires_entries():
+    lru = LRUCache(maxsize=2, ttl=-1)
+    lru.set("a", 1)
+    assert lru.get("a") is None
+
+
+def test_get_journal_policies_is_cached(mock_elements):
+    first = get_journal_policies(JOURNAL_URL)
+    second = get_journal_policies(JOURNAL_URL)
+    assert first == second
+    assert first["C-Method-Of-Acquisition"] == "RECRUIT_FROM_AUTHOR_FPV"
+    assert mock_elements.call_count == 1
+
+
+def test_invalidate_one_journal():
+    set_cached_journal_policies(JOURNAL_URL, {"C-Method-Of-Acquisition": "x"})
+    set_cached_journal_policies("mock://other", {"C-Method-Of-Acquisition": "y"})
+    invalidate_journal_policies([JOURNAL_URL])
+    assert get_cached_journal_policies(JOURNAL_URL) is None
+    assert get_cached_journal_policies("mock://other") is not None
+
+
+def test_clear_journal_policy_cache_command():
+    set_cached_journal_policies(JOURNAL_URL, {"C-Method-Of-Acquisition": "x"})
+    call_command("clear_journal_policy_cache")
+    assert get_cached_journal_policies(JOURNAL_URL) is None
+
+
+def test_get_from_elements_serves_304_from_cache(mock_elements, response_cache):
+    url = "mock://api.com/etag"
+    mock_elements.get(
+        url,
+        [
+            {"text": "<xml>v1</xml>", "headers": {"ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+    assert get_from_elements(url) == "<xml>v1</xml>"
+    assert get_from_elements(url) == "<xml>v1</xml>"
+    assert "If-None-Match" not in mock_elements.request_history[0].headers
+    assert mock_elements.request_history[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_get_from_elements_replaces_changed_response(mock_elements, response_cache):
+    url = "mock://api.com/modified"
+    last_modified = "Wed, 01 Jan 2020 00:00:00 GMT"
+    mock_elements.get(
+        url,
+        [
+            {"text": "old", "headers": {"Last-Modified": last_modified}},
+            {"text": "new", "headers": {"ETag": '"v2"'}},
+        ],
+    )
+    get_from_elements(url)
+    assert get_from_elements(url) == "new"
+    assert mock_elements.request_history[1].headers["If-Modified-Since"] == last_modified
+    assert get_cached_response(url)["etag"] == '"v2"'
+
+
+def test_responses_without_validators_not_cached(mock_elements, response_cache):
+    get_from_elements("mock://api.com")
+    assert get_cached_response("mock://api.com") is None
+
+
+def test_response_cache_can_be_turned_off(mock_elements, settings):
+    settings.ELEMENTS_RESPONSE_CACHE = ""
+    url = "mock://api.com/etag"
+    mock_elements.get(url, text="<xml>v1</xml>", headers={"ETag": '"v1"'})
+    get_from_elements(url)
+    get_from_elements(url)
+    assert "If-None-Match" not in mock_elements.request_history[1].headers
+
+
+def test_modified_since_feeds_not_cached(mock_elements, response_cache):
+    url = "mock://api.com/etag?modified-since=2020-01-01T00:00:00Z"
+    mock_elements.get(url, text="<xml>v1</xml>", headers={"ETag": '"v1"'})
+    get_from_elements(url)
+    assert get_cached_response(url) is None
+
+
+def test_large_responses_not_cached(mock_elements, response_cache, settings):
+    settings.ELEMENTS_RESPONSE_CACHE_MAX_BYTES = 10
+    url = "mock://api.com/etag"
+    mock_elements.get(url, text="<xml>too long</xml>", headers={"ETag": '"v1"'})
+    get_from_elements(url)
+    assert get_cached_response(url) is None
@@ -1,7 +1,14 @@
 import pytest
 from requests.exceptions import HTTPError, Timeout
 
-from solenoid.elements.elements import get_from_elements, get_paged, patch_elements_record
+from solenoid.elements.elements import (
+    get_client,
+    get_from_elements,
+    get_paged,
+    patch_elements_record,
+    reset_client,
+    track_requests,
+)
 from solenoid.elements.errors import RetryError
 
 
@@ -28,7 +35,7 @@ def test_get_from_elements_timeout(mock_elements):
 
 def test_get_paged_success(mock_elements):
     response = get_paged("mock://api.com/page1")
-    for item in response:
+    for item, _ in response:
         assert "<xml page=" in item
 
 
@@ -50,3 +57,45 @@ def test_patch_elements_record_failure_raises_exception(mock_elements, patch_xml
 def test_patch_elements_record_timeout(mock_elements, patch_xml):
     with pytest.raises(Timeout):
         patch_elements_record("mock://api.com/timeout", patch_xml)
+
+
+def test_client_is_reused_within_process(mock_elements):
+    reset_client()
+    get_from_elements("mock://api.com")
+    client = get_client()
+    get_from_elements("mock://api.com")
+    assert get_client() is client
+
+
+def test_client_session_has_auth_and_pool_size(test_settings):
+    reset_client()
+    client = get_client()
+    assert client.session.auth == ("test_user", "test_password")
+    adapter = client.session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == test_settings.ELEMENTS_POOL_SIZE
+    reset_client()
+
+
+def test_get_paged_yields_pages_in_order(mock_elements):
+    pages = list(get_paged("mock://api.com/page1"))
+    assert ["<xml page='1'>", "<xml page='2'>"] == [page[:14] for page, _ in pages]
+    assert ["mock://api.com/page2", None] == [next_url for _, next_url in pages]
+    assert mock_elements.call_count == 2
+
+
+def test_get_paged_sets_per_page(mock_elements):
+    list(get_paged("mock://api.com/page1?detail=full", per_page=50))
+    assert mock_elements.request_history[0].qs == {
+        "detail": ["full"],
+        "per-page": ["50"],
+    }
+
+
+def test_track_requests_counts_background_fetches(mock_elements):
+    with track_requests() as stats:
+        pages = list(get_paged("mock://api.com/page1"))
+    get_from_elements("mock://api.com")
+
+    assert 2 == stats.requests
+    assert sum(len(page) for page, _ in pages) == stats.bytes_fetched
+    assert 0 == stats.cache_hits
@@ -0,0 +1,152 @@
+import re
+import threading
+from urllib.parse import parse_qsl
+
+import pytest
+import requests
+import requests_mock
+
+from solenoid.elements.stub import ElementsStub, make_server
+from solenoid.elements.xml_handlers import (
+    find_next_page_url,
+    parse_author_pubs_xml,
+    parse_author_xml,
+    parse_journal_policies,
+    parse_paper_xml,
+)
+from solenoid.records.models import Record
+from solenoid.records.tasks import import_author
+
+BASE_URL = "mock://stub/secure-api/v5.5/"
+
+
+@pytest.fixture()
+def stub():
+    return ElementsStub(BASE_URL, authors=2, papers_per_author=5, page_size=2)
+
+
+def test_stub_serves_users(stub):
+    status, body = stub.respond("GET", "users/100002")
+    author_data = parse_author_xml(body)
+
+    assert 200 == status
+    assert "MIT100002" == author_data["MIT ID"]
+    assert "PERSON100002@ORG.EDU" == author_data["Email"]
+    assert 404 == stub.respond("GET", "users/100003")[0]
+
+
+def test_stub_serves_paged_feeds(stub):
+    author_data = parse_author_xml(stub.respond("GET", "users/100001")[1])
+    pages = []
+    url = f"{BASE_URL}users/100001/publications?detail=full"
+    while url:
+        path, _, query = url.removeprefix(BASE_URL).partition("?")
+        status, page = stub.respond("GET", path, dict(parse_qsl(query)))
+        assert 200 == status
+        pages.append(page)
+        url = find_next_page_url(page)
+
+    papers = parse_author_pubs_xml(pages, author_data)
+    assert 3 == len(pages)
+    assert [f"1000010000{n}" for n in range(1, 6)] == [p["PaperID"] for p in papers]
+    assert 5 == len({p["Title1"] for p in papers})
+
+
+def test_stub_feed_is_empty_after_last_modification(stub):
+    page = stub.respond(
+        "GET", "users/100001/publications", {"modified-since": "2021-01-01T00:00:00Z"}
+    )[1]
+    assert 'results-count="0"' in page
+    assert find_next_page_url(page) is None
+
+
+def test_stub_takes_naive_modified_since_as_utc(stub):
+    page = stub.respond(
+        "GET", "users/100001/publications", {"modified-since": "2021-01-01T00:00:00"}
+    )[1]
+    assert 'results-count="0"' in page
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"modified-since": "yesterday"},
+        {"page": "two"},
+        {"per-page": "x"},
+        {"page": "0"},
+        {"per-page": "-1"},
+    ],
+)
+def test_stub_rejects_malformed_feed_params(stub, query):
+    assert 400 == stub.respond("GET", "users/100001/publications", query)[0]
+
+
+def test_stub_serves_publications_and_policies(stub):
+    paper_data = parse_paper_xml(stub.respond("GET", "publications/10000200003")[1])
+    assert "10000200003" == paper_data["PaperID"]
+    assert paper_data["Journal-elements-url"].startswith(f"{BASE_URL}journals/")
+
+    policies = parse_journal_policies(stub.respond("GET", "journals/0003/policies")[1])
+    assert policies
+    assert 404 == stub.respond("GET", "publications/10000200006")[0]
+
+
+def test_stub_injects_errors():
+    stub = ElementsStub(BASE_URL, error_rate=1, error_statuses=(409, 504), seed=1)
+    statuses = {stub.respond("GET", "users/100001")[0] for _ in range(20)}
+    assert {409, 504} == statuses
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_from_stub(test_settings, stub):
+    test_settings.ELEMENTS_ENDPOINT = BASE_URL
+
+    def respond(request, context):
+        path = request.path_url.split("?")[0].removeprefix("/secure-api/v5.5/")
+        context.status_code, body = stub.respond(
+            request.method, path, {k: v[0] for k, v in request.qs.items()}
+        )
+        return body
+
+    with requests_mock.Mocker() as m:
+        m.register_uri(requests_mock.ANY, re.compile("mock://stub/"), text=respond)
+        import_author("100001")
+
+    assert 5 == Record.objects.count()
+
+
+@pytest.fixture()
+def server_url():
+    stub = ElementsStub("http://127.0.0.1:0/secure-api/v5.5/", authors=1)
+    server = make_server(stub, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/secure-api/v5.5/"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_stub_server(server_url):
+    response = requests.get(f"{server_url}users/100001")
+    assert 200 == response.status_code
+    assert "MIT100001" in response.text
+
+
+def test_stub_server_answers_matching_etag_with_304(server_url):
+    url = f"{server_url}users/100001"
+    etag = requests.get(url).headers["ETag"]
+
+    response = requests.get(url, headers={"If-None-Match": etag})
+    assert 304 == response.status_code
+    assert "" == response.text
+    assert etag == response.headers["ETag"]
+
+    response = requests.get(url, headers={"If-None-Match": '"other"'})
+    assert 200 == response.status_code
+
+
+def test_stub_server_rejects_malformed_params(server_url):
+    response = requests.get(f"{server_url}users/100001/publications?page=x")
+    assert 400 == response.status_code
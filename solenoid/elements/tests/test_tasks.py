@@ -0,0 +1,59 @@
+from celery.exceptions import MaxRetriesExceededError
+
+from solenoid.elements.errors import RetryError
+from solenoid.elements.tasks import task_patch_elements_records
+
+
+def test_patch_elements_records_patches_each_paper_once(
+    mock_elements, patch_xml, test_settings
+):
+    mock_elements.patch("mock://api.com/publications/1", text="Success")
+    mock_elements.patch("mock://api.com/publications/2", text="Success")
+    outcomes = task_patch_elements_records(["1", "2", "1"], patch_xml)
+    assert outcomes == {"1": "Patched", "2": "Patched"}
+    patches = [r for r in mock_elements.request_history if r.method == "PATCH"]
+    assert sorted(r.url for r in patches) == [
+        "mock://api.com/publications/1",
+        "mock://api.com/publications/2",
+    ]
+    assert all(r.text == patch_xml for r in patches)
+
+
+def test_patch_elements_records_records_failures(mock_elements, patch_xml, test_settings):
+    mock_elements.patch("mock://api.com/publications/1", text="Success")
+    mock_elements.patch("mock://api.com/publications/2", status_code=400)
+    outcomes = task_patch_elements_records(["1", "2"], patch_xml)
+    assert outcomes["1"] == "Patched"
+    assert outcomes["2"].startswith("Failed: 400 Client Error")
+
+
+def test_patch_elements_records_passes_outcomes_to_retry(
+    monkeypatch, patch_xml, test_settings
+):
+    def patch(url, xml_data):
+        if url.endswith("/2"):
+            raise RetryError("Elements response status 409 requires retry")
+
+    retries = []
+
+    def retry(args, kwargs, countdown):
+        retries.append((args, kwargs))
+        raise MaxRetriesExceededError()
+
+    monkeypatch.setattr("solenoid.elements.tasks.patch_elements_record", patch)
+    monkeypatch.setattr(task_patch_elements_records, "retry", retry)
+    task_patch_elements_records.apply(args=(["1", "2"], patch_xml))
+
+    [(args, kwargs)] = retries
+    assert (["2"], patch_xml) == args
+    assert "Patched" == kwargs["outcomes"]["1"]
+
+
+def test_patch_elements_records_merges_earlier_outcomes(
+    mock_elements, patch_xml, test_settings
+):
+    mock_elements.patch("mock://api.com/publications/2", text="Success")
+    outcomes = task_patch_elements_records(
+        ["2"], patch_xml, outcomes={"1": "Patched", "2": "Failed: 409"}
+    )
+    assert outcomes == {"1": "Patched", "2": "Patched"}
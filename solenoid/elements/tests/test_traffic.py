@@ -0,0 +1,134 @@
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+
+from solenoid.elements import traffic
+from solenoid.elements.elements import get_from_elements
+from solenoid.elements.errors import CircuitOpenError
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.5
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(traffic, "time", fake)
+    return fake
+
+
+def test_wait_for_slot_limits_requests_per_second(settings, clock):
+    settings.ELEMENTS_RATE_LIMIT = 2
+    for _ in range(3):
+        traffic.wait_for_slot()
+    assert clock.sleeps == [0.5]
+    assert traffic.get_traffic_state()["throttled"] == 1
+
+
+def test_wait_for_slot_unlimited(settings, clock):
+    settings.ELEMENTS_RATE_LIMIT = 0
+    for _ in range(100):
+        traffic.wait_for_slot()
+    assert clock.sleeps == []
+
+
+def test_circuit_opens_after_threshold(settings):
+    settings.ELEMENTS_BREAKER_THRESHOLD = 2
+    traffic.record_failure()
+    traffic.check_circuit()
+    traffic.record_failure()
+    with pytest.raises(CircuitOpenError):
+        traffic.check_circuit()
+    state = traffic.get_traffic_state()
+    assert state["circuit_open"]
+    assert state["trips"] == 1
+    assert state["rejected"] == 1
+
+
+def test_half_open_circuit_lets_one_trial_through(settings):
+    settings.ELEMENTS_BREAKER_THRESHOLD = 1
+    settings.ELEMENTS_BREAKER_RESET = 0
+    traffic.record_failure()
+    assert traffic.check_circuit() is True
+    with pytest.raises(CircuitOpenError):
+        traffic.check_circuit()
+
+
+def test_successful_trial_closes_circuit(settings):
+    settings.ELEMENTS_BREAKER_THRESHOLD = 1
+    settings.ELEMENTS_BREAKER_RESET = 0
+    traffic.record_failure()
+    trial = traffic.check_circuit()
+    traffic.record_success(trial)
+    assert traffic.check_circuit() is False
+    assert traffic.check_circuit() is False
+    assert traffic.get_traffic_state()["recent_failures"] == 0
+
+
+def test_failed_trial_reopens_circuit(settings):
+    settings.ELEMENTS_BREAKER_THRESHOLD = 1
+    traffic.record_failure()
+    # Let the breaker become half-open.
+    traffic.cache.delete(traffic._key("open"))
+    trial = traffic.check_circuit()
+    traffic.record_failure(trial)
+    with pytest.raises(CircuitOpenError):
+        traffic.check_circuit()
+    assert traffic.get_traffic_state()["trips"] == 2
+
+
+def test_successful_request_makes_few_cache_calls(monkeypatch, mock_elements, clock):
+    calls = []
+    cache = traffic.cache
+
+    class CountingCache(object):
+        def __getattr__(self, name):
+            calls.append(name)
+            return getattr(cache, name)
+
+    monkeypatch.setattr(traffic, "cache", CountingCache())
+    get_from_elements("mock://api.com")
+    calls.clear()
+    get_from_elements("mock://api.com")
+    # One read of the breaker state, and the rate limiter's increment.
+    assert ["get_many", "incr"] == calls
+
+
+def test_open_circuit_skips_request(settings, mock_elements):
+    settings.ELEMENTS_BREAKER_THRESHOLD = 1
+    traffic.record_failure()
+    with pytest.raises(CircuitOpenError):
+        get_from_elements("mock://api.com")
+    assert mock_elements.call_count == 0
+
+
+def test_failed_requests_open_circuit(settings, mock_elements):
+    settings.ELEMENTS_BREAKER_THRESHOLD = 2
+    with pytest.raises(CircuitOpenError):
+        get_from_elements("mock://api.com/409")
+    # The third try is refused without calling Elements.
+    assert mock_elements.call_count == 2
+
+
+def test_elements_traffic_command(settings):
+    settings.ELEMENTS_BREAKER_THRESHOLD = 1
+    traffic.record_failure()
+    out = StringIO()
+    call_command("elements_traffic", stdout=out)
+    assert "circuit_open: True" in out.getvalue()
+
+    out = StringIO()
+    call_command("elements_traffic", "--reset", stdout=out)
+    assert "circuit_open: False" in out.getvalue()
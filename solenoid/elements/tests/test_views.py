@@ -1,8 +1,6 @@
 from unittest.mock import patch
-from urllib.parse import urljoin
 from xml.etree.ElementTree import tostring
 
-from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase, override_settings
 from freezegun import freeze_time
@@ -17,28 +15,28 @@ class ViewsTests(TestCase):
     fixtures = ["testdata.yaml"]
 
     @override_settings(USE_ELEMENTS=False)
-    @patch("solenoid.elements.tasks.task_patch_elements_record.delay")
+    @patch("solenoid.elements.tasks.task_patch_elements_records.delay")
     def test_use_elements_setting_respected(self, mock_patch):
         retval = wrap_elements_api_call(EmailMessage)
         assert retval is False
         mock_patch.assert_not_called()
 
     @override_settings(USE_ELEMENTS=True, ELEMENTS_PASSWORD=None)
-    @patch("solenoid.elements.tasks.task_patch_elements_record.delay")
+    @patch("solenoid.elements.tasks.task_patch_elements_records.delay")
     def test_elements_password_setting_respected(self, mock_patch):
         with self.assertRaises(ImproperlyConfigured):
             wrap_elements_api_call(EmailMessage)
         mock_patch.assert_not_called()
 
     @override_settings(USE_ELEMENTS=True, ELEMENTS_PASSWORD="foo")
-    @patch("solenoid.elements.tasks.task_patch_elements_record.delay")
+    @patch("solenoid.elements.tasks.task_patch_elements_records.delay")
     def test_checks_kwargs_for_username(self, mock_patch):
         with self.assertRaises(AssertionError):
             wrap_elements_api_call(EmailMessage, instance=EmailMessage.objects.get(pk=1))
         mock_patch.assert_not_called()
 
     @override_settings(USE_ELEMENTS=True, ELEMENTS_PASSWORD="foo")
-    @patch("solenoid.elements.tasks.task_patch_elements_record.delay")
+    @patch("solenoid.elements.tasks.task_patch_elements_records.delay")
     def test_checks_kwargs_for_instance(self, mock_patch):
         with self.assertRaises(AssertionError):
             wrap_elements_api_call(EmailMessage, username="username")
@@ -48,18 +46,14 @@ class ViewsTests(TestCase):
     @override_settings(
         USE_ELEMENTS=True, ELEMENTS_PASSWORD="foo", CELERY_ALWAYS_EAGER=True
     )
-    @patch("solenoid.elements.tasks.task_patch_elements_record.delay")
+    @patch("solenoid.elements.tasks.task_patch_elements_records.delay")
     def test_calls_task_with_proper_args(self, mock_patch):
         email = EmailMessage.objects.get(pk=1)
         wrap_elements_api_call(EmailMessage, username="username", instance=email)
 
-        for record in email.record_set.all():
-            xml = make_xml(username="username")
-            url = urljoin(
-                settings.ELEMENTS_ENDPOINT, "publications/{id}".format(id=record.paper_id)
-            )
-
-            mock_patch.assert_called_once_with(url, tostring(xml).decode("utf-8"))
+        xml = make_xml(username="username")
+        paper_ids = [record.paper_id for record in email.record_set.all()]
+        mock_patch.assert_called_once_with(paper_ids, tostring(xml).decode("utf-8"))
 
     def test_wrap_is_registered_with_email_sent(self):
         # You can't mock out the wrap function and test that the mock was
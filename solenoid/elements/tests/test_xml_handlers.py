@@ -4,9 +4,13 @@ import xml.etree.ElementTree as ET
 from freezegun import freeze_time
 
 from solenoid.elements.xml_handlers import (
+    NS,
+    _feed_entry_paper_data,
     extract_attribute,
     extract_field,
-    get_pub_date,
+    extract_paper_data,
+    iter_feed_entries,
+    make_pub_date,
     make_xml,
     parse_author_pubs_xml,
     parse_author_xml,
@@ -41,15 +45,19 @@ def test_extract_field_not_exists(publication_xml):
     assert field == ""
 
 
-def test_get_pub_date(publication_xml):
-    pub_root = ET.fromstring(publication_xml)
-    date = get_pub_date(pub_root)
+def _entry_pub_date(entry):
+    return make_pub_date(
+        entry.get("pub-year", ""), entry.get("pub-month", ""), entry.get("pub-day", "")
+    )
+
+
+def test_make_pub_date(publication_xml):
+    date = _entry_pub_date(next(iter_feed_entries(publication_xml)))
     assert date == datetime.date(2017, 2, 1)
 
 
-def test_get_pub_date_no_date(publication_no_date_xml):
-    pub_root = ET.fromstring(publication_no_date_xml)
-    date = get_pub_date(pub_root)
+def test_make_pub_date_no_date(publication_no_date_xml):
+    date = _entry_pub_date(next(iter_feed_entries(publication_no_date_xml)))
     assert date is None
 
 
@@ -82,11 +90,25 @@ def test_parse_author_pubs_xml(author_pubs_xml, caplog):
     author_data = {"Start Date": "2011-10-01", "End Date": "2020-06-30"}
     pubs = parse_author_pubs_xml([author_pubs_xml], author_data)
     print(pubs)
-    assert pubs == [
-        {"id": "2", "title": "Publication Two"},
-        {"id": "6", "title": "Publication Six"},
-        {"id": "9", "title": "Publication Nine"},
+    assert [(pub["PaperID"], pub["Title1"]) for pub in pubs] == [
+        ("2", "Publication Two"),
+        ("6", "Publication Six"),
+        ("9", "Publication Nine"),
     ]
+    assert pubs[0] == {
+        "Doi": "",
+        "Citation": "Publication Two Citation.",
+        "Publisher-name": "",
+        "C-Method-Of-Acquisition": "",
+        "PaperID": "2",
+        "C-Publisher-Related-Email-Message": "",
+        "Year Published": "2013",
+        "Title1": "Publication Two",
+        "Journal-name": "",
+        "Journal-elements-url": "",
+        "Volume": "",
+        "Issue": "",
+    }
 
 
 def test_parse_author_xml(author_xml):
@@ -131,3 +153,41 @@ def test_parse_paper_xml(publication_xml):
         "Volume": "95",
         "Issue": "",
     }
+
+
+PUB_DATE = ".//api:field[@name='publication-date']"
+
+
+def test_iter_feed_entries_matches_tree_extraction(
+    author_pubs_xml, author_pubs_updated_xml, fun_author_pubs_xml
+):
+    for feed in [author_pubs_xml, author_pubs_updated_xml, fun_author_pubs_xml]:
+        tree_entries = ET.fromstring(feed).findall("./atom:entry", NS)
+        stream_entries = list(iter_feed_entries(feed))
+        assert len(stream_entries) == len(tree_entries)
+        for tree_entry, stream_entry in zip(tree_entries, stream_entries):
+            assert _feed_entry_paper_data(stream_entry) == extract_paper_data(tree_entry)
+            assert _entry_pub_date(stream_entry) == make_pub_date(
+                extract_field(tree_entry, f"{PUB_DATE}//api:year"),
+                extract_field(tree_entry, f"{PUB_DATE}//api:month"),
+                extract_field(tree_entry, f"{PUB_DATE}//api:day"),
+            )
+
+
+def test_iter_feed_entries_handles_small_chunks(author_pubs_xml, monkeypatch):
+    monkeypatch.setattr("solenoid.elements.xml_handlers.PARSE_CHUNK_SIZE", 7)
+    author_data = {"Start Date": "2011-10-01", "End Date": "2020-06-30"}
+    pubs = parse_author_pubs_xml([author_pubs_xml], author_data)
+    assert [pub["PaperID"] for pub in pubs] == ["2", "6", "9"]
+
+
+def test_feed_entry_without_publication_keeps_paper_id():
+    feed = (
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:api="http://www.symplectic.co.uk/publications/api"><entry>'
+        '<api:relationship><api:related direction="from" category="publication" '
+        'id="7"/></api:relationship></entry></feed>'
+    )
+    paper_data = _feed_entry_paper_data(next(iter_feed_entries(feed)))
+    assert paper_data["PaperID"] == "7"
+    assert paper_data["Title1"] == ""
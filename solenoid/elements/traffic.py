@@ -0,0 +1,145 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .errors import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+TRAFFIC_PREFIX = "elements:traffic"
+METRICS = ["throttled", "failures", "rejected", "trips"]
+
+
+def _key(name):
+    return f"{TRAFFIC_PREFIX}:{name}"
+
+
+def _incr(key, timeout=None):
+    """Atomically increment a counter in the shared cache, creating it if
+    needed. Returns the new value."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        pass
+    if cache.add(key, 1, timeout=timeout):
+        return 1
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key expired between add() and incr().
+        cache.set(key, 1, timeout=timeout)
+        return 1
+
+
+def _count(metric):
+    _incr(_key(f"metrics:{metric}"))
+
+
+def wait_for_slot():
+    """Block until this process may send another request to Elements, so that
+    all workers together send at most ELEMENTS_RATE_LIMIT requests per second.
+
+    Requests are counted per one-second window in the shared cache (Redis on
+    Heroku), whose increments are atomic across workers. A request that
+    finds its window full waits for the next one.
+    """
+    limit = settings.ELEMENTS_RATE_LIMIT
+    if not limit:
+        return
+    while True:
+        now = time.time()
+        window = int(now)
+        if _incr(_key(f"rate:{window}"), timeout=2) <= limit:
+            return
+        _count("throttled")
+        time.sleep(window + 1 - now)
+
+
+def check_circuit():
+    """Raise CircuitOpenError if Elements has recently failed too often for
+    any more requests to be worth sending.
+
+    Once the breaker has been open for ELEMENTS_BREAKER_RESET seconds it is
+    half-open: a single request, from whichever caller claims the trial
+    first, is let through to see whether Elements has recovered, while the
+    rest keep failing fast. Returns True for that trial request, whose
+    outcome should be passed to record_success or record_failure.
+    """
+    state = cache.get_many([_key("open"), _key("tripped")])
+    if _key("open") not in state:
+        if _key("tripped") not in state:
+            return False
+        # A trial whose caller died without reporting back lapses, so that
+        # another caller can try.
+        if cache.add(_key("trial"), True, timeout=settings.ELEMENTS_TIMEOUT * 2):
+            logger.info("Elements circuit breaker half-open; sending a trial request")
+            return True
+    _count("rejected")
+    raise CircuitOpenError("Elements circuit breaker is open")
+
+
+def _trip():
+    """Mark the breaker, just opened, as needing a trial request to close."""
+    cache.set(_key("tripped"), True, timeout=None)
+    cache.delete(_key("trial"))
+    _count("trips")
+
+
+def record_failure(trial=False):
+    """Count a failed request (one Elements asked us to retry, or that timed
+    out). Once ELEMENTS_BREAKER_THRESHOLD failures have been seen within
+    ELEMENTS_BREAKER_WINDOW seconds, the breaker opens: requests fail fast for
+    ELEMENTS_BREAKER_RESET seconds, after which one trial request is let
+    through (see check_circuit). A failed trial opens the breaker again."""
+    _count("failures")
+    if trial:
+        cache.set(_key("open"), True, timeout=settings.ELEMENTS_BREAKER_RESET)
+        _trip()
+        logger.warning(
+            "Elements trial request failed; pausing requests for another "
+            f"{settings.ELEMENTS_BREAKER_RESET} seconds"
+        )
+        return
+    failures = _incr(_key("failures"), timeout=settings.ELEMENTS_BREAKER_WINDOW)
+    if failures >= settings.ELEMENTS_BREAKER_THRESHOLD:
+        if cache.add(_key("open"), True, timeout=settings.ELEMENTS_BREAKER_RESET):
+            _trip()
+            logger.warning(
+                f"Elements circuit breaker opened after {failures} failures; "
+                f"pausing requests for {settings.ELEMENTS_BREAKER_RESET} seconds"
+            )
+
+
+def record_success(trial=False):
+    """A successful trial request closes the breaker and forgets past
+    failures. Other successes cost nothing, so that the common path through
+    the breaker is a single cache read; failures that aren't followed by
+    enough others within ELEMENTS_BREAKER_WINDOW seconds expire on their own.
+    """
+    if trial:
+        cache.delete_many([_key("failures"), _key("tripped"), _key("trial")])
+        logger.info("Elements circuit breaker closed")
+
+
+def get_traffic_state():
+    """The current state of the rate limiter and circuit breaker, plus
+    counters of what they have done, for monitoring."""
+    counters = cache.get_many([_key(f"metrics:{metric}") for metric in METRICS])
+    return {
+        "rate_limit": settings.ELEMENTS_RATE_LIMIT,
+        "requests_this_second": cache.get(_key(f"rate:{int(time.time())}"), 0),
+        "circuit_open": bool(cache.get(_key("open"))),
+        "circuit_tripped": bool(cache.get(_key("tripped"))),
+        "recent_failures": cache.get(_key("failures"), 0),
+        **{metric: counters.get(_key(f"metrics:{metric}"), 0) for metric in METRICS},
+    }
+
+
+def reset_traffic_state():
+    """Close the breaker and zero all counters."""
+    cache.delete_many(
+        [_key("open"), _key("tripped"), _key("trial"), _key("failures")]
+        + [_key(f"metrics:{metric}") for metric in METRICS]
+    )
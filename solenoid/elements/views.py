@@ -1,5 +1,4 @@
 import logging
-from urllib.parse import urljoin
 from xml.etree.ElementTree import tostring
 
 from django.conf import settings
@@ -7,7 +6,7 @@ from django.core.exceptions import ImproperlyConfigured
 from django.dispatch import receiver
 from solenoid.emails.signals import email_sent
 
-from .tasks import task_patch_elements_record
+from .tasks import task_patch_elements_records
 from .xml_handlers import make_xml
 
 logger = logging.getLogger(__name__)
@@ -15,7 +14,8 @@ logger = logging.getLogger(__name__)
 
 @receiver(email_sent)
 def wrap_elements_api_call(sender, **kwargs):
-    """Calls the patch_elements_record celery task when an email has been sent."""
+    """Calls the patch_elements_records celery task when an email has been
+    sent."""
     logger.info("email_sent signal received")
 
     if not settings.USE_ELEMENTS:
@@ -39,12 +39,8 @@ def wrap_elements_api_call(sender, **kwargs):
     xml = make_xml(username=kwargs["username"])
     request_data = tostring(xml, encoding="unicode")
 
-    for record in instance.record_set.all():
-        url = urljoin(
-            settings.ELEMENTS_ENDPOINT, "publications/{id}".format(id=record.paper_id)
-        )
-
-        logger.info(f"Call patch_elements_record task for record #{record.pk}")
-
-        # Call task
-        task_patch_elements_record.delay(url, request_data)
+    # All the records share one update, so they are patched by a single task
+    # rather than one task per record.
+    paper_ids = list(instance.record_set.values_list("paper_id", flat=True))
+    logger.info(f"Call patch_elements_records task for email #{instance.pk}")
+    task_patch_elements_records.delay(paper_ids, request_data)
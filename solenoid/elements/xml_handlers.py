@@ -13,6 +13,19 @@ NS = {
     "api": "http://www.symplectic.co.uk/publications/api",
 }
 
+API_TAG = "{%s}" % NS["api"]
+ENTRY_TAG = "{%s}entry" % NS["atom"]
+FIELD_TAG = API_TAG + "field"
+DATE_PART_TAGS = {
+    API_TAG + "year": "year",
+    API_TAG + "month": "month",
+    API_TAG + "day": "day",
+}
+
+# Feed pages are handed to the streaming parser in chunks of this many
+# characters.
+PARSE_CHUNK_SIZE = 64 * 1024
+
 
 def extract_attribute(root: ET.Element, search_string: str, attribute: str) -> str:
     value = ""
@@ -34,21 +47,19 @@ def extract_field(root: ET.Element, search_string: str) -> str | None:
     return field
 
 
-def get_pub_date(root: ET.Element) -> dt.date | None:
+def make_pub_date(
+    year_text: str | None, month_text: str | None, day_text: str | None
+) -> dt.date | None:
     try:
-        year = int(
-            extract_field(root, ".//api:field[@name='publication-date']//api:year")  # type: ignore[arg-type]
-        )
+        year = int(year_text)  # type: ignore[arg-type]
     except ValueError:
         return None
     try:
-        month = int(
-            extract_field(root, ".//api:field[@name='publication-date']//api:month")  # type: ignore[arg-type]
-        )
+        month = int(month_text)  # type: ignore[arg-type]
     except ValueError:
         month = 1
     try:
-        day = int(extract_field(root, ".//api:field[@name='publication-date']//api:day"))  # type: ignore[arg-type]
+        day = int(day_text)  # type: ignore[arg-type]
     except ValueError:
         day = 1
     try:
@@ -85,82 +96,185 @@ def parse_author_pubs_xml(xml_gen: Generator, author_data: dict) -> list:
     """Takes a an author-publications record feed from Symplectic
     Elements, parses each record according to local rules for which
     publications should be requested based on certain metadata fields, and
-    returns a list of publication IDs that should be imported into Solenoid and
-    requested from the author.
+    returns a list of paper data dicts (as produced by parse_paper_xml) for the
+    publications that should be imported into Solenoid and requested from the
+    author. The feed is requested with detail=full, so each entry already
+    holds the full publication object.
+
+    Pages are streamed one entry at a time (see iter_feed_entries) rather
+    than parsed whole.
     """
     RESULTS = []
     for page in xml_gen:
-        root = ET.fromstring(page)
-        pub_id = None
-        title = None
-        for entry in root.findall("./atom:entry", NS):
-            if (
-                pub_element := entry.find(".//api:object[@category='publication']", NS)
-            ) is not None:
-                pub_id = pub_element.get("id")
-            if (
-                title_element := entry.find(".//api:field[@name='title']/api:text", NS)
-            ) is not None:
-                title = title_element.text
-            # Filter for papers to be requested based on various criteria
-            pub_date = get_pub_date(entry)
-            if not pub_date:
-                pass
-            # Paper was published after OA policy enacted
-            elif pub_date <= dt.date(2009, 3, 18):
-                continue
-            # Paper was published while author was MIT faculty
-            elif pub_date < dt.date.fromisoformat(
-                author_data["Start Date"]
-            ) or pub_date > dt.date.fromisoformat(author_data["End Date"]):
-                continue
-            # Paper does not have a library status
-            if entry.find(".//api:library-status", NS):
-                continue
-            # Publication type is either a journal article, book chapter, or
-            # conference proceeding
-            pub_type = extract_attribute(entry, ".//api:object", "type-id")
-            if pub_type not in ("3", "4", "5"):
+        for entry in iter_feed_entries(page):
+            if _should_request(entry, author_data):
+                RESULTS.append(_feed_entry_paper_data(entry))
+    return RESULTS
+
+
+def iter_feed_entries(page: str | bytes) -> Generator[dict, None, None]:
+    """Streams through one page of an author-publications feed and yields,
+    for each atom:entry, every value that the request rules and the paper data
+    need, gathered in a single walk of the entry. Each entry is discarded once
+    it has been read, so memory use stays flat however large the page is.
+
+    Where the tree-based handlers take the first match of a ".//" search, the
+    first value in document order is kept here.
+    """
+    stack: list = []
+    entry: dict | None = None
+    in_pub_date = 0
+    for event, element in _iter_parse_events(page):
+        tag = element.tag
+        if event == "start":
+            stack.append(element)
+            if tag == ENTRY_TAG:
+                entry = {"oa-policy-exception-types": []}
+            elif entry is None:
                 continue
-            # Paper does not have any OA policy exceptions, except for "Waiver"
-            # which we do request
-            if entry.find(".//api:oa-policy-exception", NS):
-                exceptions = [
-                    e.text
-                    for e in entry.findall(".//api:oa-policy-exception/api:type", NS)
-                ]
-                if "Waiver" not in exceptions:
-                    continue
-            # If paper has a manual entry record in Elements, none of the
-            # following fields are true
-            if entry.find(".//api:record[@source-name='manual']", NS):
+            elif tag == API_TAG + "related":
+                if element.get("category") == "publication":
+                    entry.setdefault("related-id", element.get("id", ""))
+            elif tag == API_TAG + "object":
+                entry.setdefault("type-id", element.get("type-id", ""))
+                if element.get("category") == "publication":
+                    entry.setdefault("id", element.get("id", ""))
+            elif tag == API_TAG + "journal":
+                entry.setdefault("journal-href", element.get("href", ""))
+            elif tag == FIELD_TAG and element.get("name") == "publication-date":
+                in_pub_date += 1
+            continue
+
+        stack.pop()
+        if entry is None:
+            continue
+        parent = stack[-1] if stack else None
+        if tag == ENTRY_TAG:
+            yield entry
+            entry = None
+            element.clear()
+            if parent is not None:
+                parent.remove(element)
+        elif tag == API_TAG + "text":
+            if parent is not None and parent.tag == FIELD_TAG:
+                entry.setdefault(f"field:{parent.get('name')}", element.text)
+        elif tag == API_TAG + "boolean":
+            if parent is not None and parent.tag == FIELD_TAG:
+                entry.setdefault(f"boolean:{parent.get('name')}", element.text)
+        elif tag in DATE_PART_TAGS:
+            if in_pub_date:
+                entry.setdefault(f"pub-{DATE_PART_TAGS[tag]}", element.text)
+                grandparent = stack[-2] if len(stack) > 1 else None
                 if (
-                    entry.find(
-                        ".//api:field[@name='c-do-not-request']/api:boolean", NS
-                    ).text
-                    == "true"
-                    or entry.find(".//api:field[@name='c-optout']/api:boolean", NS).text
-                    == "true"
-                    or entry.find(".//api:field[@name='c-received']/api:boolean", NS).text
-                    == "true"
-                    or entry.find(
-                        ".//api:field[@name='c-requested']/api:boolean", NS
-                    ).text
-                    == "true"
+                    tag == API_TAG + "year"
+                    and parent is not None
+                    and parent.tag == API_TAG + "date"
+                    and grandparent is not None
+                    and grandparent.tag == FIELD_TAG
                 ):
-                    continue
-            # If paper has a dspace record in Elements, status is not 'Public'
-            # or 'Private' (in either case it has been deposited and should not
-            # be requested)
-            if entry.find(".//api:record[@source-name='dspace']", NS):
-                status = extract_field(
-                    entry, ".//api:field[@name='repository-status']/api:text"
-                )
-                if status == "Public" or status == "Private":
-                    continue
-            # If paper has passed all the checks above, add it to request list
-            RESULTS.append({"id": pub_id, "title": title})
-    return RESULTS
+                    entry.setdefault("year-published", element.text)
+        elif tag == FIELD_TAG and element.get("name") == "publication-date":
+            in_pub_date -= 1
+        elif tag == API_TAG + "type":
+            if parent is not None and parent.tag == API_TAG + "oa-policy-exception":
+                entry["oa-policy-exception-types"].append(element.text)
+        # The tree-based rules tested these elements' truth value, which for
+        # an Element means "has children", so the same is recorded here.
+        elif tag in (API_TAG + "library-status", API_TAG + "oa-policy-exception"):
+            entry.setdefault(tag[len(API_TAG) :], len(element) > 0)
+        elif tag == API_TAG + "record":
+            if (source := element.get("source-name")) in ("manual", "dspace"):
+                entry.setdefault(f"record:{source}", len(element) > 0)
+
+
+def find_next_page_url(page: str | bytes) -> str | None:
+    """Returns the href of the link to the next page of a paged feed, or None
+    if this is the last page. Elements puts its pagination links ahead of the
+    entries, so the scan usually stops after the first few elements rather than
+    parsing the whole page."""
+    for _, element in _iter_parse_events(page, events=("start",)):
+        if element.get("position") == "next":
+            return element.get("href")
+    return None
+
+
+def _iter_parse_events(
+    page: str | bytes, events: tuple = ("start", "end")
+) -> Generator[tuple, None, None]:
+    parser = ET.XMLPullParser(events=events)
+    for i in range(0, len(page), PARSE_CHUNK_SIZE):
+        parser.feed(page[i : i + PARSE_CHUNK_SIZE])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def _should_request(entry: dict, author_data: dict) -> bool:
+    """Applies local rules for which publications should be requested to an
+    entry from iter_feed_entries."""
+    # Filter for papers to be requested based on various criteria
+    pub_date = make_pub_date(
+        entry.get("pub-year", ""), entry.get("pub-month", ""), entry.get("pub-day", "")
+    )
+    if not pub_date:
+        pass
+    # Paper was published after OA policy enacted
+    elif pub_date <= dt.date(2009, 3, 18):
+        return False
+    # Paper was published while author was MIT faculty
+    elif pub_date < dt.date.fromisoformat(
+        author_data["Start Date"]
+    ) or pub_date > dt.date.fromisoformat(author_data["End Date"]):
+        return False
+    # Paper does not have a library status
+    if entry.get("library-status"):
+        return False
+    # Publication type is either a journal article, book chapter, or
+    # conference proceeding
+    if entry.get("type-id", "") not in ("3", "4", "5"):
+        return False
+    # Paper does not have any OA policy exceptions, except for "Waiver"
+    # which we do request
+    if entry.get("oa-policy-exception"):
+        if "Waiver" not in entry["oa-policy-exception-types"]:
+            return False
+    # If paper has a manual entry record in Elements, none of the
+    # following fields are true
+    if entry.get("record:manual"):
+        if any(
+            entry.get(f"boolean:{field}") == "true"
+            for field in ("c-do-not-request", "c-optout", "c-received", "c-requested")
+        ):
+            return False
+    # If paper has a dspace record in Elements, status is not 'Public'
+    # or 'Private' (in either case it has been deposited and should not
+    # be requested)
+    if entry.get("record:dspace"):
+        status = entry.get("field:repository-status", "")
+        if status == "Public" or status == "Private":
+            return False
+    return True
+
+
+def _feed_entry_paper_data(entry: dict) -> dict:
+    """Builds, from an entry from iter_feed_entries, the same dict that
+    extract_paper_data builds from the entry's element tree."""
+    return {
+        "Doi": entry.get("field:doi", ""),
+        "Citation": entry.get("field:c-citation", ""),
+        "Publisher-name": entry.get("field:publisher", ""),
+        "C-Method-Of-Acquisition": "",
+        # Without the embedded publication object, the entry still names the
+        # publication it relates to, so it can be fetched on its own.
+        "PaperID": entry.get("id") or entry.get("related-id", ""),
+        "C-Publisher-Related-Email-Message": "",
+        "Year Published": entry.get("year-published", ""),
+        "Title1": entry.get("field:title", ""),
+        "Journal-name": entry.get("field:journal", ""),
+        "Journal-elements-url": entry.get("journal-href", ""),
+        "Volume": entry.get("field:volume", ""),
+        "Issue": entry.get("field:issue", ""),
+    }
 
 
 def parse_author_xml(author_xml: str) -> dict:
@@ -200,17 +314,28 @@ def parse_journal_policies(journal_policies_xml: str) -> dict:
 
 def parse_paper_xml(paper_xml: str) -> dict:
     root = ET.fromstring(paper_xml)
+    PAPER_DATA = extract_paper_data(root)
+    PAPER_DATA["Title1"] = extract_field(root, "atom:title")
+    return PAPER_DATA
+
+
+def extract_paper_data(root: ET.Element) -> dict:
+    """Extracts the paper metadata Solenoid needs from an element containing
+    a publication api:object, either a single-publication feed or an entry in
+    an author-publications feed requested with detail=full."""
     PAPER_DATA = {
         "Doi": extract_field(root, ".//api:field[@name='doi']/api:text"),
         "Citation": extract_field(root, ".//api:field[@name='c-citation']/api:text"),
         "Publisher-name": extract_field(root, ".//api:field[@name='publisher']/api:text"),
         "C-Method-Of-Acquisition": "",
-        "PaperID": root.find(".//api:object", NS).get("id"),
+        "PaperID": extract_attribute(
+            root, ".//api:object[@category='publication']", "id"
+        ),
         "C-Publisher-Related-Email-Message": "",
         "Year Published": extract_field(
             root, ".//api:field[@name='publication-date']/api:date/api:year"
         ),
-        "Title1": extract_field(root, "atom:title"),
+        "Title1": extract_field(root, ".//api:field[@name='title']/api:text"),
         "Journal-name": extract_field(root, ".//api:field[@name='journal']/api:text"),
         "Journal-elements-url": extract_attribute(root, ".//api:journal", "href"),
         "Volume": extract_field(root, ".//api:field[@name='volume']/api:text"),
@@ -0,0 +1,103 @@
+import logging
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from solenoid.records.models import Record
+
+from .models import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+
+def build_emails(record_pks, progress=None):
+    """Finds or creates the unsent email for each author of the given records
+    and attaches the records to it, as EmailMessage.get_or_create_for_records
+    does one author at a time, but with a fixed number of queries however
+    many authors and records there are.
+
+    Records already in a sent email are skipped. An author's existing unsent
+    email has its citations rebuilt if their unsent records have changed
+    (see EmailMessage.rebuild_citations). If given, progress is called as
+    progress(done, total) after each author's email is prepared.
+
+    Returns the pks of the emails, in author order. Raises ValidationError,
+    before writing anything, if an author has more than one unsent email or
+    if all of an author's selected records are already in other emails.
+    """
+    records = list(
+        Record.objects.filter(pk__in=record_pks)
+        .exclude(email__date_sent__isnull=False)
+        .select_related("author", "author__dlc", "author__dlc__liaison")
+        .order_by("author__last_name", "author__first_name", "author", "pk")
+    )
+    if not records:
+        logger.info("No records - not creating emails")
+        return []
+
+    records_by_author: defaultdict = defaultdict(list)
+    for record in records:
+        records_by_author[record.author].append(record)
+    authors = list(records_by_author)
+
+    existing: dict = {}
+    for email in EmailMessage.objects.filter(
+        author__in=authors, date_sent__isnull=True
+    ).select_related("author"):
+        if email.author in existing:
+            logger.warning("Multiple unsent emails found for %s" % email.author)
+            raise ValidationError("Multiple unsent emails found.")
+        existing[email.author] = email
+
+    # What rebuild_citations needs to know about the authors who already have
+    # an email: all of their unsent records, and which of those are attached
+    # to the email so far.
+    unsent_by_author: defaultdict = defaultdict(list)
+    if existing:
+        for record in (
+            Record.objects.filter(author__in=list(existing))
+            .exclude(email__date_sent__isnull=False)
+            .order_by("pk")
+        ):
+            unsent_by_author[record.author_id].append(record)
+
+    to_create = []
+    to_rebuild = []
+    total = len(authors)
+    for i, author in enumerate(authors, start=1):
+        if (email := existing.get(author)) is not None:
+            unsent = unsent_by_author[author.pk]
+            attached = [record for record in unsent if record.email_id == email.pk]
+            if len(unsent) != len(attached):
+                email._replace_citations(unsent)
+                to_rebuild.append(email)
+        else:
+            available = [
+                record for record in records_by_author[author] if record.email_id is None
+            ]
+            if available:
+                text = EmailMessage._render_original_text(author, available)
+                email = EmailMessage(author=author, original_text=text, latest_text=text)
+                existing[author] = email
+                to_create.append(email)
+            else:
+                # As in create_original_text, there is nothing to write about.
+                logger.warning(f"All records for {author} already have emails")
+                raise ValidationError("All records already have emails.")
+        if progress:
+            progress(i, total)
+
+    with transaction.atomic():
+        EmailMessage.objects.bulk_create(to_create)
+        EmailMessage.objects.bulk_update(to_rebuild, ["latest_text", "new_citations"])
+        for record in records:
+            if (email := existing.get(record.author)) is not None:
+                record.email = email
+        Record.objects.bulk_update(records, ["email"])
+
+    logger.info(
+        f"Created {len(to_create)} and rebuilt {len(to_rebuild)} emails for "
+        f"{len(records)} records"
+    )
+    return [existing[author].pk for author in authors if author in existing]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("emails", "0010_emailmessage_new_citations"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="emailmessage",
+            index=models.Index(
+                condition=models.Q(date_sent__isnull=True),
+                fields=["author"],
+                name="emails_unsent_author_idx",
+            ),
+        ),
+    ]
@@ -3,11 +3,11 @@ from ckeditor.fields import RichTextField
 from datetime import date
 import logging
 import re
-from smtplib import SMTPException
+from smtplib import SMTPException, SMTPServerDisconnected
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mail
 from django.db import models
 from django.template.loader import render_to_string
 
@@ -18,11 +18,31 @@ from .signals import email_sent
 logger = logging.getLogger(__name__)
 
 
+def _is_connection_error(e):
+    """Whether sending failed because the SMTP connection was lost, rather
+    than because of the message (SMTPException is itself an OSError)."""
+    return isinstance(e, SMTPServerDisconnected) or (
+        isinstance(e, OSError) and not isinstance(e, SMTPException)
+    )
+
+
 class EmailMessage(models.Model):
 
     class Meta:
         verbose_name = "Email"
         verbose_name_plural = "Emails"
+        indexes = [
+            # Lookups of unsent emails: by author (_get_email_for_author,
+            # building emails, updating them for a DLC's new liaison), and of
+            # all of them for the unsent records (Record.get_unsent). Sent
+            # emails are left out, so the index stays as small as the backlog
+            # of unsent ones.
+            models.Index(
+                fields=["author"],
+                condition=models.Q(date_sent__isnull=True),
+                name="emails_unsent_author_idx",
+            ),
+        ]
 
     def __str__(self):
         if self.date_sent:
@@ -113,15 +133,20 @@ class EmailMessage(models.Model):
             raise ValidationError("All records must have the same author.")
 
         author = record_list.first().author
-        citations = cls._create_citations(available_records)
 
         logger.info("Returning original text of email")
+        return cls._render_original_text(author, available_records)
+
+    @classmethod
+    def _render_original_text(cls, author, records):
+        """Renders the default email text about these records by this author.
+        Does no checking; see create_original_text."""
         return render_to_string(
             "emails/author_email_template.html",
             context={
                 "author": author,
                 "liaison": author.dlc.liaison,
-                "citations": citations,
+                "citations": cls._create_citations(records),
             },
         )
 
@@ -226,38 +251,42 @@ class EmailMessage(models.Model):
         self._liaison = self.liaison
         self.save()
 
-    def _inner_send(self):
-        """Actually perform the sending of an EmailMessage. Return True on
-        success, False otherwise."""
-
-        logger.info("Sending email {pk}".format(pk=self.pk))
-
+    def _inner_send(self, connection=None):
+        """Actually perform the sending of an EmailMessage, over the given mail
+        connection if any. Return True on success, False otherwise."""
         try:
-            if settings.EMAIL_TESTING_MODE:
-                recipients = [admin[1] for admin in settings.ADMINS]
-            else:
-                recipients = [self.liaison.email_address]
-                if settings.SCHOLCOMM_MOIRA_LIST:
-                    recipients.append(settings.SCHOLCOMM_MOIRA_LIST)
-
-            send_mail(
-                self.subject,
-                self.plaintext,
-                settings.DEFAULT_FROM_EMAIL,
-                recipients,
-                html_message=self.latest_text,
-                fail_silently=False,
-            )
-
+            self._deliver(connection)
         except SMTPException:
             logger.exception("Could not send email; SMTP exception")
             return False
         except Exception:
             logger.exception("Could not send email; unanticipated exception")
             return False
+        return True
+
+    def _deliver(self, connection=None):
+        """Send the message over the given mail connection, if any, raising
+        whatever sending raises."""
+        logger.info("Sending email {pk}".format(pk=self.pk))
+
+        if settings.EMAIL_TESTING_MODE:
+            recipients = [admin[1] for admin in settings.ADMINS]
+        else:
+            recipients = [self.liaison.email_address]
+            if settings.SCHOLCOMM_MOIRA_LIST:
+                recipients.append(settings.SCHOLCOMM_MOIRA_LIST)
+
+        send_mail(
+            self.subject,
+            self.plaintext,
+            settings.DEFAULT_FROM_EMAIL,
+            recipients,
+            html_message=self.latest_text,
+            fail_silently=False,
+            connection=connection,
+        )
 
         logger.info("Done sending email")
-        return True
 
     def send(self, username):
         """
@@ -275,13 +304,88 @@ class EmailMessage(models.Model):
         if not self._inner_send():
             return False
 
+        self._finish_sending(username)
+        return True
+
+    def _finish_sending(self, username):
         self._update_after_sending()
         logger.info("Sending email_sent signal")
 
         email_sent.send(sender=self.__class__, instance=self, username=username)
 
         logger.info("Email {pk} sent".format(pk=self.pk))
-        return True
+
+    @classmethod
+    def send_many(cls, emails, username, progress=None):
+        """Validates and sends each of the given EmailMessages, as send() does,
+        but over a single SMTP connection rather than one per message. If the
+        connection is lost while sending a message (e.g. the server drops it
+        after too many messages or too long idle), it is reopened and the
+        message sent again, once. If given, progress is called as
+        progress(email, problem) after each message, where problem is None if
+        the message was sent and otherwise says why not. Returns a dict of
+        email pk to True if sent, False otherwise.
+        """
+        results = {}
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception:
+            # Each send will try (and fail) to connect again, and log why.
+            logger.exception("Could not open mail connection")
+
+        try:
+            for email in emails:
+                logger.info("Entering send_many() for {pk}".format(pk=email.pk))
+                if not email._is_valid_for_sending():
+                    problem = email._invalid_for_sending_reason()
+                else:
+                    error = email._try_deliver(connection)
+                    if error is not None and _is_connection_error(error):
+                        logger.warning(
+                            f"Mail connection lost sending email {email.pk}: "
+                            f"{error!r}; reconnecting"
+                        )
+                        connection = cls._reconnect(connection)
+                        error = email._try_deliver(connection)
+                    if error is None:
+                        email._finish_sending(username)
+                        problem = None
+                    else:
+                        logger.error("Could not send email", exc_info=error)
+                        problem = f"Sending failed: {str(error) or repr(error)}."
+                results[email.pk] = problem is None
+                if progress:
+                    progress(email, problem)
+        finally:
+            connection.close()
+
+        return results
+
+    def _try_deliver(self, connection=None):
+        """As _deliver, but return the exception raised, if any, rather than
+        raising it."""
+        try:
+            self._deliver(connection)
+        except Exception as e:
+            return e
+        return None
+
+    def _invalid_for_sending_reason(self):
+        """Why _is_valid_for_sending is False, to show the user."""
+        if self.date_sent:
+            return f"It was already sent on {self.date_sent}."
+        return f"Check that a liaison has been assigned for {self.dlc} and try again."
+
+    @staticmethod
+    def _reconnect(connection):
+        logger.info("Reopening mail connection")
+        connection.close()
+        try:
+            connection.open()
+        except Exception:
+            logger.exception("Could not reopen mail connection")
+        return connection
 
     def rebuild_citations(self):
         """Find all unsent citations by this email's author. If it's the same
@@ -298,6 +402,14 @@ class EmailMessage(models.Model):
             # Nothing to change here.
             return False
 
+        self._replace_citations(records)
+        self.save()
+
+        return True
+
+    def _replace_citations(self, records):
+        """Swap the citation block of latest_text for citations of these
+        records and flag the email as having new citations. Does not save."""
         soup = BeautifulSoup(self.latest_text, "html.parser")
 
         citations = EmailMessage._create_citations(records)
@@ -308,9 +420,6 @@ class EmailMessage(models.Model):
         cite_block.insert(1, new_soup)
         self.latest_text = soup.prettify()
         self.new_citations = True
-        self.save()
-
-        return True
 
     def revert(self):
         """Ensure that the display text of the email is the original text.
@@ -0,0 +1,65 @@
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from celery_progress.backend import ProgressRecorder
+
+from .builder import build_emails
+from .models import EmailMessage
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(bind=True)
+def task_build_emails(self, record_pks):
+    """Build the emails for the given records (see build_emails) and return
+    their pks."""
+    logger.info(f"Building emails for {len(record_pks)} records")
+    progress_recorder = None
+    if not self.request.called_directly:
+        progress_recorder = ProgressRecorder(self)
+        progress_recorder.set_progress(0, 0)
+
+    def progress(done, total):
+        if progress_recorder:
+            progress_recorder.set_progress(
+                done, total, description=f"Built email {done} of {total}"
+            )
+
+    return build_emails(record_pks, progress=progress)
+
+
+@shared_task(bind=True)
+def task_send_emails(self, email_pks, username):
+    """Send the given emails over one SMTP connection (see
+    EmailMessage.send_many), reporting progress, and return a message about
+    each one keyed by email pk."""
+    logger.info(f"Sending {len(email_pks)} emails")
+    if not self.request.called_directly:
+        progress_recorder = ProgressRecorder(self)
+        progress_recorder.set_progress(0, len(email_pks))
+
+    messages = {}
+    failed = []
+    emails = EmailMessage.objects.filter(pk__in=email_pks).select_related(
+        "author", "author__dlc", "author__dlc__liaison"
+    )
+    total = len(emails)
+
+    def progress(email, problem):
+        if problem is None:
+            messages[email.pk] = f"Sent to {email.liaison}"
+        else:
+            failed.append(email.pk)
+            messages[email.pk] = f"Not sent. {problem}"
+        if not self.request.called_directly:
+            done = len(messages)
+            progress_recorder.set_progress(
+                done, total, description=f"Sent email {done} of {total} ({email.author})"
+            )
+
+    EmailMessage.send_many(emails, username, progress=progress)
+
+    if failed:
+        logger.warning(f"Could not send {len(failed)} of {total} emails: {failed}")
+    else:
+        logger.info("All emails successfully sent")
+    return messages
@@ -1,16 +1,26 @@
 from datetime import date
+from smtplib import SMTPRecipientsRefused, SMTPServerDisconnected
 from unittest.mock import patch, call
 
+from celery.result import AsyncResult
+
 from django.contrib.auth.models import User
 from django.core import mail
+from django.core.mail import get_connection
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase, Client, override_settings, RequestFactory
+from django.test.utils import CaptureQueriesContext
 
-from solenoid.people.models import Author, Liaison
+from solenoid.people.models import DLC, Author, Liaison
 from solenoid.records.models import Record
+from solenoid.testing import query_plan
 
+from .builder import build_emails
 from .models import EmailMessage
+from .signals import email_sent
+from .tasks import task_build_emails, task_send_emails
 from .views import _get_or_create_emails, EmailSend
 
 
@@ -42,6 +52,17 @@ class EmailCreatorTestCase(TestCase):
         response = c.post(reverse("emails:create"), {"records": ["1"]})
         self.assertRedirects(response, reverse("emails:evaluate", args=(1,)))
 
+    @patch("solenoid.emails.views._get_or_create_emails")
+    def test_posting_select_all_uses_filter(self, mock_create):
+        mock_create.return_value = [1]
+        c = Client()
+        c.post(
+            reverse("emails:create"),
+            {"select_all": "1", "dlc": ["3"], "records": ["2"]},
+        )
+        pk_list = mock_create.call_args[0][0]
+        assert sorted(pk_list) == [3, 4, 5, 6]
+
     def test_email_recipient(self):
         """The email created by _get_or_create_emails must be to: the relevant
         liaison."""
@@ -596,6 +617,19 @@ class EmailMessageModelTestCase(TestCase):
         email = EmailMessage._get_email_for_author(author)
         assert email is None
 
+    def test_get_email_for_author_uses_index(self):
+        author = Author.objects.get(pk=2)
+        plan = query_plan(
+            EmailMessage.objects.filter(author=author, date_sent__isnull=True)
+        )
+        assert "emails_unsent_author_idx" in plan
+
+    def test_unsent_emails_by_author_use_partial_index(self):
+        plan = query_plan(
+            EmailMessage.objects.filter(author__in=[1, 2], date_sent__isnull=True)
+        )
+        assert "emails_unsent_author_idx" in plan
+
     def test_finalize_email_1(self):
         """Creates new email when none exists."""
         author = Author.objects.get(pk=3)
@@ -808,14 +842,9 @@ class EmailSendTestCase(TestCase):
         email.send("username")
         self.assertEqual(len(mail.outbox), 1)
 
-    # autospec=True ensures that 'self' is passed into the mock, allowing us to
-    # examine the call args as desired:
-    # https://docs.python.org/3.3/library/unittest.mock-examples.html#mocking-unbound-methods
-    @patch("solenoid.emails.models.EmailMessage.send", autospec=True)
-    # Middleware isn't available for RequestFactory, so we need to mock out the
-    # messages call so it doesn't trigger an error.
-    @patch("solenoid.emails.views.messages")
-    def test_email_send_view_calls_function(self, mock_messages, mock_send):
+    @patch("solenoid.emails.views.task_send_emails.delay")
+    def test_email_send_view_queues_task(self, mock_delay):
+        mock_delay.return_value = AsyncResult("555-444-333")
         # We need to use the RequestFactory and not Client because request.user
         # needs to exist, so that the username is available for calling
         # EmailMessage.send().
@@ -824,12 +853,115 @@ class EmailSendTestCase(TestCase):
         request.user = User.objects.create_user(
             username="wbrogers", email="wbrogers@mit.edu", password="top_secret"
         )
-        EmailSend.as_view()(request)
+        response = EmailSend.as_view()(request)
 
-        email1 = EmailMessage.objects.get(pk=1)
-        email2 = EmailMessage.objects.get(pk=2)
-        expected = [call(email1, "wbrogers"), call(email2, "wbrogers")]
-        mock_send.assert_has_calls(expected, any_order=True)
+        mock_delay.assert_called_once_with([1, 2], "wbrogers")
+        assert response.url == reverse("emails:send_status", args=("555-444-333",))
+
+    # autospec=True ensures that 'self' is passed into the mock, allowing us to
+    # examine the call args as desired:
+    # https://docs.python.org/3.3/library/unittest.mock-examples.html#mocking-unbound-methods
+    @patch("solenoid.emails.models.EmailMessage._deliver", autospec=True)
+    def test_email_send_task_sends_each_email(self, mock_send):
+        task_send_emails([1, 2], "wbrogers")
+
+        sent = [c.args[0] for c in mock_send.call_args_list]
+        assert sorted(email.pk for email in sent) == [1, 2]
+
+    def test_email_send_task_reports_each_email(self):
+        results = task_send_emails([1, 5], "username")
+        assert results[1].startswith("Sent")
+        # Email 5 has no liaison.
+        assert results[5].startswith("Not sent")
+        assert "liaison" in results[5]
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_email_send_task_reports_send_errors(self):
+        with patch(
+            "solenoid.emails.models.EmailMessage._deliver",
+            side_effect=SMTPRecipientsRefused({"liaison@example.com": (550, b"No")}),
+        ):
+            results = task_send_emails([1], "username")
+        assert results[1].startswith("Not sent. Sending failed")
+        assert "liaison@example.com" in results[1]
+        assert "liaison has been assigned" not in results[1]
+
+    def test_email_send_task_reports_already_sent(self):
+        email = EmailMessage.objects.get(pk=1)
+        email.date_sent = date(2020, 1, 2)
+        email.save()
+        results = task_send_emails([1], "username")
+        assert results[1] == "Not sent. It was already sent on 2020-01-02."
+
+    def test_send_many_uses_one_connection(self):
+        with patch(
+            "solenoid.emails.models.get_connection", wraps=get_connection
+        ) as mock_get_connection:
+            results = EmailMessage.send_many(
+                EmailMessage.objects.filter(pk__in=[1, 3]), "username"
+            )
+        mock_get_connection.assert_called_once()
+        assert results == {1: True, 3: True}
+        self.assertEqual(len(mail.outbox), 2)
+        for pk in [1, 3]:
+            assert EmailMessage.objects.get(pk=pk).date_sent == date.today()
+
+    def test_send_many_fires_email_sent_per_email(self):
+        received = []
+
+        def receiver(sender, instance, username, **kwargs):
+            received.append((instance.pk, username))
+
+        email_sent.connect(receiver)
+        try:
+            EmailMessage.send_many(EmailMessage.objects.filter(pk__in=[1, 3]), "username")
+        finally:
+            email_sent.disconnect(receiver)
+        assert sorted(received) == [(1, "username"), (3, "username")]
+
+    def test_send_many_skips_invalid_emails(self):
+        # Email 5 has no liaison.
+        results = EmailMessage.send_many(
+            EmailMessage.objects.filter(pk__in=[1, 5]), "username"
+        )
+        assert results == {1: True, 5: False}
+        self.assertEqual(len(mail.outbox), 1)
+
+    def _send_many_with(self, side_effect):
+        connection = get_connection()
+        with (
+            patch("solenoid.emails.models.get_connection", return_value=connection),
+            patch.object(connection, "send_messages", side_effect=side_effect),
+            patch.object(connection, "open") as mock_open,
+        ):
+            results = EmailMessage.send_many(
+                EmailMessage.objects.filter(pk__in=[1, 3]).order_by("pk"),
+                "username",
+            )
+        return results, mock_open.call_count
+
+    def test_send_many_resends_after_disconnect(self):
+        results, opens = self._send_many_with(
+            [SMTPServerDisconnected("Connection unexpectedly closed"), 1, 1]
+        )
+        assert results == {1: True, 3: True}
+        assert opens == 2
+        assert EmailMessage.objects.get(pk=1).date_sent
+
+    def test_send_many_resends_only_once(self):
+        results, opens = self._send_many_with(
+            [ConnectionResetError(), ConnectionResetError(), 1]
+        )
+        assert results == {1: False, 3: True}
+        assert not EmailMessage.objects.get(pk=1).date_sent
+
+    def test_send_many_keeps_connection_after_message_failure(self):
+        results, opens = self._send_many_with(
+            [SMTPRecipientsRefused({"liaison@example.com": (550, b"No")}), 1]
+        )
+        assert results == {1: False, 3: True}
+        assert opens == 1
+        assert not EmailMessage.objects.get(pk=1).date_sent
 
     def test_subject_is_something_logical(self):
         email = EmailMessage.objects.get(pk=1)
@@ -846,3 +978,119 @@ class EmailSendTestCase(TestCase):
         assert not email.date_sent  # check assumption: unsent
         self.assertFalse(email.send("username"))
         self.assertEqual(len(mail.outbox), 0)
+
+
+@override_settings(LOGIN_REQUIRED=False, USE_ELEMENTS=False)
+class EmailBuilderTestCase(TestCase):
+    fixtures = ["testdata.yaml"]
+
+    def setUp(self):
+        # Leave each author with at most one unsent email.
+        EmailMessage.objects.get(pk=2).delete()
+        EmailMessage.objects.get(pk=4).delete()
+
+    def _make_records(self, count):
+        dlc = DLC.objects.get(pk=1)
+        records = []
+        for i in range(count):
+            author = Author.objects.create(
+                dlc=dlc,
+                email=f"author{i}@example.com",
+                first_name="Author",
+                last_name=f"Number {i}",
+                mit_id=f"{i}",
+            )
+            records.append(
+                Record.objects.create(
+                    author=author,
+                    publisher_name="Wiley",
+                    acq_method="RECRUIT_FROM_AUTHOR_MANUSCRIPT",
+                    citation=f"Number {i}, Author. A paper. (2020)",
+                    paper_id=f"{1000 + i}",
+                )
+            )
+        return [record.pk for record in records]
+
+    def test_new_email_matches_get_or_create_for_records(self):
+        expected = EmailMessage.create_original_text(Record.objects.filter(pk=2))
+        email_pk = build_emails([2])[0]
+        email = EmailMessage.objects.get(pk=email_pk)
+        assert email.original_text == expected
+        assert email.latest_text == expected
+        assert Record.objects.get(pk=2).email == email
+
+    def test_existing_email_reused_and_rebuilt(self):
+        # Author 3's unsent email 3 only has record 6; records 3-5 are new.
+        email_pks = build_emails([3, 4])
+        assert email_pks == [3]
+        email = EmailMessage.objects.get(pk=3)
+        assert email.new_citations
+        for pk in [3, 4]:
+            assert Record.objects.get(pk=pk).email == email
+        assert "Venus Operating System" in email.latest_text
+
+    def test_sent_records_skipped(self):
+        # Record 1 is already in a sent email.
+        Record.objects.filter(pk=1).update(email=6)
+        assert build_emails([1]) == []
+
+    def test_records_already_in_other_emails_raise(self):
+        # Record 2's author has no unsent email, but the record is attached
+        # to author 3's.
+        Record.objects.filter(pk=2).update(email=3)
+        with self.assertRaisesMessage(
+            ValidationError, "All records already have emails."
+        ):
+            build_emails([2, 3])
+        assert not EmailMessage.objects.get(pk=3).new_citations
+
+    def test_create_view_shows_build_errors(self):
+        Record.objects.filter(pk=2).update(email=3)
+        response = Client().post(
+            reverse("emails:create"), {"records": ["2"]}, follow=True
+        )
+        self.assertRedirects(response, reverse("home"))
+        self.assertContains(response, "All records already have emails.")
+
+    def test_multiple_unsent_emails_raises(self):
+        EmailMessage.objects.create(author_id=3, original_text="more")
+        with self.assertRaises(ValidationError):
+            build_emails([3])
+
+    def test_query_count_does_not_grow_with_authors(self):
+        pks = self._make_records(22)
+        with CaptureQueriesContext(connection) as few:
+            build_emails(pks[:2])
+        with CaptureQueriesContext(connection) as many:
+            email_pks = build_emails(pks[2:])
+        assert len(email_pks) == 20
+        assert len(many) == len(few)
+
+    def test_progress_reported_per_author(self):
+        progress = []
+        build_emails([2, 3, 7], progress=lambda done, total: progress.append(done))
+        assert progress == [1, 2, 3]
+
+    def test_task_returns_email_pks(self):
+        assert task_build_emails([2]) == build_emails([2])
+
+    @override_settings(EMAIL_BUILD_ASYNC_THRESHOLD=1)
+    @patch("solenoid.emails.views.task_build_emails.delay")
+    def test_large_selection_builds_in_task(self, mock_delay):
+        mock_delay.return_value = AsyncResult("555-444-333")
+        response = Client().post(reverse("emails:create"), {"records": ["2", "3"]})
+        mock_delay.assert_called_once_with([2, 3])
+        self.assertRedirects(
+            response,
+            reverse("emails:build_status", args=("555-444-333",)),
+            fetch_redirect_response=False,
+        )
+
+    @patch("solenoid.emails.views.AsyncResult")
+    def test_build_result_starts_evaluating(self, mock_result):
+        mock_result.return_value.successful.return_value = True
+        mock_result.return_value.result = [3, 5]
+        c = Client()
+        response = c.get(reverse("emails:build_result", args=("555-444-333",)))
+        self.assertRedirects(response, reverse("emails:evaluate", args=(3,)))
+        assert c.session["email_pks"] == [5]
@@ -6,8 +6,19 @@ app_name = "emails"
 
 urlpatterns = [
     re_path(r"^create/$", views.EmailCreate.as_view(), name="create"),
+    re_path(
+        r"^create/status/(?P<task_id>[^/]+)/$",
+        views.build_status,
+        name="build_status",
+    ),
+    re_path(
+        r"^create/result/(?P<task_id>[^/]+)/$",
+        views.EmailBuildResult.as_view(),
+        name="build_result",
+    ),
     re_path(r"^(?P<pk>\d+)/$", views.EmailEvaluate.as_view(), name="evaluate"),
     re_path(r"^send/$", views.EmailSend.as_view(), name="send"),
+    re_path(r"^send/status/(?P<task_id>[^/]+)/$", views.send_status, name="send_status"),
     re_path(r"^$", views.EmailListPending.as_view(), name="list_pending"),
     re_path(r"^liaison/(?P<pk>\d+)/$", views.EmailLiaison.as_view(), name="get_liaison"),
     re_path(r"^rebuild/(?P<pk>\d+)/$", views.EmailRebuild.as_view(), name="rebuild"),
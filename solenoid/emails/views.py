@@ -1,20 +1,26 @@
 import logging
 
+from celery.result import AsyncResult
+
+from django.conf import settings
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.db import close_old_connections, connection
 from django.http import HttpResponseRedirect, HttpResponse, HttpResponseForbidden
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, redirect, render
 from django.views.generic import View, DetailView
 from django.views.generic.edit import UpdateView
 from django.views.generic.list import ListView
 
-from solenoid.people.models import Author
+from solenoid.records.forms import UnsentFilterForm
 from solenoid.records.models import Record
 from solenoid.mixins import ConditionalLoginRequiredMixin
 
+from .builder import build_emails
 from .forms import EmailMessageForm
 from .models import EmailMessage
+from .tasks import task_build_emails, task_send_emails
 
 
 logger = logging.getLogger(__name__)
@@ -24,38 +30,87 @@ def _get_or_create_emails(pk_list):
     """Takes a list of pks of Records and gets or creates associated
     EmailMessages."""
     close_old_connections()
-    email_pks = []
-
-    for author in Author.objects.filter(record__pk__in=pk_list).distinct():
-        records = Record.objects.filter(pk__in=pk_list, author=author)
-        email_pks.append(EmailMessage.get_or_create_for_records(records).pk)
-
-    # Because this is outside the request/response cycle, the connections
-    # opened here don't close at the end of the function. They may be cleaned
-    # when the cycle finishes, but by that time we may have exceeded the number
-    # of open connections we're allowed to have on a hobby tier database,
-    # resulting in user-visible application failures....so let's close them!
-    connection.close()
-    return list(set(email_pks))  # remove duplicates, if any
+    try:
+        return build_emails(pk_list)
+    finally:
+        # Because this is outside the request/response cycle, the connections
+        # opened here don't close at the end of the function. They may be
+        # cleaned when the cycle finishes, but by that time we may have
+        # exceeded the number of open connections we're allowed to have on a
+        # hobby tier database, resulting in user-visible application
+        # failures....so let's close them!
+        connection.close()
+
+
+def _start_evaluating(request, email_pks):
+    """Queue up the given emails in the session and send the user to evaluate
+    the first one."""
+    try:
+        logger.info("Creating emails for {pks}.".format(pks=email_pks))
+        first_pk = email_pks.pop(0)
+        request.session["email_pks"] = email_pks
+        request.session["total_email"] = len(email_pks) + 1
+        request.session["current_email"] = 1
+        return HttpResponseRedirect(reverse("emails:evaluate", args=(first_pk,)))
+    except IndexError:
+        logger.exception("No email pks found; email cannot be created.")
+        messages.warning(request, "No email messages found.")
+        return HttpResponseRedirect(reverse("home"))
 
 
 class EmailCreate(ConditionalLoginRequiredMixin, View):
+    """Builds emails for the selected records. Small selections are built
+    during the request; larger ones (over EMAIL_BUILD_ASYNC_THRESHOLD records)
+    go to a Celery task, and the user watches its progress until
+    EmailBuildResult picks up the emails it built."""
+
     http_method_names = ["post"]
 
     def post(self, request, *args, **kwargs):
-        pk_list = request.POST.getlist("records")
-        email_pks = _get_or_create_emails(pk_list)
+        if request.POST.get("select_all"):
+            # "Select all matching" on the unsent list posts its author/DLC
+            # filter rather than every matching pk.
+            form = UnsentFilterForm(request.POST)
+            if form.is_valid():
+                pk_list = form.get_records().values_list("pk", flat=True)
+            else:
+                pk_list = []
+        else:
+            pk_list = request.POST.getlist("records")
+
+        if len(pk_list) > settings.EMAIL_BUILD_ASYNC_THRESHOLD:
+            result = task_build_emails.delay([int(pk) for pk in pk_list])
+            return redirect("emails:build_status", task_id=result.task_id)
+
         try:
-            logger.info("Creating emails for {pks}.".format(pks=email_pks))
-            first_pk = email_pks.pop(0)
-            request.session["email_pks"] = email_pks
-            request.session["total_email"] = len(email_pks) + 1
-            request.session["current_email"] = 1
-            return HttpResponseRedirect(reverse("emails:evaluate", args=(first_pk,)))
-        except IndexError:
-            logger.exception("No email pks found; email cannot be created.")
-            messages.warning(request, "No email messages found.")
+            email_pks = _get_or_create_emails(pk_list)
+        except ValidationError as e:
+            logger.warning(f"Could not build emails: {e}")
+            messages.warning(request, " ".join(e.messages))
+            return HttpResponseRedirect(reverse("home"))
+        return _start_evaluating(request, email_pks)
+
+
+def build_status(request, task_id):
+    return render(request, "emails/build_status.html", context={"task_id": task_id})
+
+
+class EmailBuildResult(ConditionalLoginRequiredMixin, View):
+    """Where the build status page sends the user once task_build_emails has
+    finished."""
+
+    http_method_names = ["get"]
+
+    def get(self, request, *args, **kwargs):
+        result = AsyncResult(kwargs["task_id"])
+        if not result.successful():
+            logger.warning(f"Email build task {result.task_id} did not succeed")
+            if isinstance(result.result, ValidationError):
+                messages.warning(request, " ".join(result.result.messages))
+            else:
+                messages.warning(request, "Emails could not be built.")
             return HttpResponseRedirect(reverse("home"))
+        return _start_evaluating(request, list(result.result))
 
 
 class EmailEvaluate(ConditionalLoginRequiredMixin, UpdateView):
@@ -238,32 +293,20 @@ class EmailEvaluate(ConditionalLoginRequiredMixin, UpdateView):
 
 
 class EmailSend(ConditionalLoginRequiredMixin, View):
+    """Hands the selected emails to task_send_emails, so that a batch of SMTP
+    round trips doesn't hold up the request, and shows the task's progress."""
+
     http_method_names = ["post"]
 
     def post(self, request, *args, **kwargs):
-        pk_list = request.POST.getlist("emails")
-        statuses = []
-        for pk in pk_list:
-            logger.info("Sending email {pk}".format(pk=pk))
-            sent = EmailMessage.objects.get(pk=pk).send(self.request.user.username)
-            statuses.append(sent)
-
-        if False in statuses:
-            logger.warning(
-                "Could not send all emails. {bad} of {all} were "
-                "not sent.".format(bad=statuses.count(False), all=len(pk_list))
-            )
-            messages.warning(
-                request,
-                "Some emails were not successfully sent."
-                " Check to be sure that a liaison has been "
-                "assigned for each DLC and try again.",
-            )
-        else:
-            logger.info("All emails successfully sent")
-            messages.success(request, "All emails sent. Hooray!")
+        pk_list = [int(pk) for pk in request.POST.getlist("emails")]
+        logger.info("Queueing emails {pks} for sending".format(pks=pk_list))
+        result = task_send_emails.delay(pk_list, self.request.user.username)
+        return redirect("emails:send_status", task_id=result.task_id)
 
-        return HttpResponseRedirect(reverse("home"))
+
+def send_status(request, task_id):
+    return render(request, "emails/send_status.html", context={"task_id": task_id})
 
 
 class EmailListPending(ConditionalLoginRequiredMixin, ListView):
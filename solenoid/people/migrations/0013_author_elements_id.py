@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("people", "0012_author__dspace_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="elements_id",
+            field=models.CharField(
+                blank=True,
+                help_text="ID of the author's user record in Symplectic Elements",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -118,6 +118,13 @@ class Author(models.Model):
         "our goals.",
     )
     _dspace_id = models.CharField(max_length=32)
+    # Filled in when the author is imported, so that they can be imported
+    # again (e.g. with the rest of their DLC) without looking the ID up.
+    elements_id = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="ID of the author's user record in Symplectic Elements",
+    )
 
     @classmethod
     def is_author_creatable(self, paper_data):
@@ -140,6 +147,40 @@ class Author(models.Model):
         # handle it in the same way that you would handle get().
         return Author.objects.get(_mit_id_hash=Author.get_hash(mit_id))
 
+    @classmethod
+    def get_or_create_from_data(cls, author_data):
+        """Expects metadata for a single author from Elements (see
+        parse_author_xml, plus their "ELEMENTS ID") and returns the matching
+        author, creating them if the data allows. Raises Author.DoesNotExist
+        if there is no such author and one can't be created."""
+        try:
+            author = Author.get_by_mit_id(author_data[Fields.MIT_ID])
+        except Author.DoesNotExist:
+            if not Author.is_author_creatable(author_data):
+                raise
+            dlc, _ = DLC.objects.get_or_create(name=author_data[Fields.DLC])
+            return Author.objects.create(
+                first_name=author_data[Fields.FIRST_NAME],
+                last_name=author_data[Fields.LAST_NAME],
+                dlc=dlc,
+                email=author_data[Fields.EMAIL],
+                mit_id=author_data[Fields.MIT_ID],
+                dspace_id=author_data[Fields.MIT_ID],
+                elements_id=author_data.get("ELEMENTS ID", ""),
+            )
+
+        update_fields = []
+        if not author.dspace_id:
+            author.dspace_id = author_data[Fields.MIT_ID]
+            update_fields.append("_dspace_id")
+        if elements_id := author_data.get("ELEMENTS ID"):
+            if author.elements_id != elements_id:
+                author.elements_id = elements_id
+                update_fields.append("elements_id")
+        if update_fields:
+            author.save(update_fields=update_fields)
+        return author
+
     # These properties allow us to get and set the mit ID using the normal
     # API; in particular, we can directly set the ID from the MTI ID value in
     # the paper metadata. However, under the hood, we're throwing out the
@@ -211,6 +211,58 @@ class AuthorTests(TestCase):
             author.dspace_id, hashlib.md5(("salty" + mit_id).encode("utf-8")).hexdigest()
         )
 
+    def test_get_or_create_from_data_creates_author(self):
+        author_data = {
+            "Email": "persona@org.edu",
+            "First Name": "Person",
+            "Last Name": "Author",
+            "MIT ID": "000000000",
+            "DLC": "Test DLC",
+            "ELEMENTS ID": "98765",
+        }
+        author = Author.get_or_create_from_data(author_data)
+
+        self.assertEqual(author.dlc.name, "Test DLC")
+        self.assertEqual(author.elements_id, "98765")
+        self.assertEqual(author.mit_id, Author.get_hash("000000000"))
+        self.assertEqual(author, Author.get_or_create_from_data(author_data))
+        self.assertEqual(Author.objects.count(), 1)
+
+    def test_get_or_create_from_data_fills_in_elements_id(self):
+        dlc = DLC.objects.create(name="Test DLC")
+        author = Author.objects.create(
+            dlc=dlc,
+            email="foo@example.com",
+            first_name="Test",
+            last_name="Author",
+            mit_id="000000000",
+        )
+        author_data = {
+            "Email": "",
+            "First Name": "Test",
+            "Last Name": "Author",
+            "MIT ID": "000000000",
+            "DLC": "",
+            "ELEMENTS ID": "98765",
+        }
+
+        self.assertEqual(author, Author.get_or_create_from_data(author_data))
+        author.refresh_from_db()
+        self.assertEqual(author.elements_id, "98765")
+        self.assertTrue(author.dspace_id)
+
+    def test_get_or_create_from_data_needs_complete_data(self):
+        author_data = {
+            "Email": "",
+            "First Name": "Person",
+            "Last Name": "Author",
+            "MIT ID": "000000000",
+            "DLC": "Test DLC",
+            "ELEMENTS ID": "98765",
+        }
+        with self.assertRaises(Author.DoesNotExist):
+            Author.get_or_create_from_data(author_data)
+
 
 class LiaisonModelTests(TestCase):
     fixtures = ["testdata.yaml"]
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 from django.contrib import admin
+from django.db.models import Count, F
 
-from .models import Record
+from .models import ImportItem, ImportRun, Record
 
 
 class RecordAdmin(admin.ModelAdmin):
@@ -10,3 +11,82 @@ class RecordAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Record, RecordAdmin)
+
+
+class ImportItemInline(admin.TabularInline):
+    model = ImportItem
+    fields = ("paper_id", "outcome")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+
+class ImportRunAdmin(admin.ModelAdmin):
+    """Import history, for seeing where import time goes (sort by duration,
+    requests or bytes fetched) and spotting regressions. Runs are written
+    by the import tasks only."""
+
+    list_filter = ("succeeded", "full", "started", "author__dlc")
+    list_display = (
+        "author",
+        "started",
+        "duration",
+        "full",
+        "succeeded",
+        "papers",
+        "pages",
+        "requests",
+        "bytes_fetched",
+        "cache_hits",
+    )
+    search_fields = ("author__last_name", "author__first_name", "author__elements_id")
+    date_hierarchy = "started"
+    readonly_fields = (
+        "author",
+        "started",
+        "finished",
+        "duration",
+        "full",
+        "modified_since",
+        "succeeded",
+        "pages",
+        "requests",
+        "bytes_fetched",
+        "cache_hits",
+    )
+    inlines = (ImportItemInline,)
+
+    def get_queryset(self, request):
+        return (
+            super(ImportRunAdmin, self)
+            .get_queryset(request)
+            .select_related("author", "author__dlc")
+            .annotate(papers=Count("items"), run_time=F("finished") - F("started"))
+        )
+
+    @admin.display(ordering="run_time")
+    def duration(self, run):
+        return run.duration
+
+    @admin.display(ordering="papers")
+    def papers(self, run):
+        return run.papers
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(ImportRun, ImportRunAdmin)
+
+
+class ImportItemAdmin(admin.ModelAdmin):
+    list_filter = ("outcome",)
+    list_display = ("paper_id", "outcome", "run")
+    search_fields = ("paper_id",)
+    list_select_related = ("run", "run__author", "run__author__dlc")
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(ImportItem, ImportItemAdmin)
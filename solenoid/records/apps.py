@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class RecordsConfig(AppConfig):
+    name = "solenoid.records"
+
+    def ready(self):
+        # Importing facets registers its signal handlers.
+        from . import facets  # noqa: F401
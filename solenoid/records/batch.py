@@ -0,0 +1,109 @@
+import logging
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .facets import invalidate_unsent_facets
+from .helpers import Fields, hash_citation
+from .models import Record
+
+logger = logging.getLogger(__name__)
+
+
+class ImportBatch(object):
+    """Holds everything the import needs to know about one author's existing
+    records for a batch of papers, looked up with a few set-based queries up
+    front, and collects the records to create or update so they can be
+    written together by save().
+
+    Checks made while adding papers see the records added earlier in the
+    batch, just as they would if each paper had been saved as it was
+    imported.
+    """
+
+    UPDATE_FIELDS = [
+        "author",
+        "publisher_name",
+        "acq_method",
+        "doi",
+        "citation",
+        "citation_hash",
+    ]
+
+    def __init__(self, author, papers):
+        self.author = author
+        paper_ids = [paper_data[Fields.PAPER_ID] for paper_data in papers]
+        citation_hashes = [
+            hash_citation(paper_data[Fields.CITATION])
+            for paper_data in papers
+            if paper_data[Fields.CITATION]
+        ]
+
+        self.requested_ids = Record.paper_requested_many(paper_ids)
+        self.records = {
+            record.paper_id: record
+            for record in Record.objects.filter(author=author, paper_id__in=paper_ids)
+        }
+        # Paper IDs of this author's records, keyed by citation hash.
+        self.citations: defaultdict = defaultdict(list)
+        for paper_id, citation_hash in Record.objects.filter(
+            author=author, citation_hash__in=citation_hashes
+        ).values_list("paper_id", "citation_hash"):
+            self.citations[citation_hash].append(paper_id)
+
+        self.to_create: dict = {}
+        self.to_update: dict = {}
+
+    def is_requested(self, paper_data):
+        """Batch equivalent of Record.paper_requested."""
+        return paper_data[Fields.PAPER_ID] in self.requested_ids
+
+    def get_duplicates(self, paper_data):
+        """Batch equivalent of Record.get_duplicates; returns a list of the
+        duplicates' paper IDs."""
+        if not paper_data[Fields.CITATION]:
+            return []
+        return [
+            paper_id
+            for paper_id in self.citations.get(
+                hash_citation(paper_data[Fields.CITATION]), []
+            )
+            if paper_id != paper_data[Fields.PAPER_ID]
+        ]
+
+    def get_or_create(self, paper_data):
+        """Batch equivalent of Record.get_or_create_from_data followed, for
+        existing records, by update_if_needed. Returns (record, created,
+        updated); nothing is written until save()."""
+        paper_id = paper_data[Fields.PAPER_ID]
+        if (record := self.records.get(paper_id)) is None:
+            record = Record.from_data(self.author, paper_data)
+            if not record.citation:
+                raise ValidationError("Citation cannot be blank")
+            self.records[paper_id] = record
+            self.to_create[paper_id] = record
+            self.citations[record.citation_hash].append(paper_id)
+            return record, True, False
+
+        old_hash = record.citation_hash
+        if not record.apply_paper_data(self.author, paper_data):
+            return record, False, False
+        if record.citation_hash != old_hash:
+            if paper_id in self.citations[old_hash]:
+                self.citations[old_hash].remove(paper_id)
+            self.citations[record.citation_hash].append(paper_id)
+        if paper_id not in self.to_create:
+            self.to_update[paper_id] = record
+        return record, False, True
+
+    def save(self):
+        with transaction.atomic():
+            Record.objects.bulk_create(self.to_create.values())
+            Record.objects.bulk_update(self.to_update.values(), self.UPDATE_FIELDS)
+        # Bulk writes don't send the signals that normally do this.
+        invalidate_unsent_facets()
+        logger.info(
+            f"Created {len(self.to_create)} and updated {len(self.to_update)} "
+            f"records for {self.author}"
+        )
@@ -0,0 +1,92 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from solenoid.elements.elements import get_paged
+from solenoid.elements.xml_handlers import parse_author_pubs_xml
+
+from .helpers import Fields
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PREFIX = "records:import-checkpoint"
+
+
+class ImportCheckpoint(object):
+    """Keeps track, in the shared cache (Redis on Heroku), of how far an
+    import of one author's publications feed has got: the feed pages read so
+    far, with the publications found on each, and the data fetched for each
+    paper. If the import is interrupted (a worker restarts, or the task is
+    retried after an Elements error), the next import of the same feed picks
+    up where it stopped, and nothing already fetched is fetched again.
+
+    A checkpoint only applies to the feed URL it was made for, so it is not
+    used if the author has since been imported successfully (which changes
+    the modified-since filter) or if a full resync is asked for instead. It
+    expires after IMPORT_CHECKPOINT_TTL seconds without progress.
+    """
+
+    def __init__(self, author, feed_url):
+        self.prefix = f"{CHECKPOINT_PREFIX}:{author}"
+        self.feed_url = feed_url
+        self.pages: list = []
+        self.state = {"feed_url": feed_url, "pages": 0, "next_page": feed_url}
+
+        state = cache.get(self.prefix)
+        if state is None or state["feed_url"] != feed_url:
+            return
+        page_keys = [self._page_key(i) for i in range(state["pages"])]
+        pages = cache.get_many(page_keys)
+        if len(pages) != len(page_keys):
+            logger.info(f"Checkpoint {self.prefix} is incomplete; starting over")
+            return
+        self.state = state
+        self.pages = [pages[key] for key in page_keys]
+        logger.info(
+            f"Resuming import from checkpoint {self.prefix} after "
+            f"{state['pages']} pages"
+        )
+
+    def _page_key(self, number):
+        return f"{self.prefix}:page:{number}"
+
+    def _paper_key(self, paper_id):
+        return f"{self.prefix}:paper:{paper_id}"
+
+    def _set(self, key, value):
+        cache.set(key, value, timeout=settings.IMPORT_CHECKPOINT_TTL)
+
+    def iter_pages(self, author_data):
+        """Yield, for each page of the feed, the publications on it that
+        should be imported (see parse_author_pubs_xml). Pages read before the
+        import was interrupted come from the checkpoint; the rest are fetched
+        from Elements and checkpointed as they are read."""
+        yield from self.pages
+        if self.state["next_page"] is None:
+            return
+        for page, next_url in get_paged(self.state["next_page"]):
+            pubs = parse_author_pubs_xml([page], author_data)
+            self._set(self._page_key(self.state["pages"]), pubs)
+            self.pages.append(pubs)
+            self.state["pages"] += 1
+            self.state["next_page"] = next_url
+            self._set(self.prefix, self.state)
+            yield pubs
+
+    def get_papers(self, paper_ids):
+        """Paper data already fetched for the given paper IDs, keyed by ID."""
+        keys = {self._paper_key(paper_id): paper_id for paper_id in paper_ids}
+        return {keys[key]: paper_data for key, paper_data in cache.get_many(keys).items()}
+
+    def save_paper(self, paper_id, paper_data):
+        self._set(self._paper_key(paper_id), paper_data)
+
+    def clear(self):
+        """Forget the checkpoint, once the import it tracks is complete."""
+        keys = [self.prefix]
+        keys += [self._page_key(i) for i in range(self.state["pages"])]
+        keys += [
+            self._paper_key(pub[Fields.PAPER_ID]) for pubs in self.pages for pub in pubs
+        ]
+        cache.delete_many(keys)
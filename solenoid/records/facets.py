@@ -0,0 +1,82 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save
+
+from solenoid.emails.models import EmailMessage
+from solenoid.people.models import DLC, Author
+
+from .models import Record
+
+logger = logging.getLogger(__name__)
+
+UNSENT_FACETS_KEY = "records:unsent-facets"
+
+
+def compute_unsent_facets():
+    """Authors and DLCs that have unsent records, each with its count of
+    unsent records, from a single aggregate query."""
+    rows = (
+        Record.get_unsent()
+        .values(
+            "author",
+            "author__first_name",
+            "author__last_name",
+            "author__dlc",
+            "author__dlc__name",
+        )
+        .annotate(count=Count("pk"))
+        .order_by("author__last_name", "author__first_name", "author")
+    )
+
+    authors = []
+    dlcs: dict = {}
+    for row in rows:
+        authors.append(
+            {
+                "pk": row["author"],
+                "first_name": row["author__first_name"],
+                "last_name": row["author__last_name"],
+                "count": row["count"],
+            }
+        )
+        dlc = dlcs.setdefault(
+            row["author__dlc"],
+            {"pk": row["author__dlc"], "name": row["author__dlc__name"], "count": 0},
+        )
+        dlc["count"] += row["count"]
+
+    return {
+        "authors": authors,
+        "dlcs": sorted(dlcs.values(), key=lambda dlc: dlc["name"]),
+    }
+
+
+def get_unsent_facets():
+    """Cached compute_unsent_facets. The cache is dropped whenever a record,
+    email, author or DLC changes (see invalidate_unsent_facets), and expires
+    after UNSENT_FACETS_TTL seconds in case a change slips past that."""
+    facets = cache.get(UNSENT_FACETS_KEY)
+    if facets is None:
+        facets = compute_unsent_facets()
+        cache.set(UNSENT_FACETS_KEY, facets, timeout=settings.UNSENT_FACETS_TTL)
+    return facets
+
+
+def invalidate_unsent_facets(**kwargs):
+    """Drop the cached facets. Connected to the save and delete signals of
+    every model the facets depend on; code that writes those models without
+    sending signals (bulk_create, bulk_update, QuerySet.update) must call it
+    itself."""
+    cache.delete(UNSENT_FACETS_KEY)
+
+
+for model in [Record, EmailMessage, Author, DLC]:
+    for signal in [post_save, post_delete]:
+        signal.connect(
+            invalidate_unsent_facets,
+            sender=model,
+            dispatch_uid=f"invalidate_unsent_facets_{model.__name__}",
+        )
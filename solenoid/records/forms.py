@@ -1,9 +1,119 @@
 import logging
+import re
 
 from django import forms
+from django.db.models import Q
+
+from solenoid.people.models import DLC, Author
+
+from .facets import get_unsent_facets
+from .models import Record
 
 logger = logging.getLogger(__name__)
 
 
 class ImportForm(forms.Form):
     author_id = forms.CharField(label="Author ID", max_length=20)
+    full = forms.BooleanField(
+        label="Full resync",
+        required=False,
+        help_text="Import all of the author's publications, not only those "
+        "modified in Elements since their last import.",
+    )
+
+
+class BulkImportForm(forms.Form):
+    """Chooses the authors for a bulk import: those with the given Elements
+    IDs, plus every author in the given DLC whose Elements ID is known (i.e.
+    who has been imported before). The combined list of IDs is in
+    cleaned_data["elements_ids"]."""
+
+    author_ids = forms.CharField(
+        label="Author IDs",
+        required=False,
+        widget=forms.Textarea(attrs={"rows": 4}),
+        help_text="Elements user IDs, separated by spaces, commas or new lines.",
+    )
+    dlc = forms.ModelChoiceField(
+        DLC.objects.all(),
+        label="DLC",
+        required=False,
+        help_text="Import every author in this DLC who has been imported before.",
+    )
+    full = forms.BooleanField(
+        label="Full resync",
+        required=False,
+        help_text="Import all of the authors' publications, not only those "
+        "modified in Elements since their last import.",
+    )
+
+    def clean_author_ids(self):
+        author_ids = re.split(r"[\s,]+", self.cleaned_data["author_ids"].strip())
+        author_ids = [author_id for author_id in author_ids if author_id]
+        invalid = [
+            author_id
+            for author_id in author_ids
+            if len(author_id) > 20 or not re.fullmatch(r"[\w-]+", author_id)
+        ]
+        if invalid:
+            raise forms.ValidationError(f"Invalid author IDs: {', '.join(invalid)}")
+        return author_ids
+
+    def clean(self):
+        cleaned_data = super(BulkImportForm, self).clean()
+        elements_ids = list(cleaned_data.get("author_ids") or [])
+        if dlc := cleaned_data.get("dlc"):
+            elements_ids += list(
+                Author.objects.filter(dlc=dlc)
+                .exclude(elements_id="")
+                .values_list("elements_id", flat=True)
+            )
+        if not elements_ids and not self.errors:
+            raise forms.ValidationError(
+                "Enter some author IDs, or choose a DLC with authors who have "
+                "been imported before."
+            )
+        cleaned_data["elements_ids"] = list(dict.fromkeys(elements_ids))
+        return cleaned_data
+
+
+class KnownChoicesField(forms.TypedMultipleChoiceField):
+    """A multiple choice field that drops values which aren't among its
+    choices, instead of failing validation."""
+
+    def clean(self, value):
+        value = [v for v in value or [] if self.valid_value(v)]
+        return super(KnownChoicesField, self).clean(value)
+
+
+class UnsentFilterForm(forms.Form):
+    """Narrows the unsent citations to those by any of the selected authors or
+    in any of the selected DLCs. With nothing selected, every unsent citation
+    matches. Choices come from the cached unsent facets; authors and DLCs that
+    no longer have unsent citations (as in an old link) are left out of the
+    selection."""
+
+    author = KnownChoicesField(coerce=int, required=False)
+    dlc = KnownChoicesField(coerce=int, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super(UnsentFilterForm, self).__init__(*args, **kwargs)
+        self.facets = get_unsent_facets()
+        self.fields["author"].choices = [
+            (author["pk"], f"{author['last_name']}, {author['first_name']}")
+            for author in self.facets["authors"]
+        ]
+        self.fields["dlc"].choices = [
+            (dlc["pk"], dlc["name"]) for dlc in self.facets["dlcs"]
+        ]
+
+    def get_records(self):
+        """Unsent records matching the selected authors and DLCs. Call only
+        once the form is valid."""
+        records = Record.get_unsent()
+        query = Q()
+        if authors := self.cleaned_data.get("author"):
+            query |= Q(author__in=authors)
+        if dlcs := self.cleaned_data.get("dlc"):
+            query |= Q(author__dlc__in=dlcs)
+        return records.filter(query)
@@ -1,3 +1,11 @@
+import hashlib
+import html
+import re
+
+TAG_RE = re.compile(r"<[^>]*>")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
 class Fields(object):
     EMAIL = "Email"
     DOI = "Doi"
@@ -13,6 +21,7 @@ class Fields(object):
     PUBDATE = "Year Published"
     TITLE = "Title1"
     JOURNAL = "Journal-name"
+    JOURNAL_URL = "Journal-elements-url"
     VOLUME = "Volume"
     ISSUE = "Issue"
 
@@ -44,6 +53,12 @@ class Fields(object):
     # field is blank.
     CITATION_DATA = [FIRST_NAME, LAST_NAME, TITLE, JOURNAL]
 
+    # If an entry in the author-publications feed has all of this, it holds
+    # the full publication object and we don't fetch the paper separately.
+    # These are ID fields, not metadata: the publication endpoint returns the
+    # same object, so a blank publisher or journal name would still be blank.
+    FEED_DATA = [PAPER_ID, JOURNAL_URL]
+
     # And this is the information from EXPECTED_HEADERS that we can't find if
     # it isn't in the data.
     # Some information is optional because...
@@ -72,3 +87,17 @@ class Fields(object):
         # is interpolated into the email text).
         {PUBLISHER_NAME}
     )
+
+
+def normalize_citation(citation):
+    """Reduce a citation to its visible text: drop HTML tags, unescape
+    entities and collapse runs of whitespace. Citations that differ only in
+    markup or spacing normalize to the same string."""
+    text = html.unescape(TAG_RE.sub("", citation or ""))
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def hash_citation(citation):
+    """Fingerprint of a normalized citation, used to find duplicates without
+    comparing full citation text in the database."""
+    return hashlib.md5(normalize_citation(citation).encode("utf-8")).hexdigest()
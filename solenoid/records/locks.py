@@ -0,0 +1,53 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+IMPORT_LOCK_PREFIX = "records:import-lock"
+
+
+def _key(elements_id):
+    return f"{IMPORT_LOCK_PREFIX}:{elements_id}"
+
+
+def claim_import(elements_id, task_id):
+    """Claim the import of the author with the given Elements ID for the task
+    with the given id, so that only one task imports an author at a time.
+    Claims are kept in the shared cache (Redis on Heroku), so they hold across
+    web and worker processes. A claim lapses if it isn't refreshed (see
+    refresh_import) for IMPORT_LOCK_TIMEOUT seconds, so a task killed
+    mid-import (e.g. by a dyno restart) holds up the author for no longer
+    than that.
+
+    Returns the id of the task holding the claim: task_id if the claim
+    succeeded (or task_id already held it), or else the id of the task that
+    is already importing the author.
+    """
+    key = _key(elements_id)
+    while not cache.add(key, task_id, timeout=settings.IMPORT_LOCK_TIMEOUT):
+        if (holder := cache.get(key)) is not None:
+            return holder
+        # The claim expired or was released since add(); try again.
+    return task_id
+
+
+def refresh_import(elements_id, task_id):
+    """Keep the claim on the author held by task_id from lapsing; called as
+    an import makes progress. If the claim lapsed anyway (e.g. while the task
+    waited to be retried) and no other task has taken it, it is renewed."""
+    key = _key(elements_id)
+    if cache.get(key) == task_id:
+        cache.touch(key, settings.IMPORT_LOCK_TIMEOUT)
+    else:
+        cache.add(key, task_id, timeout=settings.IMPORT_LOCK_TIMEOUT)
+
+
+def release_import(elements_id, task_id):
+    """Release a claim made by claim_import, if task_id still holds it."""
+    key = _key(elements_id)
+    if cache.get(key) == task_id:
+        cache.delete(key)
+    else:
+        logger.warning(f"Import claim on author #{elements_id} was not held by {task_id}")
@@ -0,0 +1,66 @@
+from celery.result import AsyncResult
+
+from django.core.management.base import BaseCommand, CommandError
+
+from solenoid.people.models import DLC
+from solenoid.records.forms import BulkImportForm
+from solenoid.records.tasks import start_bulk_import
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue an import of several authors from Elements: those with the "
+        "given Elements user IDs, and/or every previously imported author in "
+        "a DLC."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("author_ids", nargs="*", help="Elements user IDs")
+        parser.add_argument("--dlc", help="Name of a DLC whose authors to import.")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Import all of the authors' publications, not only those "
+            "modified since their last import.",
+        )
+        parser.add_argument(
+            "--wait",
+            action="store_true",
+            help="Wait for the import to finish and print its report.",
+        )
+
+    def handle(self, *args, **options):
+        data = {"author_ids": " ".join(options["author_ids"]), "full": options["full"]}
+        if options["dlc"]:
+            try:
+                data["dlc"] = DLC.objects.get(name=options["dlc"]).pk
+            except DLC.DoesNotExist:
+                raise CommandError(f"No DLC named {options['dlc']}")
+        form = BulkImportForm(data)
+        if not form.is_valid():
+            raise CommandError(
+                " ".join(error for errors in form.errors.values() for error in errors)
+            )
+
+        elements_ids = form.cleaned_data["elements_ids"]
+        group_id, task_id = start_bulk_import(elements_ids, full=options["full"])
+        self.stdout.write(
+            f"Queued import of {len(elements_ids)} authors (group {group_id}, "
+            f"report task {task_id})."
+        )
+        if not options["wait"]:
+            return
+
+        report = AsyncResult(task_id).get()
+        for elements_id, author_report in report["authors"].items():
+            name = author_report["author"] or "unknown author"
+            if author_report["error"]:
+                self.stdout.write(f"{elements_id} ({name}): {author_report['error']}")
+            else:
+                papers = sum(author_report["outcomes"].values())
+                self.stdout.write(f"{elements_id} ({name}): {papers} papers")
+        for outcome, count in report["outcomes"].items():
+            self.stdout.write(f"{count} papers: {outcome}")
+        self.stdout.write(
+            f"{report['imported']} authors imported, {report['failed']} failed."
+        )
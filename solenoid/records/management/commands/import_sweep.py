@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from solenoid.records.tasks import get_sweep_authors, get_sweep_report, task_import_sweep
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue an import sweep now, re-importing every author who is due for "
+        "it, or show the report of the last sweep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--report",
+            action="store_true",
+            help="Show the report of the last sweep to finish, and how many "
+            "authors are due, instead of starting a sweep.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["report"]:
+            task_import_sweep.delay()
+            self.stdout.write("Queued import sweep.")
+            return
+
+        self.stdout.write(f"Authors due for import: {len(get_sweep_authors())}")
+        if (report := get_sweep_report()) is None:
+            self.stdout.write("No import sweep has finished yet.")
+            return
+        self.stdout.write(
+            f"Last sweep finished {report['finished']}: {report['imported']} "
+            f"authors imported, {report['failed']} failed."
+        )
+        for outcome, count in report["outcomes"].items():
+            self.stdout.write(f"{count} papers: {outcome}")
+        for elements_id, author_report in report["authors"].items():
+            if author_report["error"]:
+                self.stdout.write(f"{elements_id}: {author_report['error']}")
@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+from solenoid.records.helpers import hash_citation
+
+BATCH_SIZE = 500
+
+
+def backfill_citation_hash(apps, schema_editor):
+    # Records are read and written a batch at a time, so the migration's
+    # memory use doesn't grow with the table.
+    Record = apps.get_model("records", "Record")
+    batch = []
+    for record in Record.objects.only("pk", "citation").iterator(chunk_size=BATCH_SIZE):
+        record.citation_hash = hash_citation(record.citation)
+        batch.append(record)
+        if len(batch) == BATCH_SIZE:
+            Record.objects.bulk_update(batch, ["citation_hash"])
+            batch = []
+    Record.objects.bulk_update(batch, ["citation_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0016_auto_20210716_1724"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="record",
+            name="citation_hash",
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(backfill_citation_hash, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="record",
+            index=models.Index(
+                fields=["author", "citation_hash"], name="records_rec_author__f793cd_idx"
+            ),
+        ),
+    ]
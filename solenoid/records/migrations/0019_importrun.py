@@ -0,0 +1,49 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("people", "0012_author__dspace_id"),
+        ("records", "0018_record_paper_id_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started", models.DateTimeField(default=django.utils.timezone.now)),
+                ("finished", models.DateTimeField(blank=True, null=True)),
+                ("full", models.BooleanField(default=True)),
+                ("modified_since", models.DateTimeField(blank=True, null=True)),
+                ("succeeded", models.BooleanField(default=False)),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="people.author",
+                    ),
+                ),
+            ],
+            options={
+                "get_latest_by": "started",
+                "indexes": [
+                    models.Index(
+                        fields=["author", "succeeded", "started"],
+                        name="records_importrun_last_idx",
+                    )
+                ],
+            },
+        ),
+    ]
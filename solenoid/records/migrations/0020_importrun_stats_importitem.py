@@ -0,0 +1,70 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("records", "0019_importrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importrun",
+            name="pages",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importrun",
+            name="requests",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importrun",
+            name="bytes_fetched",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importrun",
+            name="cache_hits",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="ImportItem",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("paper_id", models.CharField(max_length=255)),
+                (
+                    "outcome",
+                    models.CharField(
+                        choices=[
+                            ("imported", "Imported"),
+                            ("updated", "Updated"),
+                            ("unchanged", "Unchanged"),
+                            ("missing_data", "Missing required data"),
+                            ("requested", "Already requested"),
+                            ("duplicate", "Duplicate citation"),
+                            ("not_creatable", "Could not be created"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="items",
+                        to="records.importrun",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -2,11 +2,12 @@ import logging
 from string import Template
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from solenoid.emails.models import EmailMessage
 from solenoid.people.models import Author
 
-from .helpers import Fields
+from .helpers import Fields, hash_citation
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,12 @@ class Record(models.Model):
         # show up in data imports multiple times. However, we should only see
         # them once per author.
         unique_together = ("author", "paper_id")
+        indexes = [
+            models.Index(fields=["author", "citation_hash"]),
+            # The unique constraint above leads with author, so it doesn't help
+            # lookups on paper_id alone (e.g. paper_requested).
+            models.Index(fields=["paper_id"], name="records_paper_id_idx"),
+        ]
 
     author = models.ForeignKey(Author, on_delete=models.CASCADE)
     email = models.ForeignKey(
@@ -32,6 +39,9 @@ class Record(models.Model):
     publisher_name = models.CharField(max_length=255)
     acq_method = models.CharField(max_length=255, blank=True)
     citation = models.TextField()
+    # Fingerprint of the normalized citation (see helpers.hash_citation), kept
+    # in step with citation so duplicate checks can use an index.
+    citation_hash = models.CharField(max_length=32, blank=True, editable=False)
     doi = models.CharField(max_length=255, blank=True)
     # This is the unique ID within Elements, which is NOT the same as the
     # proprietary data source ID - those are unique IDs within Scopus, Web of
@@ -54,6 +64,9 @@ class Record(models.Model):
         # blank strings to the database, and we don't want it to.
         if not self.citation:
             raise ValidationError("Citation cannot be blank")
+        self.citation_hash = hash_citation(self.citation)
+        if "update_fields" in kwargs and kwargs["update_fields"] is not None:
+            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"citation_hash"}
         return super(Record, self).save(*args, **kwargs)
 
     # ~~~~~~~~~~~~~~~~~~~~~~~~~~~ STATIC METHODS ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -144,21 +157,29 @@ class Record(models.Model):
             logger.info("Got an existing record")
             return record, False
         except Record.DoesNotExist:
-            citation = Record._get_citation(paper_data)
-
-            record = Record.objects.create(
-                author=author,
-                publisher_name=paper_data[Fields.PUBLISHER_NAME],
-                acq_method=paper_data[Fields.ACQ_METHOD],
-                citation=citation,
-                doi=paper_data[Fields.DOI],
-                paper_id=paper_data[Fields.PAPER_ID],
-                message=paper_data[Fields.MESSAGE],
-            )
+            record = Record.from_data(author, paper_data)
+            record.save()
             logger.info("record created")
 
             return record, True
 
+    @staticmethod
+    def from_data(author, paper_data):
+        """Builds (but does not save) a record for this author from metadata
+        about a single paper. Like get_or_create_from_data, it does not
+        validate data."""
+        citation = Record._get_citation(paper_data)
+        return Record(
+            author=author,
+            publisher_name=paper_data[Fields.PUBLISHER_NAME],
+            acq_method=paper_data[Fields.ACQ_METHOD],
+            citation=citation,
+            citation_hash=hash_citation(citation),
+            doi=paper_data[Fields.DOI],
+            paper_id=paper_data[Fields.PAPER_ID],
+            message=paper_data[Fields.MESSAGE],
+        )
+
     @staticmethod
     def get_duplicates(author, paper_data):
         """See if this paper's metadata would duplicate a record already in the
@@ -166,12 +187,17 @@ class Record(models.Model):
 
         A _duplicate_ is a record with a different PaperID but the same author
         and citation. We want to reject these so they can be fixed in Elements.
+        Citations are compared by their normalized hash, so ones that differ
+        only in markup or whitespace count as the same.
 
         (Same citation doesn't suffice, as we may legitimately receive a paper
         with the same citation multiple times, once per author.)"""
 
+        if not paper_data[Fields.CITATION]:
+            return None
+
         dupes = Record.objects.filter(
-            author=author, citation=paper_data[Fields.CITATION]
+            author=author, citation_hash=hash_citation(paper_data[Fields.CITATION])
         ).exclude(paper_id=paper_data[Fields.PAPER_ID])
         if dupes:
             return dupes
@@ -208,12 +234,37 @@ class Record(models.Model):
                 False otherwise.
         """
 
-        # Find all records of the same paper, if any.
-        records = Record.objects.filter(paper_id=paper_data[Fields.PAPER_ID])
+        paper_id = paper_data[Fields.PAPER_ID]
+        return paper_id in Record.paper_requested_many([paper_id])
+
+    @staticmethod
+    def paper_requested_many(paper_ids):
+        """Checks which of the given papers we have already sent an email
+        request for, in a single query.
 
-        # Return True if we've already sent an email for any of those records;
-        # False otherwise.
-        return any([record.email.date_sent for record in records if record.email])
+        Args:
+            paper_ids (iterable of str): Elements paper IDs.
+
+        Returns:
+            set: The paper IDs that we've already requested (from any
+                author).
+        """
+        return set(
+            Record.objects.filter(
+                paper_id__in=paper_ids, email__date_sent__isnull=False
+            ).values_list("paper_id", flat=True)
+        )
+
+    @staticmethod
+    def get_unsent():
+        """Records that have not yet been requested by a sent email, in the
+        order they are listed on the unsent citations page."""
+        # Written as a subquery on unsent emails, rather than an exclude()
+        # across the join, so that it can use emails_unsent_author_idx.
+        return Record.objects.filter(
+            models.Q(email__isnull=True)
+            | models.Q(email__in=EmailMessage.objects.filter(date_sent__isnull=True))
+        ).select_related("author", "author__dlc")
 
     @staticmethod
     def get_missing_id_fields(paper_data):
@@ -245,10 +296,19 @@ class Record(models.Model):
         """Checks a paper's supplied metadata to see if there are any
         discrepancies with the existing record. If so, updates it and returns
         True. If not, returns False."""
+        if self.apply_paper_data(author, paper_data):
+            self.save()
+            return True
+        return False
+
+    def apply_paper_data(self, author, paper_data):
+        """Does the work of update_if_needed without saving, so that callers
+        can save many records at once with bulk_update. Returns True if any
+        field changed."""
         changed = False
         if not all(
             [
-                self.author == author,
+                self.author_id == author.pk,
                 self.publisher_name == paper_data[Fields.PUBLISHER_NAME],
                 self.acq_method == paper_data[Fields.ACQ_METHOD],
                 self.doi == paper_data[Fields.DOI],
@@ -275,9 +335,8 @@ class Record(models.Model):
                 changed = True
 
         if changed:
-            self.save()
-            return True
-        return False
+            self.citation_hash = hash_citation(self.citation)
+        return changed
 
     # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ PROPERTIES ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -310,3 +369,112 @@ class Record(models.Model):
     def is_valid(self):
         # If acq_method is FPV, we must have the DOI.
         return self.acq_method != "RECRUIT_FROM_AUTHOR_FPV" or bool(self.doi)
+
+
+class ImportRun(models.Model):
+    """One import of an author's publications from Elements. Imports after
+    the first only ask Elements for publications modified since the start of
+    the author's last successful run (see last_import_time), unless a full
+    resync is requested."""
+
+    class Meta:
+        get_latest_by = "started"
+        indexes = [
+            models.Index(
+                fields=["author", "succeeded", "started"],
+                name="records_importrun_last_idx",
+            ),
+        ]
+
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    started = models.DateTimeField(default=timezone.now)
+    finished = models.DateTimeField(blank=True, null=True)
+    # Whether the author's full publication history was requested, rather
+    # than only what changed since modified_since.
+    full = models.BooleanField(default=True)
+    modified_since = models.DateTimeField(blank=True, null=True)
+    succeeded = models.BooleanField(default=False)
+    # What the run cost, for spotting where import time goes: pages of the
+    # publications feed read, requests made to Elements (including retries),
+    # bytes of response body received, and Elements responses or journal
+    # policies that came from a cache instead.
+    pages = models.PositiveIntegerField(default=0)
+    requests = models.PositiveIntegerField(default=0)
+    bytes_fetched = models.PositiveBigIntegerField(default=0)
+    cache_hits = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        kind = "full" if self.full else "incremental"
+        return f"{self.author} ({kind} import, {self.started:%Y-%m-%d %H:%M})"
+
+    @classmethod
+    def last_import_time(cls, author):
+        """When the author's last successful import started, or None if they
+        have never been imported. The start time, rather than the finish time,
+        is used so that nothing modified while that import ran is missed."""
+        return (
+            cls.objects.filter(author=author, succeeded=True)
+            .order_by("-started")
+            .values_list("started", flat=True)
+            .first()
+        )
+
+    @classmethod
+    def start(cls, author, full=False):
+        """Begin a run for the author, incremental from their last successful
+        import unless full is set or there isn't one."""
+        modified_since = None if full else cls.last_import_time(author)
+        return cls.objects.create(
+            author_id=author,
+            full=modified_since is None,
+            modified_since=modified_since,
+        )
+
+    @property
+    def duration(self):
+        if self.finished:
+            return self.finished - self.started
+        return None
+
+    def finish(self, succeeded=True, stats=None, pages=0, items=()):
+        """Record the end of the run, with the Elements RequestStats and page
+        count it ran up and its ImportItems, all written together."""
+        self.finished = timezone.now()
+        self.succeeded = succeeded
+        self.pages = pages
+        if stats is not None:
+            self.requests = stats.requests
+            self.bytes_fetched = stats.bytes_fetched
+            self.cache_hits = stats.cache_hits
+        with transaction.atomic():
+            self.save(
+                update_fields=[
+                    "finished",
+                    "succeeded",
+                    "pages",
+                    "requests",
+                    "bytes_fetched",
+                    "cache_hits",
+                ]
+            )
+            ImportItem.objects.bulk_create(items)
+
+
+class ImportItem(models.Model):
+    """What happened to one paper in an ImportRun."""
+
+    class Outcome(models.TextChoices):
+        IMPORTED = "imported", "Imported"
+        UPDATED = "updated", "Updated"
+        UNCHANGED = "unchanged", "Unchanged"
+        MISSING_DATA = "missing_data", "Missing required data"
+        REQUESTED = "requested", "Already requested"
+        DUPLICATE = "duplicate", "Duplicate citation"
+        NOT_CREATABLE = "not_creatable", "Could not be created"
+
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name="items")
+    paper_id = models.CharField(max_length=255)
+    outcome = models.CharField(max_length=20, choices=Outcome.choices)
+
+    def __str__(self):
+        return f"{self.paper_id}: {self.get_outcome_display()}"
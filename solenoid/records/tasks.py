@@ -1,108 +1,384 @@
-from celery import shared_task
+import datetime
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from uuid import uuid4
+
+from celery import chord, shared_task
 from celery.utils.log import get_task_logger
 from celery_progress.backend import ProgressRecorder
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max, Q
+from django.utils import timezone
 
-from solenoid.elements.elements import get_from_elements, get_paged
-from solenoid.elements.errors import RetryError
-from solenoid.elements.xml_handlers import (
-    parse_author_pubs_xml,
-    parse_journal_policies,
-    parse_paper_xml,
+from solenoid.elements.elements import (
+    get_from_elements,
+    get_journal_policies,
+    submit_in_context,
+    track_requests,
 )
+from solenoid.elements.errors import RetryError
+from solenoid.elements.xml_handlers import parse_author_xml, parse_paper_xml
 from solenoid.people.models import Author
 
+from .batch import ImportBatch
+from .checkpoint import ImportCheckpoint
 from .helpers import Fields
-from .models import Record
-
+from .locks import claim_import, refresh_import, release_import
+from .models import ImportItem, ImportRun, Record
 
 logger = get_task_logger(__name__)
 
 
 @shared_task(bind=True, autoretry_for=(RetryError,), retry_backoff=True)
-def task_import_papers_for_author(self, author_url, author_data, author):
-    RESULTS = {}
+def task_import_papers_for_author(self, author_url, author_data, author, full=False):
+    """Import the author's publications from Elements. Unless full is set,
+    only publications modified since the author's last successful import are
+    requested (see ImportRun)."""
     logger.info("Import task started")
+    elements_id = author_data["ELEMENTS ID"]
+    task_id = self.request.id or str(uuid4())
+    if (holder := claim_import(elements_id, task_id)) != task_id:
+        logger.info(f"Author #{elements_id} is already being imported by {holder}")
+        return {}
+
+    progress = None
     if not self.request.called_directly:
         progress_recorder = ProgressRecorder(self)
         progress_recorder.set_progress(0, 0)
+        progress = progress_recorder.set_progress
+    retrying = False
+    try:
+        results, _ = import_papers_for_author(
+            author_url,
+            author_data,
+            author,
+            full=full,
+            progress=progress,
+            heartbeat=partial(refresh_import, elements_id, task_id),
+        )
+        return results
+    except RetryError:
+        # Celery retries the task under the same id, so it keeps its claim.
+        retrying = self.request.retries < self.max_retries
+        raise
+    finally:
+        if not retrying:
+            release_import(elements_id, task_id)
 
-    logger.info("Parsing author publications list")
-    pub_ids = parse_author_pubs_xml(
-        get_paged(f"{author_url}/publications?&detail=full"), author_data
-    )
+
+def import_papers_for_author(
+    author_url, author_data, author, full=False, progress=None, heartbeat=None
+):
+    """Import the publications of the author with the given pk, recording the
+    import as an ImportRun. Returns a message about each paper and the
+    paper's ImportItem outcome, each keyed by paper ID. If given, progress is called as progress(done, total,
+    description) as each paper is fetched, and heartbeat() as each feed page
+    and paper is read (e.g. to keep the task's claim on the author, see
+    locks.py)."""
+    run = ImportRun.start(author, full=full)
+    with track_requests() as stats:
+        try:
+            results, items, pages = _import_papers(
+                author_url, author_data, run, progress, heartbeat
+            )
+        except Exception:
+            run.finish(succeeded=False, stats=stats)
+            raise
+    run.finish(stats=stats, pages=pages, items=items)
+    return results, {item.paper_id: item.outcome for item in items}
+
+
+def _publications_url(author_url, run):
+    url = f"{author_url}/publications?&detail=full"
+    if run.modified_since:
+        since = run.modified_since.astimezone(datetime.timezone.utc)
+        url += f"&modified-since={since:%Y-%m-%dT%H:%M:%SZ}"
+    return url
+
+
+def _import_papers(author_url, author_data, run, progress=None, heartbeat=None):
+    RESULTS = {}
+    heartbeat = heartbeat or (lambda: None)
+    if run.full:
+        logger.info("Parsing author publications list")
+    else:
+        logger.info(f"Parsing author publications modified since {run.modified_since}")
+    checkpoint = ImportCheckpoint(run.author_id, _publications_url(author_url, run))
+    pub_ids = []
+    for pubs in checkpoint.iter_pages(author_data):
+        heartbeat()
+        pub_ids.extend(pubs)
     total = len(pub_ids)
-    logger.info(f"Finished retrieving publication IDs to import for author.")
+    logger.info(f"Finished retrieving publications to import for author.")
 
-    for i, paper in enumerate(pub_ids):
-        paper_id = paper["id"]
-        if not self.request.called_directly:
-            progress_recorder.set_progress(
+    # Papers fetched before an interrupted import of the same feed.
+    done = checkpoint.get_papers([pub[Fields.PAPER_ID] for pub in pub_ids])
+    prefetched = _prefetch_paper_data(
+        [pub for pub in pub_ids if pub[Fields.PAPER_ID] not in done],
+        author_data,
+        settings.ELEMENTS_IMPORT_CONCURRENCY,
+    )
+    author_record = Author.objects.get(pk=run.author_id)
+    items = []
+    papers = []
+    for i, pub in enumerate(pub_ids):
+        if (paper_data := done.get(pub[Fields.PAPER_ID])) is None:
+            paper_id, paper_data = next(prefetched)
+            checkpoint.save_paper(paper_id, paper_data)
+        heartbeat()
+        paper_id = pub[Fields.PAPER_ID]
+        if progress:
+            progress(
                 i,
                 total,
                 description=f"Importing paper #{paper_id} by {author_data[Fields.LAST_NAME]}, {i} of {total}",
             )
-        paper_data = _get_paper_data_from_elements(paper_id, author_data)
-        author_record = Author.objects.get(pk=author)
-        checks = _run_checks_on_paper(paper_data, author_record)
-        if checks is not None:
-            RESULTS[paper_id] = checks
-            continue
-
-        result = _create_or_update_record_from_paper_data(paper_data, author_record)
-        RESULTS[paper_id] = result
-        logger.info(f"Finished importing paper #{paper_id}")
+        papers.append((paper_id, paper_data))
+        if len(papers) == settings.IMPORT_BATCH_SIZE:
+            items.extend(_import_batch(author_record, papers, run, RESULTS))
+            papers = []
+    if papers:
+        items.extend(_import_batch(author_record, papers, run, RESULTS))
+    checkpoint.clear()
 
     logger.info(
         f"Import of all papers by author " f"{author_data['ELEMENTS ID']} completed"
     )
-    return RESULTS
+    return RESULTS, items, checkpoint.state["pages"]
+
+
+def _import_batch(author, papers, run, results):
+    """Check and write one chunk of an author's (paper_id, paper_data) pairs,
+    adding a message for each paper to results, and return their ImportItems.
+    Papers are written a chunk at a time so that a long import saves its
+    records as it goes; each chunk's checks see the records written by earlier
+    ones."""
+    batch = ImportBatch(author, [paper_data for _, paper_data in papers])
+    items = []
+    for paper_id, paper_data in papers:
+        outcome, message = _run_checks_on_paper(
+            paper_data, batch
+        ) or _create_or_update_record_from_paper_data(paper_data, batch)
+        results[paper_id] = message
+        items.append(ImportItem(run=run, paper_id=paper_id, outcome=outcome))
+        logger.info(f"Finished importing paper #{paper_id}")
+    batch.save()
+    return items
+
+
+def import_author(elements_id, full=False, heartbeat=None):
+    """Fetch the Elements user with the given ID, find or create their
+    Author, and import their publications; what the Import view and
+    task_import_papers_for_author do between them for one author. Returns the
+    author, then the messages and outcomes from import_papers_for_author."""
+    author_url = f"{settings.ELEMENTS_ENDPOINT}users/{elements_id}"
+    author_data = parse_author_xml(get_from_elements(author_url))
+    author_data["ELEMENTS ID"] = elements_id
+    author = Author.get_or_create_from_data(author_data)
+    results, outcomes = import_papers_for_author(
+        author_url, author_data, author.pk, full=full, heartbeat=heartbeat
+    )
+    return author, results, outcomes
+
+
+@shared_task(bind=True)
+def task_import_authors(self, elements_ids, full=False, sweep=False):
+    """Import the given Elements users one after another; one share of a bulk
+    import (see start_bulk_import). An author who can't be imported is
+    reported as such, and the rest are still imported. If the share is part
+    of an import sweep, the sweep's lock is refreshed as the imports make
+    progress. Returns, for each Elements ID, the author's name, any error,
+    and how many papers had each outcome."""
+    REPORT = {}
+    total = len(elements_ids)
+    if not self.request.called_directly:
+        progress_recorder = ProgressRecorder(self)
+        progress_recorder.set_progress(0, total)
+
+    task_id = self.request.id or str(uuid4())
+    for i, elements_id in enumerate(elements_ids, start=1):
+        if (holder := claim_import(elements_id, task_id)) != task_id:
+            REPORT[elements_id] = {
+                "author": None,
+                "error": f"Author is already being imported (by task {holder}).",
+                "outcomes": {},
+            }
+        else:
+            heartbeat = partial(refresh_import, elements_id, task_id)
+            if sweep:
+                heartbeat = partial(_refresh_sweep, heartbeat)
+            try:
+                REPORT[elements_id] = _report_author_import(elements_id, full, heartbeat)
+            finally:
+                release_import(elements_id, task_id)
+        if not self.request.called_directly:
+            progress_recorder.set_progress(
+                i, total, description=f"Imported author #{elements_id}, {i} of {total}"
+            )
+    return REPORT
 
 
-def _create_or_update_record_from_paper_data(paper_data, author):
+def _report_author_import(elements_id, full, heartbeat=None):
+    try:
+        author, _, outcomes = import_author(elements_id, full=full, heartbeat=heartbeat)
+    except Author.DoesNotExist:
+        logger.info(f"Author #{elements_id} was missing data from Elements")
+        return {
+            "author": None,
+            "error": "Author record in Elements is missing required information.",
+            "outcomes": {},
+        }
+    except Exception as e:
+        logger.exception(f"Import of author #{elements_id} failed")
+        return {"author": None, "error": f"Import failed: {e}", "outcomes": {}}
+    return {
+        "author": f"{author.last_name}, {author.first_name}",
+        "error": None,
+        "outcomes": dict(
+            Counter(ImportItem.Outcome(outcome).label for outcome in outcomes.values())
+        ),
+    }
+
+
+@shared_task
+def task_report_bulk_import(reports):
+    """Combine the reports of a bulk import's task_import_authors tasks, adding
+    up the papers with each outcome across all authors."""
+    authors = {}
+    outcomes: Counter = Counter()
+    for report in reports:
+        authors.update(report)
+        for author_report in report.values():
+            outcomes.update(author_report["outcomes"])
+    failed = sum(1 for author_report in authors.values() if author_report["error"])
+    return {
+        "authors": authors,
+        "outcomes": dict(outcomes),
+        "imported": len(authors) - failed,
+        "failed": failed,
+    }
+
+
+def start_bulk_import(elements_ids, full=False, report=None, sweep=False):
+    """Queue imports of the given Elements users. They are shared among at
+    most ELEMENTS_BULK_IMPORT_CONCURRENCY task_import_authors tasks, run as a
+    Celery group, so however many authors there are only that many imports
+    run at once. When they are all done, the report task (by default
+    task_report_bulk_import) is given their reports. sweep is passed on to
+    task_import_authors.
+
+    Returns the ids of the group, whose progress is that of the whole bulk
+    import, and of the report task."""
+    elements_ids = list(dict.fromkeys(elements_ids))
+    if not elements_ids:
+        raise ValueError("No authors to import")
+    shares = min(settings.ELEMENTS_BULK_IMPORT_CONCURRENCY, len(elements_ids))
+    header = [
+        task_import_authors.s(elements_ids[i::shares], full, sweep=sweep)
+        for i in range(shares)
+    ]
+    result = chord(header)(report or task_report_bulk_import.s())
+    # The group's progress is looked up by id (see celery_progress's
+    # group_status view), so it has to be stored in the result backend.
+    result.parent.save()
+    logger.info(f"Bulk import of {len(elements_ids)} authors queued in {shares} tasks")
+    return result.parent.id, result.id
+
+
+def _create_or_update_record_from_paper_data(paper_data, batch):
     paper_id = paper_data[Fields.PAPER_ID]
     author_name = paper_data[Fields.LAST_NAME]
 
     if Record.is_record_creatable(paper_data):
-        record, created = Record.get_or_create_from_data(author, paper_data)
+        record, created, updated = batch.get_or_create(paper_data)
         if created:
-            logger.info(f"Record {record} was created from paper {paper_id}")
-            return "Paper was successfully imported."
+            logger.info(f"Record {record} will be created from paper {paper_id}")
+            return ImportItem.Outcome.IMPORTED, "Paper was successfully imported."
         else:
-            updated = record.update_if_needed(author, paper_data)
             if updated:
-                return "Record updated with new data from Elements."
+                return (
+                    ImportItem.Outcome.UPDATED,
+                    "Record updated with new data from Elements.",
+                )
             else:
-                return "Paper already in database, no updates made."
+                return (
+                    ImportItem.Outcome.UNCHANGED,
+                    "Paper already in database, no updates made.",
+                )
 
     logger.warning(
         f"Cannot create record for paper {paper_id} " f"with author {author_name}"
     )
     return (
+        ImportItem.Outcome.NOT_CREATABLE,
         "Paper could not be added to the database. Please make "
-        "sure data is correct in Elements and try again."
+        "sure data is correct in Elements and try again.",
     )
 
 
-def _get_paper_data_from_elements(paper_id, author_data):
+def _get_paper_data_from_elements(feed_data, author_data):
+    """Build the paper data for one publication in the author feed. The
+    detail=full feed entry normally embeds the publication object; the
+    publication is only fetched from Elements on its own if the entry lacks it
+    (see Fields.FEED_DATA).
+    """
+    paper_id = feed_data[Fields.PAPER_ID]
     logger.info(f"Importing data for paper {paper_id}")
 
-    paper_url = f"{settings.ELEMENTS_ENDPOINT}publications/{paper_id}"
-    paper_xml = get_from_elements(paper_url)
-    paper_data = parse_paper_xml(paper_xml)
+    paper_data = dict(feed_data)
     paper_data.update(author_data)
+    if _is_missing_feed_fields(paper_data):
+        logger.info(f"Feed entry for paper {paper_id} incomplete, fetching paper")
+        paper_url = f"{settings.ELEMENTS_ENDPOINT}publications/{paper_id}"
+        paper_xml = get_from_elements(paper_url)
+        paper_data = parse_paper_xml(paper_xml)
+        paper_data.update(author_data)
 
-    journal_url = paper_data["Journal-elements-url"]
+    journal_url = paper_data[Fields.JOURNAL_URL]
     if bool(journal_url):
-        policy_xml = get_from_elements(f"{journal_url}/policies?detail=full")
-        policy_data = parse_journal_policies(policy_xml)
-        paper_data.update(policy_data)
+        paper_data.update(get_journal_policies(journal_url))
 
     return paper_data
 
 
-def _run_checks_on_paper(paper_data, author):
+def _is_missing_feed_fields(paper_data):
+    return not all(paper_data[field] for field in Fields.FEED_DATA)
+
+
+def _prefetch_paper_data(pub_ids, author_data, max_in_flight):
+    """Yield (paper_id, paper_data) for each paper in pub_ids, in order.
+
+    Any paper and journal policy XML still needed are fetched from Elements on a thread pool,
+    keeping up to max_in_flight papers ahead of the one being yielded, so that
+    HTTP round trips overlap with the checks and database writes done by the
+    caller. Only the fetching happens off the main thread; nothing here
+    touches the database.
+    """
+    papers = iter(pub_ids)
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+
+        def submit_next():
+            paper = next(papers, None)
+            if paper is not None:
+                future = submit_in_context(
+                    executor, _get_paper_data_from_elements, paper, author_data
+                )
+                pending.append((paper[Fields.PAPER_ID], future))
+
+        for _ in range(max_in_flight):
+            submit_next()
+
+        while pending:
+            paper_id, future = pending.popleft()
+            submit_next()
+            yield paper_id, future.result()
+
+
+def _run_checks_on_paper(paper_data, batch):
     paper_id = paper_data[Fields.PAPER_ID]
     author_name = paper_data[Fields.LAST_NAME]
 
@@ -116,15 +392,15 @@ def _run_checks_on_paper(paper_data, author):
     # Check that data provided from Elements is complete
     if _missing_id_fields := Record.get_missing_id_fields(paper_data):
         logger.info(f"Paper #{paper_id} missing required data, record not imported")
-        return (
+        return ImportItem.Outcome.MISSING_DATA, (
             f"Publication #{paper_id} by {author_name} is missing required ID fields. "
             f"{_missing_id_fields}"
         )
 
     # Check that paper hasn't already been requested
-    if Record.paper_requested(paper_data):
+    if batch.is_requested(paper_data):
         logger.info(f"Paper {paper_id} already requested, record not imported")
-        return (
+        return ImportItem.Outcome.REQUESTED, (
             f"Publication #{paper_id} by "
             f"{author_name} has already been requested "
             f"(possibly from another author), so this record will not "
@@ -134,13 +410,92 @@ def _run_checks_on_paper(paper_data, author):
         )
 
     # Check that paper doesn't already exist in database
-    dupes = Record.get_duplicates(author, paper_data)
-    if dupes:
-        dupe_list = [id for id in dupes.values_list("paper_id", flat=True)]
-        logger.info(f"Duplicates of paper {paper_id}: {dupes}")
-        return (
+    dupe_list = batch.get_duplicates(paper_data)
+    if dupe_list:
+        logger.info(f"Duplicates of paper {paper_id}: {dupe_list}")
+        return ImportItem.Outcome.DUPLICATE, (
             f"Publication #{paper_id} by {author_name} duplicates the "
             f"following record(s) already in the database: "
             f'{", ".join(dupe_list)}. Please merge #{paper_id} into an '
             f"existing record in Elements. It will not be imported."
         )
+
+
+SWEEP_LOCK = "records:import-sweep:lock"
+SWEEP_REPORT = "records:import-sweep:report"
+# The lock is normally released by task_report_import_sweep, or by
+# task_release_import_sweep if the report can't run. It is refreshed as the
+# sweep's imports make progress, and otherwise expires sooner than the next
+# hourly sweep, so that if a sweep dies that sweep picks up the authors it
+# didn't get to.
+SWEEP_LOCK_TIMEOUT = 60 * 30
+
+
+def get_sweep_authors():
+    """Elements IDs of the authors an import sweep should import: those with
+    a known Elements ID who haven't been imported successfully in the last
+    IMPORT_SWEEP_MAX_AGE hours, least recently imported first."""
+    cutoff = timezone.now() - datetime.timedelta(hours=settings.IMPORT_SWEEP_MAX_AGE)
+    return list(
+        Author.objects.exclude(elements_id="")
+        .annotate(
+            last_import=Max("importrun__started", filter=Q(importrun__succeeded=True))
+        )
+        .filter(Q(last_import__isnull=True) | Q(last_import__lt=cutoff))
+        .order_by(F("last_import").asc(nulls_first=True), "pk")
+        .values_list("elements_id", flat=True)
+    )
+
+
+@shared_task
+def task_import_sweep():
+    """Re-import every author due for it (see get_sweep_authors) as a bulk
+    import. Celery beat runs this every hour during IMPORT_SWEEP_HOURS, so
+    that imports happen outside working hours. Runs that find a sweep still
+    in progress do nothing; otherwise they pick up any authors that an
+    interrupted sweep didn't get to."""
+    if not cache.add(SWEEP_LOCK, True, timeout=SWEEP_LOCK_TIMEOUT):
+        logger.info("Import sweep already in progress")
+        return None
+    elements_ids = get_sweep_authors()
+    if not elements_ids:
+        logger.info("Import sweep found no authors to import")
+        cache.delete(SWEEP_LOCK)
+        return None
+    logger.info(f"Import sweep started for {len(elements_ids)} authors")
+    report = task_report_import_sweep.s().on_error(task_release_import_sweep.s())
+    return start_bulk_import(elements_ids, report=report, sweep=True)
+
+
+def _refresh_sweep(heartbeat):
+    heartbeat()
+    cache.touch(SWEEP_LOCK, SWEEP_LOCK_TIMEOUT)
+
+
+@shared_task
+def task_report_import_sweep(reports):
+    """Combine the reports of an import sweep (as task_report_bulk_import
+    does), keep the result for `python manage.py import_sweep --report`, and
+    release the sweep lock."""
+    report = task_report_bulk_import(reports)
+    report["finished"] = timezone.now().isoformat()
+    cache.set(SWEEP_REPORT, report, timeout=None)
+    cache.delete(SWEEP_LOCK)
+    logger.info(
+        f"Import sweep finished: {report['imported']} authors imported, "
+        f"{report['failed']} failed"
+    )
+    return report
+
+
+@shared_task
+def task_release_import_sweep(request, exc, traceback):
+    """Release the sweep lock when task_report_import_sweep fails, or never
+    runs because one of the sweep's import tasks failed."""
+    logger.warning(f"Import sweep did not finish: {exc!r}")
+    cache.delete(SWEEP_LOCK)
+
+
+def get_sweep_report():
+    """The report of the last import sweep to finish, or None."""
+    return cache.get(SWEEP_REPORT)
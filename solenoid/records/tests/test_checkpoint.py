@@ -0,0 +1,99 @@
+from unittest.mock import patch
+
+import pytest
+from requests.exceptions import HTTPError
+
+from solenoid.elements.xml_handlers import find_next_page_url
+from solenoid.people.models import DLC, Author
+
+from ..checkpoint import ImportCheckpoint
+from ..helpers import Fields
+from ..models import ImportRun, Record
+from ..tasks import _get_paper_data_from_elements, task_import_papers_for_author
+from .test_tasks import AUTHOR_DATA, AUTHOR_URL
+
+
+def test_checkpoint_resumes_after_last_page_read(mock_elements):
+    mock_elements.get("mock://api.com/page2", status_code=400)
+    checkpoint = ImportCheckpoint(1, "mock://api.com/page1")
+    with pytest.raises(HTTPError):
+        list(checkpoint.iter_pages(AUTHOR_DATA))
+
+    mock_elements.get("mock://api.com/page2", text="<xml page='2'></xml>")
+    checkpoint = ImportCheckpoint(1, "mock://api.com/page1")
+    assert 2 == len(list(checkpoint.iter_pages(AUTHOR_DATA)))
+    urls = [request.url for request in mock_elements.request_history]
+    assert 1 == urls.count("mock://api.com/page1")
+
+    # A checkpoint for a different feed URL (e.g. a full resync) isn't used.
+    assert [] == ImportCheckpoint(1, "mock://api.com/other").pages
+
+
+def test_checkpoint_scans_each_page_for_next_link_once(mock_elements):
+    with patch(
+        "solenoid.elements.elements.find_next_page_url",
+        wraps=find_next_page_url,
+    ) as mock_find:
+        list(ImportCheckpoint(1, "mock://api.com/page1").iter_pages(AUTHOR_DATA))
+    assert 2 == mock_find.call_count
+
+
+def test_checkpoint_clear(mock_elements):
+    feed_url = f"{AUTHOR_URL}/publications?&detail=full"
+    checkpoint = ImportCheckpoint(1, feed_url)
+    pubs = [pub for pubs in checkpoint.iter_pages(AUTHOR_DATA) for pub in pubs]
+    paper_id = pubs[0][Fields.PAPER_ID]
+    checkpoint.save_paper(paper_id, pubs[0])
+    assert {paper_id: pubs[0]} == checkpoint.get_papers([paper_id, "missing"])
+
+    checkpoint.clear()
+    checkpoint = ImportCheckpoint(1, feed_url)
+    assert 0 == checkpoint.state["pages"]
+    assert {} == checkpoint.get_papers([paper_id])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_interrupted_import_does_not_refetch(mock_elements, test_settings, settings):
+    settings.ELEMENTS_IMPORT_CONCURRENCY = 1
+    dlc, _ = DLC.objects.get_or_create(name=AUTHOR_DATA[Fields.DLC])
+    author = Author.objects.create(
+        first_name=AUTHOR_DATA[Fields.FIRST_NAME],
+        last_name=AUTHOR_DATA[Fields.LAST_NAME],
+        dlc=dlc,
+        email=AUTHOR_DATA[Fields.EMAIL],
+        mit_id=AUTHOR_DATA[Fields.MIT_ID],
+        dspace_id=AUTHOR_DATA[Fields.MIT_ID],
+    )
+    fetched = []
+
+    def fetch_then_fail(paper, author_data):
+        if fetched:
+            raise HTTPError("Worker went away")
+        fetched.append(paper[Fields.PAPER_ID])
+        return _get_paper_data_from_elements(paper, author_data)
+
+    with patch(
+        "solenoid.records.tasks._get_paper_data_from_elements",
+        side_effect=fetch_then_fail,
+    ):
+        with pytest.raises(HTTPError):
+            task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
+    assert 0 == Record.objects.count()
+    assert not ImportRun.objects.get().succeeded
+
+    with patch(
+        "solenoid.records.tasks._get_paper_data_from_elements",
+        wraps=_get_paper_data_from_elements,
+    ) as mock_fetch:
+        task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
+
+    refetched = [call.args[0][Fields.PAPER_ID] for call in mock_fetch.call_args_list]
+    assert fetched[0] not in refetched
+    feed_urls = [
+        request.url
+        for request in mock_elements.request_history
+        if "publications?" in request.url
+    ]
+    assert 1 == len(feed_urls)
+    assert Record.objects.exists()
+    assert ImportRun.objects.latest().succeeded
@@ -0,0 +1,80 @@
+from datetime import date
+
+from django.test import TestCase, override_settings
+from freezegun import freeze_time
+
+from solenoid.emails.models import EmailMessage
+from solenoid.people.models import Author
+
+from ..batch import ImportBatch
+from ..facets import compute_unsent_facets, get_unsent_facets
+from ..helpers import Fields
+from ..models import Record
+
+
+class UnsentFacetsTest(TestCase):
+    fixtures = ["testdata.yaml"]
+
+    def test_compute_unsent_facets(self):
+        with self.assertNumQueries(1):
+            facets = compute_unsent_facets()
+        assert [(a["last_name"], a["count"]) for a in facets["authors"]] == [
+            ("Fermi", 2),
+            ("Liskov", 4),
+            ("Tonegawa", 1),
+        ]
+        assert [(d["name"], d["count"]) for d in facets["dlcs"]] == [
+            ("Brain and Cognitive Sciences Department", 1),
+            ("Electrical Engineering and Computer Science Department", 4),
+            ("Physics Department", 2),
+        ]
+
+    def test_facets_are_cached(self):
+        get_unsent_facets()
+        with self.assertNumQueries(0):
+            get_unsent_facets()
+
+    @override_settings(UNSENT_FACETS_TTL=60)
+    def test_facets_expire(self):
+        with freeze_time() as frozen:
+            get_unsent_facets()
+            frozen.tick(61)
+            with self.assertNumQueries(1):
+                get_unsent_facets()
+
+    def test_sending_email_invalidates_facets(self):
+        get_unsent_facets()
+        email = EmailMessage.objects.get(pk=4)
+        email.date_sent = date.today()
+        email.save()
+        facets = get_unsent_facets()
+        assert [(a["last_name"], a["count"]) for a in facets["authors"]] == [
+            ("Fermi", 2),
+            ("Liskov", 3),
+            ("Tonegawa", 1),
+        ]
+
+    def test_deleting_record_invalidates_facets(self):
+        get_unsent_facets()
+        Record.objects.get(pk=2).delete()
+        facets = get_unsent_facets()
+        assert "Tonegawa" not in [a["last_name"] for a in facets["authors"]]
+
+    def test_import_batch_invalidates_facets(self):
+        get_unsent_facets()
+        author = Author.objects.get(last_name="Tonegawa")
+        paper_data = {
+            Fields.PUBLISHER_NAME: "Nature",
+            Fields.ACQ_METHOD: "",
+            Fields.CITATION: "Tonegawa, Susumu. Another paper. (2013)",
+            Fields.DOI: "",
+            Fields.PAPER_ID: "555",
+            Fields.MESSAGE: "",
+        }
+        batch = ImportBatch(author, [paper_data])
+        batch.get_or_create(paper_data)
+        batch.save()
+        facets = get_unsent_facets()
+        assert ("Tonegawa", 2) in [
+            (a["last_name"], a["count"]) for a in facets["authors"]
+        ]
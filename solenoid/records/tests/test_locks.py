@@ -0,0 +1,41 @@
+from freezegun import freeze_time
+
+from django.conf import settings
+
+from ..locks import claim_import, refresh_import, release_import
+
+
+def test_claim_import():
+    assert "task-1" == claim_import("98765", "task-1")
+    assert "task-1" == claim_import("98765", "task-1")
+    assert "task-1" == claim_import("98765", "task-2")
+    assert "task-2" == claim_import("54321", "task-2")
+
+
+def test_release_import_only_releases_own_claim():
+    claim_import("98765", "task-1")
+    release_import("98765", "task-2")
+    assert "task-1" == claim_import("98765", "task-2")
+
+    release_import("98765", "task-1")
+    assert "task-2" == claim_import("98765", "task-2")
+
+
+def test_claim_lapses_unless_refreshed():
+    with freeze_time("2020-01-01") as frozen:
+        claim_import("98765", "task-1")
+        frozen.tick(settings.IMPORT_LOCK_TIMEOUT - 1)
+        refresh_import("98765", "task-1")
+        frozen.tick(settings.IMPORT_LOCK_TIMEOUT - 1)
+        assert "task-1" == claim_import("98765", "task-2")
+
+        frozen.tick(settings.IMPORT_LOCK_TIMEOUT + 1)
+        assert "task-2" == claim_import("98765", "task-2")
+
+
+def test_refresh_import_renews_only_a_free_claim():
+    refresh_import("98765", "task-1")
+    assert "task-1" == claim_import("98765", "task-2")
+
+    refresh_import("98765", "task-2")
+    assert "task-1" == claim_import("98765", "task-2")
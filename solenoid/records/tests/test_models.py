@@ -3,10 +3,13 @@ from datetime import date
 from string import Template
 
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from solenoid.people.models import DLC, Author
+from solenoid.testing import query_plan, sql_query_plan
 
-from ..helpers import Fields
+from ..helpers import Fields, hash_citation
 from ..models import Record
 
 
@@ -170,6 +173,21 @@ class RecordModelTest(TestCase):
         record = Record.objects.get(pk=2)
         assert not record.is_sent
 
+    def test_paper_requested_many(self):
+        record = Record.objects.get(pk=1)
+        email = record.email
+        email.date_sent = date.today()
+        email.save()
+        unsent = Record.objects.get(pk=2)
+
+        with self.assertNumQueries(1):
+            requested = Record.paper_requested_many(
+                [record.paper_id, unsent.paper_id, "not-a-paper"]
+            )
+        assert requested == {record.paper_id}
+        assert Record.paper_requested({Fields.PAPER_ID: record.paper_id})
+        assert not Record.paper_requested({Fields.PAPER_ID: unsent.paper_id})
+
     def test_fpv_message(self):
         record = Record.objects.get(pk=1)
         record.acq_method = "not fpv"
@@ -295,6 +313,35 @@ class RecordModelTest(TestCase):
         assert dupes.count() == 1
         assert int(dupes[0].paper_id) == 123141
 
+    def test_get_duplicates_4(self):
+        """Citations that differ only in markup and whitespace are still
+        duplicates."""
+        metadata = {
+            Fields.PUBLISHER_NAME: "Nature",
+            Fields.ACQ_METHOD: "RECRUIT_FROM_AUTHOR_FPV",
+            Fields.CITATION: (
+                "Tonegawa,  Susumu. <i>Paper name</i>. Some journal or other.\n"
+                "31:4 (2012) "
+            ),
+            Fields.DOI: "10.1240.2/4914241",
+            Fields.PAPER_ID: "24618",
+            Fields.FIRST_NAME: "Susumu",
+            Fields.LAST_NAME: "Tonegawa",
+            Fields.MIT_ID: "2",
+        }
+        author = Author.objects.get(last_name="Tonegawa")
+
+        dupes = Record.get_duplicates(author, metadata)
+        assert dupes.count() == 1
+        assert int(dupes[0].paper_id) == 123141
+
+    def test_save_updates_citation_hash(self):
+        record = Record.objects.get(pk=2)
+        record.citation = "A <b>new</b> citation"
+        record.save(update_fields=["citation"])
+        record.refresh_from_db()
+        assert record.citation_hash == hash_citation("A new citation")
+
     def test_create_citation_case_1(self):
         """Minimal citation plus:
         publication date: YES
@@ -583,3 +630,17 @@ class RecordModelTest(TestCase):
         assert r1.update_if_needed(author, metadata)
         r1.refresh_from_db()
         assert r1.citation == Record.create_citation(metadata)
+
+    def test_paper_id_lookup_uses_index(self):
+        plan = query_plan(Record.objects.filter(paper_id="123141"))
+        assert "records_paper_id_idx" in plan
+
+    def test_get_unsent_uses_partial_index(self):
+        plan = query_plan(Record.get_unsent())
+        assert "emails_unsent_author_idx" in plan
+
+    def test_paper_requested_uses_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            Record.paper_requested_many(["123141"])
+        assert 1 == len(queries)
+        assert "records_paper_id_idx" in sql_query_plan(queries[0]["sql"])
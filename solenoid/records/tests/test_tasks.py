@@ -1,16 +1,38 @@
 import hashlib
-from datetime import date
+from io import StringIO
+from datetime import date, timedelta
+from unittest.mock import patch
 
 import pytest
+from freezegun import freeze_time
 
+from django.core.cache import cache
+from django.core.management import call_command
 from django.forms.models import model_to_dict
+from django.utils import timezone
 from django.urls import reverse
 
 from solenoid.emails.models import EmailMessage
 from solenoid.people.models import Author, DLC, Liaison
+from ..batch import ImportBatch
 from ..helpers import Fields
-from ..models import Record
-from ..tasks import task_import_papers_for_author
+from ..locks import claim_import
+from ..models import ImportItem, ImportRun, Record
+from ..tasks import (
+    SWEEP_LOCK,
+    SWEEP_LOCK_TIMEOUT,
+    _get_paper_data_from_elements,
+    _prefetch_paper_data,
+    get_sweep_authors,
+    get_sweep_report,
+    start_bulk_import,
+    task_import_authors,
+    task_import_papers_for_author,
+    task_import_sweep,
+    task_report_bulk_import,
+    task_release_import_sweep,
+    task_report_import_sweep,
+)
 
 IMPORT_URL = reverse("records:import")
 AUTHOR_URL = "mock://api.com/users/98765"
@@ -26,12 +48,10 @@ AUTHOR_DATA = {
 }
 
 
-@pytest.mark.django_db(transaction=True)
-def test_import_papers_for_author_success(mock_elements, test_settings):
-    assert 0 == Record.objects.all().count()
-
+@pytest.fixture()
+def author():
     dlc, _ = DLC.objects.get_or_create(name=AUTHOR_DATA[Fields.DLC])
-    author = Author.objects.create(
+    return Author.objects.create(
         first_name=AUTHOR_DATA[Fields.FIRST_NAME],
         last_name=AUTHOR_DATA[Fields.LAST_NAME],
         dlc=dlc,
@@ -40,6 +60,11 @@ def test_import_papers_for_author_success(mock_elements, test_settings):
         dspace_id=AUTHOR_DATA[Fields.MIT_ID],
     )
 
+
+@pytest.mark.django_db(transaction=True)
+def test_import_papers_for_author_success(mock_elements, test_settings, author):
+    assert 0 == Record.objects.all().count()
+
     task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
 
     record = Record.objects.latest("pk")
@@ -99,23 +124,13 @@ def test_fun_characters_handled_correctly(mock_elements, test_settings):
 
 
 @pytest.mark.django_db(transaction=True)
-def test_paper_id_respected_case_1(mock_elements, test_settings):
+def test_paper_id_respected_case_1(mock_elements, test_settings, author):
     """
     If we re-import an UNSENT record with a known ID, we should leave the
     existing record alone and not create a new one."""
     with pytest.raises(Record.DoesNotExist):
         Record.objects.get(paper_id="12345")
 
-    dlc, _ = DLC.objects.get_or_create(name=AUTHOR_DATA[Fields.DLC])
-    author = Author.objects.create(
-        first_name=AUTHOR_DATA[Fields.FIRST_NAME],
-        last_name=AUTHOR_DATA[Fields.LAST_NAME],
-        dlc=dlc,
-        email=AUTHOR_DATA[Fields.EMAIL],
-        mit_id=AUTHOR_DATA[Fields.MIT_ID],
-        dspace_id=AUTHOR_DATA[Fields.MIT_ID],
-    )
-
     task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
 
     orig_count = Record.objects.count()
@@ -131,23 +146,13 @@ def test_paper_id_respected_case_1(mock_elements, test_settings):
 
 
 @pytest.mark.django_db(transaction=True)
-def test_paper_id_respected_case_2(mock_elements, test_settings):
+def test_paper_id_respected_case_2(mock_elements, test_settings, author):
     """
     If we re-import an UNSENT record with a known ID and altered data, we
     should update the existing record and not create a new one."""
     with pytest.raises(Record.DoesNotExist):
         Record.objects.get(paper_id="12345")
 
-    dlc, _ = DLC.objects.get_or_create(name=AUTHOR_DATA[Fields.DLC])
-    author = Author.objects.create(
-        first_name=AUTHOR_DATA[Fields.FIRST_NAME],
-        last_name=AUTHOR_DATA[Fields.LAST_NAME],
-        dlc=dlc,
-        email=AUTHOR_DATA[Fields.EMAIL],
-        mit_id=AUTHOR_DATA[Fields.MIT_ID],
-        dspace_id=AUTHOR_DATA[Fields.MIT_ID],
-    )
-
     task_import_papers_for_author(
         "mock://api.com/users/98765-updated", AUTHOR_DATA, author.pk
     )
@@ -173,7 +178,7 @@ def test_paper_id_respected_case_2(mock_elements, test_settings):
 
 
 @pytest.mark.django_db(transaction=True)
-def test_paper_id_respected_case_3(mock_elements, test_settings):
+def test_paper_id_respected_case_3(mock_elements, test_settings, author):
     """
     If we re-import an already sent record with a known ID & author, we
     should raise a warning and leave the existing record alone, not create
@@ -183,16 +188,6 @@ def test_paper_id_respected_case_3(mock_elements, test_settings):
     with pytest.raises(Record.DoesNotExist):
         Record.objects.get(paper_id="12345")
 
-    dlc, _ = DLC.objects.get_or_create(name=AUTHOR_DATA[Fields.DLC])
-    author = Author.objects.create(
-        first_name=AUTHOR_DATA[Fields.FIRST_NAME],
-        last_name=AUTHOR_DATA[Fields.LAST_NAME],
-        dlc=dlc,
-        email=AUTHOR_DATA[Fields.EMAIL],
-        mit_id=AUTHOR_DATA[Fields.MIT_ID],
-        dspace_id=AUTHOR_DATA[Fields.MIT_ID],
-    )
-
     task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
 
     new_count = Record.objects.count()
@@ -224,7 +219,7 @@ def test_paper_id_respected_case_3(mock_elements, test_settings):
 
 
 @pytest.mark.django_db(transaction=True)
-def test_paper_id_respected_case_4(mock_elements, test_settings):
+def test_paper_id_respected_case_4(mock_elements, test_settings, author):
     """
     If we re-import an already sent record with a known ID and a new
     author, we should raise a warning and not create a new record."""
@@ -232,16 +227,6 @@ def test_paper_id_respected_case_4(mock_elements, test_settings):
     with pytest.raises(Record.DoesNotExist):
         Record.objects.get(paper_id="12345")
 
-    dlc, _ = DLC.objects.get_or_create(name=AUTHOR_DATA[Fields.DLC])
-    author = Author.objects.create(
-        first_name=AUTHOR_DATA[Fields.FIRST_NAME],
-        last_name=AUTHOR_DATA[Fields.LAST_NAME],
-        dlc=dlc,
-        email=AUTHOR_DATA[Fields.EMAIL],
-        mit_id=AUTHOR_DATA[Fields.MIT_ID],
-        dspace_id=AUTHOR_DATA[Fields.MIT_ID],
-    )
-
     task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
 
     new_count = Record.objects.count()
@@ -280,7 +265,7 @@ def test_paper_id_respected_case_4(mock_elements, test_settings):
     new_author = Author.objects.create(
         first_name=new_author_data[Fields.FIRST_NAME],
         last_name=new_author_data[Fields.LAST_NAME],
-        dlc=dlc,
+        dlc=author.dlc,
         email=new_author_data[Fields.EMAIL],
         mit_id=new_author_data[Fields.MIT_ID],
         dspace_id=new_author_data[Fields.MIT_ID],
@@ -294,18 +279,434 @@ def test_paper_id_respected_case_4(mock_elements, test_settings):
 
 
 @pytest.mark.django_db(transaction=True)
-def test_acq_method_set_when_present(mock_elements, test_settings):
-    dlc, _ = DLC.objects.get_or_create(name=AUTHOR_DATA[Fields.DLC])
-    author = Author.objects.create(
-        first_name=AUTHOR_DATA[Fields.FIRST_NAME],
-        last_name=AUTHOR_DATA[Fields.LAST_NAME],
-        dlc=dlc,
-        email=AUTHOR_DATA[Fields.EMAIL],
-        mit_id=AUTHOR_DATA[Fields.MIT_ID],
-        dspace_id=AUTHOR_DATA[Fields.MIT_ID],
-    )
-
+def test_acq_method_set_when_present(mock_elements, test_settings, author):
     task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
 
     record = Record.objects.latest("pk")
     assert record.acq_method == "RECRUIT_FROM_AUTHOR_FPV"
+
+
+def test_prefetch_paper_data_preserves_order(mock_elements, test_settings):
+    pub_ids = [
+        {Fields.PAPER_ID: id, Fields.JOURNAL_URL: ""}
+        for id in ["2", "diacritics", "emoji", "math", "nonroman"]
+    ]
+    papers = list(_prefetch_paper_data(pub_ids, AUTHOR_DATA, 2))
+    assert [paper_id for paper_id, _ in papers] == [
+        "2",
+        "diacritics",
+        "emoji",
+        "math",
+        "nonroman",
+    ]
+    assert papers[0][1][Fields.PUBLISHER_NAME] == "Big Publisher"
+    assert papers[0][1][Fields.LAST_NAME] == "Author"
+
+
+def test_complete_feed_data_is_not_refetched(mock_elements, test_settings):
+    feed_data = {
+        "Doi": "doi:123.45",
+        "Citation": "",
+        "Publisher-name": "Big Publisher",
+        "C-Method-Of-Acquisition": "",
+        "PaperID": "2",
+        "C-Publisher-Related-Email-Message": "",
+        "Year Published": "2017",
+        "Title1": "Publication Two",
+        "Journal-name": "A Very Important Journal",
+        "Journal-elements-url": "mock://api.com/journals/0000",
+        "Volume": "95",
+        "Issue": "",
+    }
+    paper_data = _get_paper_data_from_elements(feed_data, AUTHOR_DATA)
+
+    assert paper_data[Fields.PAPER_ID] == "2"
+    assert paper_data[Fields.ACQ_METHOD] == "RECRUIT_FROM_AUTHOR_FPV"
+    assert [r.url for r in mock_elements.request_history] == [
+        "mock://api.com/journals/0000/policies?detail=full"
+    ]
+
+
+def test_feed_data_with_blank_fields_is_not_refetched(mock_elements, test_settings):
+    feed_data = {
+        "Doi": "",
+        "Citation": "",
+        "Publisher-name": "",
+        "C-Method-Of-Acquisition": "",
+        "PaperID": "2",
+        "C-Publisher-Related-Email-Message": "",
+        "Year Published": "2013",
+        "Title1": "Publication Two",
+        "Journal-name": "",
+        "Journal-elements-url": "mock://api.com/journals/0000",
+        "Volume": "",
+        "Issue": "",
+    }
+    paper_data = _get_paper_data_from_elements(feed_data, AUTHOR_DATA)
+
+    assert paper_data[Fields.PUBLISHER_NAME] == ""
+    assert [r.url for r in mock_elements.request_history] == [
+        "mock://api.com/journals/0000/policies?detail=full"
+    ]
+
+
+def test_incomplete_feed_data_is_refetched(mock_elements, test_settings):
+    feed_data = {
+        "Doi": "",
+        "Citation": "Publication Two Citation.",
+        "Publisher-name": "",
+        "C-Method-Of-Acquisition": "",
+        "PaperID": "2",
+        "C-Publisher-Related-Email-Message": "",
+        "Year Published": "2013",
+        "Title1": "Publication Two",
+        "Journal-name": "",
+        "Journal-elements-url": "",
+        "Volume": "",
+        "Issue": "",
+    }
+    paper_data = _get_paper_data_from_elements(feed_data, AUTHOR_DATA)
+
+    assert paper_data[Fields.PUBLISHER_NAME] == "Big Publisher"
+    assert mock_elements.request_history[0].url == "mock://api.com/publications/2"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_queries_do_not_grow_with_papers(
+    mock_elements,
+    test_settings,
+    django_assert_max_num_queries,
+    author,
+):
+    # Two queries to start the ImportRun and a transaction to finish it and
+    # write its items, one author lookup, three batch lookups, and the bulk
+    # writes.
+    with django_assert_max_num_queries(14):
+        task_import_papers_for_author("mock://api.com/users/fun", AUTHOR_DATA, author.pk)
+    assert 4 == Record.objects.count()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_writes_papers_in_chunks(mock_elements, test_settings, settings, author):
+    settings.IMPORT_BATCH_SIZE = 3
+    saved = []
+
+    def save(batch):
+        Record.objects.bulk_create(batch.to_create.values())
+        saved.append(Record.objects.count())
+
+    with patch.object(ImportBatch, "save", autospec=True, side_effect=save):
+        task_import_papers_for_author("mock://api.com/users/fun", AUTHOR_DATA, author.pk)
+    assert [3, 4] == saved
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_batch_sees_earlier_papers_in_batch(test_settings, author):
+    paper_data = {
+        Fields.PAPER_ID: "1",
+        Fields.CITATION: "A citation.",
+        Fields.PUBLISHER_NAME: "Big Publisher",
+        Fields.ACQ_METHOD: "",
+        Fields.DOI: "",
+        Fields.MESSAGE: "",
+    }
+    same_citation = dict(paper_data, **{Fields.PAPER_ID: "2"})
+    batch = ImportBatch(author, [paper_data, same_citation])
+
+    assert batch.get_or_create(paper_data)[1] is True
+    assert batch.get_duplicates(same_citation) == ["1"]
+    assert 0 == Record.objects.count()
+
+    batch.save()
+    assert ["1"] == list(Record.objects.values_list("paper_id", flat=True))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_is_incremental_after_first_success(mock_elements, test_settings, author):
+    with freeze_time("2024-03-01 12:30:00"):
+        task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
+    first = ImportRun.objects.get()
+    assert first.full and first.succeeded and first.finished
+    assert "modified-since" not in mock_elements.request_history[1].url
+
+    task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
+    second = ImportRun.objects.latest()
+    assert not second.full
+    assert first.started == second.modified_since
+    feed_requests = [
+        r.url for r in mock_elements.request_history if "publications?" in r.url
+    ]
+    assert feed_requests[-1].endswith("&modified-since=2024-03-01T12:30:00Z")
+
+    task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk, full=True)
+    third = ImportRun.objects.latest()
+    assert third.full and third.modified_since is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_import_is_not_used_for_next_import(mock_elements, test_settings, author):
+    mock_elements.get(f"{AUTHOR_URL}/publications?&detail=full", status_code=400)
+
+    with pytest.raises(Exception):
+        task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
+    run = ImportRun.objects.get()
+    assert run.finished and not run.succeeded
+    assert ImportRun.last_import_time(author) is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_authors_reports_each_author(mock_elements, test_settings):
+    report = task_import_authors(["98765", "missing"])
+
+    author = Author.objects.get()
+    assert "98765" == author.elements_id
+    assert "Author, Person" == report["98765"]["author"]
+    assert report["98765"]["error"] is None
+    assert 1 == report["98765"]["outcomes"]["Imported"]
+    assert report["missing"]["author"] is None
+    assert report["missing"]["error"].startswith("Import failed")
+
+
+@patch("solenoid.records.tasks.import_author")
+def test_import_authors_counts_outcomes(mock_import, test_settings):
+    author = Author(first_name="Person", last_name="Author")
+    outcomes = {"1": "requested", "2": "requested", "3": "imported"}
+    mock_import.return_value = (author, {}, outcomes)
+
+    report = task_import_authors(["98765"])
+    assert {"Already requested": 2, "Imported": 1} == report["98765"]["outcomes"]
+
+
+def test_report_bulk_import_combines_reports():
+    imported = {
+        "author": "Author, Person",
+        "error": None,
+        "outcomes": {"Imported": 2, "Duplicate citation": 1},
+    }
+    failed = {"author": None, "error": "Import failed", "outcomes": {}}
+    report = task_report_bulk_import(
+        [
+            {"1": imported, "2": failed},
+            {"3": dict(imported, outcomes={"Duplicate citation": 1})},
+        ]
+    )
+
+    assert 2 == report["imported"]
+    assert 1 == report["failed"]
+    assert {"Imported": 2, "Duplicate citation": 2} == report["outcomes"]
+    assert ["1", "2", "3"] == sorted(report["authors"])
+
+
+@patch("solenoid.records.tasks.chord")
+def test_start_bulk_import_bounds_parallelism(mock_chord, settings):
+    settings.ELEMENTS_BULK_IMPORT_CONCURRENCY = 2
+    result = mock_chord.return_value.return_value
+    result.id = "report"
+    result.parent.id = "group"
+
+    ids = start_bulk_import(["1", "2", "3", "2", "4", "5"])
+
+    assert ("group", "report") == ids
+    header = mock_chord.call_args.args[0]
+    assert [(["1", "3", "5"], False), (["2", "4"], False)] == [
+        signature.args for signature in header
+    ]
+    assert all(signature.kwargs == {"sweep": False} for signature in header)
+    result.parent.save.assert_called_once()
+
+
+def _create_sweep_authors():
+    dlc = DLC.objects.create(name="Test DLC")
+    authors = [
+        Author.objects.create(
+            dlc=dlc,
+            email=f"author{i}@example.com",
+            first_name="Test",
+            last_name=f"Author {i}",
+            mit_id=f"00000000{i}",
+            elements_id=elements_id,
+        )
+        for i, elements_id in enumerate(["111", "222", "333", ""])
+    ]
+    now = timezone.now()
+    # 111 was imported recently, 222 long ago, and 333 never successfully.
+    ImportRun.objects.create(author=authors[0], started=now, succeeded=True)
+    ImportRun.objects.create(
+        author=authors[1], started=now - timedelta(days=2), succeeded=True
+    )
+    ImportRun.objects.create(author=authors[2], started=now, succeeded=False)
+    return authors
+
+
+@pytest.mark.django_db()
+def test_get_sweep_authors(test_settings):
+    _create_sweep_authors()
+    assert ["333", "222"] == get_sweep_authors()
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.tasks.start_bulk_import")
+def test_import_sweep_skips_while_sweep_running(mock_start, test_settings):
+    _create_sweep_authors()
+    mock_start.return_value = ("group", "report")
+
+    assert ("group", "report") == task_import_sweep()
+    assert ["333", "222"] == mock_start.call_args.args[0]
+
+    assert task_import_sweep() is None
+    mock_start.assert_called_once()
+
+    task_report_import_sweep([])
+    task_import_sweep()
+    assert 2 == mock_start.call_count
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.tasks.start_bulk_import")
+def test_import_sweep_releases_lock_on_error(mock_start, test_settings):
+    _create_sweep_authors()
+    task_import_sweep()
+
+    assert mock_start.call_args.kwargs["sweep"]
+    report = mock_start.call_args.kwargs["report"]
+    assert ["solenoid.records.tasks.task_release_import_sweep"] == [
+        errback["task"] for errback in report.options["link_error"]
+    ]
+    task_release_import_sweep(None, RuntimeError("failed"), None)
+    assert cache.get(SWEEP_LOCK) is None
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.tasks.start_bulk_import")
+def test_import_sweep_lock_lapses_before_next_sweep(mock_start, test_settings):
+    _create_sweep_authors()
+    with freeze_time() as frozen:
+        task_import_sweep()
+        frozen.tick(SWEEP_LOCK_TIMEOUT + 1)
+        task_import_sweep()
+    assert 2 == mock_start.call_count
+    assert SWEEP_LOCK_TIMEOUT < 60 * 60
+
+
+@patch("solenoid.records.tasks.import_author")
+def test_import_authors_refreshes_sweep_lock(mock_import, test_settings):
+    author = Author(first_name="Person", last_name="Author")
+
+    def import_author(elements_id, full=False, heartbeat=None):
+        frozen.tick(SWEEP_LOCK_TIMEOUT - 1)
+        heartbeat()
+        return author, {}, {}
+
+    mock_import.side_effect = import_author
+    with freeze_time() as frozen:
+        cache.add(SWEEP_LOCK, True, timeout=SWEEP_LOCK_TIMEOUT)
+        task_import_authors(["1", "2"], sweep=True)
+        assert cache.get(SWEEP_LOCK)
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.tasks.start_bulk_import")
+def test_import_sweep_with_nothing_to_do(mock_start, test_settings):
+    assert task_import_sweep() is None
+    mock_start.assert_not_called()
+    assert cache.get(SWEEP_LOCK) is None
+
+
+def test_report_import_sweep_keeps_report():
+    cache.add(SWEEP_LOCK, True)
+    failed = {"author": None, "error": "Import failed", "outcomes": {}}
+    task_report_import_sweep([{"1": failed}])
+
+    report = get_sweep_report()
+    assert 1 == report["failed"]
+    assert "finished" in report
+    assert cache.get(SWEEP_LOCK) is None
+
+
+@pytest.mark.django_db()
+def test_import_sweep_command_report(test_settings):
+    _create_sweep_authors()
+    out = StringIO()
+    call_command("import_sweep", "--report", stdout=out)
+    assert "Authors due for import: 2" in out.getvalue()
+    assert "No import sweep has finished yet." in out.getvalue()
+
+    task_report_import_sweep(
+        [{"333": {"author": None, "error": "Import failed", "outcomes": {}}}]
+    )
+    out = StringIO()
+    call_command("import_sweep", "--report", stdout=out)
+    assert "0 authors imported, 1 failed." in out.getvalue()
+    assert "333: Import failed" in out.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_skipped_while_author_being_imported(mock_elements, test_settings):
+    claim_import(AUTHOR_DATA["ELEMENTS ID"], "other-task")
+
+    assert {} == task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, 1)
+    assert 0 == mock_elements.call_count
+    assert 0 == ImportRun.objects.count()
+
+    report = task_import_authors([AUTHOR_DATA["ELEMENTS ID"]])
+    assert "other-task" in report[AUTHOR_DATA["ELEMENTS ID"]]["error"]
+    assert 0 == mock_elements.call_count
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_releases_claim(mock_elements, test_settings, author):
+    task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
+    assert "next-task" == claim_import(AUTHOR_DATA["ELEMENTS ID"], "next-task")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_refreshes_claim(mock_elements, test_settings, monkeypatch, author):
+    refreshed = []
+    monkeypatch.setattr(
+        "solenoid.records.tasks.refresh_import",
+        lambda elements_id, task_id: refreshed.append(elements_id),
+    )
+    task_import_papers_for_author(AUTHOR_URL, AUTHOR_DATA, author.pk)
+    # Once for the feed page, and once for each of its three papers.
+    assert 4 * [AUTHOR_DATA["ELEMENTS ID"]] == refreshed
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_run_records_stats_and_items(
+    mock_elements,
+    fun_author_pubs_xml,
+    test_settings,
+    settings,
+    author,
+):
+    settings.ELEMENTS_RESPONSE_CACHE = "default"
+    feed_url = "mock://api.com/users/fun/publications?&detail=full"
+    mock_elements.get(
+        feed_url,
+        [
+            {"text": fun_author_pubs_xml, "headers": {"ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+
+    task_import_papers_for_author("mock://api.com/users/fun", AUTHOR_DATA, author.pk)
+    run = ImportRun.objects.get()
+    assert 1 == run.pages
+    assert run.requests == len(mock_elements.request_history)
+    assert run.bytes_fetched >= len(fun_author_pubs_xml)
+    assert 0 == run.cache_hits
+    assert {
+        ("diacritics", "imported"),
+        ("emoji", "imported"),
+        ("math", "imported"),
+        ("nonroman", "imported"),
+    } == set(run.items.values_list("paper_id", "outcome"))
+
+    task_import_papers_for_author(
+        "mock://api.com/users/fun", AUTHOR_DATA, author.pk, full=True
+    )
+    run = ImportRun.objects.latest()
+    assert 1 == run.cache_hits
+    assert {ImportItem.Outcome.UNCHANGED} == set(
+        run.items.values_list("outcome", flat=True)
+    )
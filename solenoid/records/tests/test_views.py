@@ -1,17 +1,25 @@
+from io import StringIO
 from unittest.mock import patch
 
-from celery.result import AsyncResult
 import pytest
+from requests.exceptions import Timeout
 from pytest_django.asserts import assertRedirects, assertTemplateUsed
 
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.template.defaultfilters import escape
-from django.test import Client, TestCase, override_settings
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import resolve, reverse
 
-from ..models import Record
+from solenoid.elements.errors import CircuitOpenError, RetryError
+from solenoid.people.models import DLC, Author
+
+from ..locks import claim_import
+from ..models import ImportItem, ImportRun, Record
 from ..views import UnsentList
 
 IMPORT_URL = reverse("records:import")
+BULK_IMPORT_URL = reverse("records:bulk_import")
 
 
 @override_settings(LOGIN_REQUIRED=False)
@@ -30,9 +38,11 @@ class UnsentRecordsViewsTest(TestCase):
             c.get(self.url)
 
     def test_unsent_records_page_has_all_unsent_in_context(self):
+        view = UnsentList()
+        view.setup(RequestFactory().get(self.url))
         # assertQuerysetEqual never works, so we're just comparing the pks.
         self.assertEqual(
-            set(UnsentList().get_queryset().values_list("pk")),
+            set(view.get_queryset().values_list("pk")),
             set(
                 Record.objects.exclude(email__date_sent__isnull=False)
                 .distinct()
@@ -48,6 +58,55 @@ class UnsentRecordsViewsTest(TestCase):
             # so we need to test for the escaped form, not the database form.
             self.assertContains(response, escape(record.citation))
 
+    def _listed_pks(self, response):
+        return [record.pk for record in response.context["object_list"]]
+
+    def test_unsent_records_filter_by_author(self):
+        response = Client().get(self.url, {"author": [2]})
+        assert self._listed_pks(response) == [2]
+        assert response.context["match_count"] == 1
+
+    def test_unsent_records_filter_by_author_or_dlc(self):
+        response = Client().get(self.url, {"author": [2], "dlc": [1]})
+        assert self._listed_pks(response) == [2, 1, 7]
+
+    def test_unsent_records_filter_ignores_unknown_ids(self):
+        response = Client().get(self.url, {"author": [9999, 2], "dlc": ["x"]})
+        assert self._listed_pks(response) == [2]
+        assert response.context["selected_authors"] == [2]
+
+    def test_unsent_records_filter_with_only_unknown_ids_lists_all(self):
+        response = Client().get(self.url, {"author": [9999]})
+        assert not response.context["filtered"]
+        assert response.context["match_count"] == len(self._listed_pks(response))
+        assert response.context["match_count"] == Record.get_unsent().count()
+
+    @patch.object(UnsentList, "page_size", 2)
+    def test_unsent_records_keyset_pagination(self):
+        c = Client()
+        seen = []
+        response = c.get(self.url)
+        while True:
+            seen += self._listed_pks(response)
+            if "next_url" not in response.context:
+                break
+            assert len(response.context["object_list"]) == 2
+            response = c.get(self.url + response.context["next_url"])
+        assert seen == [2, 3, 4, 5, 6, 1, 7]
+        assert "first_url" in response.context
+
+    @patch.object(UnsentList, "page_size", 2)
+    def test_unsent_records_pagination_keeps_filter(self):
+        response = Client().get(self.url, {"dlc": [3]})
+        assert self._listed_pks(response) == [3, 4]
+        assert "dlc=3" in response.context["next_url"]
+        response = Client().get(self.url + response.context["next_url"])
+        assert self._listed_pks(response) == [5, 6]
+
+    def test_unsent_records_bad_cursor_starts_at_beginning(self):
+        response = Client().get(self.url, {"after": "nonsense"})
+        assert self._listed_pks(response)[0] == 2
+
 
 # Import View Tests
 def test_import_records_view_renders(client):
@@ -56,12 +115,10 @@ def test_import_records_view_renders(client):
 
 
 @pytest.mark.django_db()
-@patch("solenoid.records.tasks.task_import_papers_for_author.delay")
+@patch("solenoid.records.tasks.task_import_papers_for_author.apply_async")
 def test_import_form_valid_calls_task_with_correct_args_and_redirects(
     mock_patch, client, mock_elements, test_settings
 ):
-    result = AsyncResult("555-444-333")
-    mock_patch.return_value = result
     author_url = "mock://api.com/users/98765"
     author_data = {
         "Email": "PERSONA@ORG.EDU",
@@ -74,11 +131,140 @@ def test_import_form_valid_calls_task_with_correct_args_and_redirects(
         "ELEMENTS ID": "98765",
     }
     r = client.post(IMPORT_URL, {"author_id": "98765"}, follow=True)
-    mock_patch.assert_called_once_with(author_url, author_data, 1)
-    assertRedirects(r, reverse("records:status", kwargs={"task_id": "555-444-333"}))
+    task_id = mock_patch.call_args.kwargs["task_id"]
+    mock_patch.assert_called_once_with(
+        (author_url, author_data, 1), {"full": False}, task_id=task_id
+    )
+    assertRedirects(r, reverse("records:status", kwargs={"task_id": task_id}))
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.tasks.task_import_papers_for_author.apply_async")
+def test_import_of_author_being_imported_shows_running_import(
+    mock_patch, client, mock_elements, test_settings
+):
+    claim_import("98765", "555-444-333")
+    r = client.post(IMPORT_URL, {"author_id": "98765"})
+
+    mock_patch.assert_not_called()
+    assertRedirects(
+        r,
+        reverse("records:status", kwargs={"task_id": "555-444-333"}),
+        fetch_redirect_response=False,
+    )
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.tasks.task_import_papers_for_author.apply_async")
+def test_failed_import_request_releases_claim(
+    mock_patch, client, mock_elements, test_settings
+):
+    mock_elements.get("mock://api.com/users/98765", status_code=404)
+    client.post(IMPORT_URL, {"author_id": "98765"})
+
+    mock_patch.assert_not_called()
+    assert "other-task" == claim_import("98765", "other-task")
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    "error", [CircuitOpenError("open"), RetryError("409"), Timeout("timed out")]
+)
+@patch("solenoid.records.tasks.task_import_papers_for_author.apply_async")
+def test_import_when_elements_unavailable_asks_to_wait(
+    mock_patch, client, test_settings, error
+):
+    with patch("solenoid.records.views.get_from_elements", side_effect=error):
+        r = client.post(IMPORT_URL, {"author_id": "98765"})
+
+    assert 200 == r.status_code
+    assert "Please wait a few minutes" in r.content.decode()
+    mock_patch.assert_not_called()
+    assert "other-task" == claim_import("98765", "other-task")
 
 
 # Status View Tests
 def test_status_view_renders(client):
     with assertTemplateUsed("records/status.html"):
         client.get(reverse("records:status", kwargs={"task_id": "12345"}))
+
+
+# Bulk Import Tests
+def _create_dlc_authors():
+    dlc = DLC.objects.create(name="Test DLC")
+    for i, elements_id in enumerate(["111", "222", ""]):
+        Author.objects.create(
+            dlc=dlc,
+            email=f"author{i}@example.com",
+            first_name="Test",
+            last_name=f"Author {i}",
+            mit_id=f"00000000{i}",
+            elements_id=elements_id,
+        )
+    return dlc
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.views.start_bulk_import")
+def test_bulk_import_by_ids_and_dlc(mock_start, client):
+    mock_start.return_value = ("group-id", "task-id")
+    dlc = _create_dlc_authors()
+
+    r = client.post(BULK_IMPORT_URL, {"author_ids": "333, 111\n444", "dlc": dlc.pk})
+
+    mock_start.assert_called_once_with(["333", "111", "444", "222"], full=False)
+    assertRedirects(
+        r,
+        reverse(
+            "records:bulk_status", kwargs={"group_id": "group-id", "task_id": "task-id"}
+        ),
+        fetch_redirect_response=False,
+    )
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.views.start_bulk_import")
+def test_bulk_import_needs_authors(mock_start, client):
+    dlc = DLC.objects.create(name="Empty DLC")
+    with assertTemplateUsed("records/bulk_import.html"):
+        r = client.post(BULK_IMPORT_URL, {"author_ids": " ", "dlc": dlc.pk})
+    assert r.context["form"].non_field_errors()
+    r = client.post(BULK_IMPORT_URL, {"author_ids": "123 not/an/id"})
+    assert r.context["form"].errors["author_ids"]
+    mock_start.assert_not_called()
+
+
+def test_bulk_status_view_renders(client):
+    with assertTemplateUsed("records/bulk_status.html"):
+        client.get(
+            reverse("records:bulk_status", kwargs={"group_id": "123", "task_id": "456"})
+        )
+
+
+@pytest.mark.django_db()
+@patch("solenoid.records.management.commands.bulk_import.start_bulk_import")
+def test_bulk_import_command(mock_start):
+    mock_start.return_value = ("group-id", "task-id")
+    _create_dlc_authors()
+
+    call_command("bulk_import", "333", "--dlc", "Test DLC", "--full", stdout=StringIO())
+    mock_start.assert_called_once_with(["333", "111", "222"], full=True)
+
+    with pytest.raises(CommandError):
+        call_command("bulk_import", "--dlc", "No such DLC")
+
+
+# Admin Tests
+@pytest.mark.django_db()
+def test_import_run_admin_renders(admin_client):
+    dlc = _create_dlc_authors()
+    run = ImportRun.objects.create(author=dlc.author_set.first(), requests=3)
+    ImportItem.objects.create(run=run, paper_id="1", outcome="imported")
+
+    r = admin_client.get(reverse("admin:records_importrun_changelist"))
+    assert 200 == r.status_code
+    assert r.context["cl"].result_list[0].papers == 1
+    r = admin_client.get(reverse("admin:records_importrun_changelist"), {"o": "3"})
+    assert 200 == r.status_code
+    r = admin_client.get(reverse("admin:records_importrun_change", args=[run.pk]))
+    assert 200 == r.status_code
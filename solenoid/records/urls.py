@@ -9,6 +9,12 @@ urlpatterns = [
     re_path(r"^$", views.UnsentList.as_view(), name="unsent_list"),
     re_path(r"^import/$", views.Import.as_view(), name="import"),
     re_path(r"^import/status/(?P<task_id>[^/]+)/$", views.status, name="status"),
+    re_path(r"^import/bulk/$", views.BulkImport.as_view(), name="bulk_import"),
+    re_path(
+        r"^import/bulk/status/(?P<group_id>[^/]+)/(?P<task_id>[^/]+)/$",
+        views.bulk_status,
+        name="bulk_status",
+    ),
     re_path(
         r"^instructions/$",
         TemplateView.as_view(template_name="records/instructions.html"),
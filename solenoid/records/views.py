@@ -1,9 +1,12 @@
 import logging
+from uuid import uuid4
 
 from requests.exceptions import HTTPError, Timeout
 
 from django.conf import settings
 from django.contrib import messages
+from django.db.models import Q
+from django.http import HttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse_lazy
 from django.utils.html import format_html
@@ -12,19 +15,40 @@ from django.views.generic.edit import FormView
 from django.views.generic.list import ListView
 
 from solenoid.elements.elements import get_from_elements
+from solenoid.elements.errors import CircuitOpenError, RetryError
 from solenoid.elements.xml_handlers import parse_author_xml
-from solenoid.people.models import DLC, Author
+from solenoid.people.models import Author
 from solenoid.mixins import ConditionalLoginRequiredMixin
 
-from .forms import ImportForm
+from .forms import BulkImportForm, ImportForm, UnsentFilterForm
 from .helpers import Fields
+from .locks import claim_import, release_import
 from .models import Record
-from .tasks import task_import_papers_for_author
+from .tasks import start_bulk_import, task_import_papers_for_author
 
 logger = logging.getLogger(__name__)
 
 
 class UnsentList(ConditionalLoginRequiredMixin, ListView):
+    """Lists unsent citations, filtered on the server by author and DLC (see
+    UnsentFilterForm).
+
+    Pages use keyset pagination: the `after` parameter is the pk of the last
+    record on the previous page, and the next page picks up from that
+    record's position in the ordering. Unlike an offset, this stays cheap
+    however deep the page is, and it doesn't skip or repeat records when
+    emails are sent between page loads."""
+
+    page_size = 100
+    # The model's ordering (author__dlc sorts by DLC name), plus pk so that
+    # every record has a distinct position.
+    keyset = ["author__dlc__name", "author__last_name", "pk"]
+
+    def get_form(self):
+        if not hasattr(self, "form"):
+            self.form = UnsentFilterForm(self.request.GET)
+        return self.form
+
     def get_context_data(self, **kwargs):
         context = super(UnsentList, self).get_context_data(**kwargs)
         context["title"] = "Unsent citations"
@@ -33,16 +57,61 @@ class UnsentList(ConditionalLoginRequiredMixin, ListView):
             {"url": reverse_lazy("home"), "text": "dashboard"},
             {"url": "#", "text": "view unsent citations"},
         ]
-        authors = Author.objects.filter(record__in=self.get_queryset()).distinct()
-        context["authors"] = authors
-        context["dlcs"] = DLC.objects.filter(author__in=authors).distinct()
+
+        records = context["object_list"]
+        page = list(self._after(records)[: self.page_size + 1])
+        context["object_list"] = page[: self.page_size]
+        if len(page) > self.page_size:
+            context["next_url"] = self._page_url(after=page[self.page_size - 1].pk)
+        if "after" in self.request.GET:
+            context["first_url"] = self._page_url()
+        form = self.get_form()
+        context["form"] = form
+        context["authors"] = form.facets["authors"]
+        context["dlcs"] = form.facets["dlcs"]
+        selected = form.cleaned_data if form.is_valid() else {}
+        context["selected_authors"] = selected.get("author", [])
+        context["selected_dlcs"] = selected.get("dlc", [])
+        context["filtered"] = bool(
+            context["selected_authors"] or context["selected_dlcs"]
+        )
+        if context["filtered"] or not form.is_valid():
+            context["match_count"] = records.count()
+        else:
+            # Unfiltered, the facets already hold the total.
+            context["match_count"] = sum(a["count"] for a in context["authors"])
         return context
 
     def get_queryset(self):
-        return Record.objects.exclude(email__date_sent__isnull=False).prefetch_related(
-            "author", "author__dlc"
+        form = self.get_form()
+        if not form.is_valid():
+            return Record.objects.none()
+        return form.get_records().order_by(*self.keyset)
+
+    def _after(self, records):
+        """Restrict records to those after the `after` record in keyset
+        order."""
+        try:
+            dlc, last_name, pk = (
+                Record.objects.filter(pk=self.request.GET["after"])
+                .values_list(*self.keyset)
+                .get()
+            )
+        except (KeyError, ValueError, Record.DoesNotExist):
+            return records
+        return records.filter(
+            Q(author__dlc__name__gt=dlc)
+            | Q(author__dlc__name=dlc, author__last_name__gt=last_name)
+            | Q(author__dlc__name=dlc, author__last_name=last_name, pk__gt=pk)
         )
 
+    def _page_url(self, after=None):
+        params = self.request.GET.copy()
+        params.pop("after", None)
+        if after is not None:
+            params["after"] = after
+        return f"?{params.urlencode()}"
+
 
 class Import(ConditionalLoginRequiredMixin, FormView):
     template_name = "records/import.html"
@@ -62,60 +131,76 @@ class Import(ConditionalLoginRequiredMixin, FormView):
                 )
                 messages.warning(self.request, msg)
                 return super(Import, self).form_invalid(form)
-        except Timeout as e:
+            return self._elements_unavailable(form)
+        except (Timeout, CircuitOpenError, RetryError) as e:
+            # RetryError: Elements kept asking for retries; CircuitOpenError:
+            # it has been doing so for every request lately.
             logger.info(e)
-            msg = (
-                "Unable to connect to Symplectic "
-                "Elements. Please wait a few "
-                "minutes and try again."
-            )
-            messages.warning(self.request, msg)
-            return super(Import, self).form_invalid(form)
+            return self._elements_unavailable(form)
         author_data = parse_author_xml(author_xml)
         author_data["ELEMENTS ID"] = author_id
         return author_data
 
+    def _elements_unavailable(self, form):
+        msg = (
+            "Unable to connect to Symplectic "
+            "Elements. Please wait a few "
+            "minutes and try again."
+        )
+        messages.warning(self.request, msg)
+        return super(Import, self).form_invalid(form)
+
     def _get_author_record_id(self, form, author_data):
         try:
-            author = Author.get_by_mit_id(author_data[Fields.MIT_ID])
-            if not author.dspace_id:
-                author.dspace_id = author_data[Fields.MIT_ID]
-                author.save()
+            author = Author.get_or_create_from_data(author_data)
         except Author.DoesNotExist:
-            if Author.is_author_creatable(author_data):
-                dlc, _ = DLC.objects.get_or_create(name=author_data[Fields.DLC])
-                author = Author.objects.create(
-                    first_name=author_data[Fields.FIRST_NAME],
-                    last_name=author_data[Fields.LAST_NAME],
-                    dlc=dlc,
-                    email=author_data[Fields.EMAIL],
-                    mit_id=author_data[Fields.MIT_ID],
-                    dspace_id=author_data[Fields.MIT_ID],
-                )
-            else:
-                logger.info(
-                    f"Author #{author_data['ELEMENTS ID']} was missing data "
-                    "from Elements"
-                )
-                msg = (
-                    f"Author with ID {author_data['ELEMENTS ID']} is "
-                    f"missing required information. Please check the "
-                    f"author record in Elements and confirm that all of "
-                    f"the following information is present: "
-                    f"{', '.join(Fields.AUTHOR_DATA)}"
-                )
-                messages.warning(self.request, msg)
-                return super(Import, self).form_invalid(form)
+            logger.info(
+                f"Author #{author_data['ELEMENTS ID']} was missing data " "from Elements"
+            )
+            msg = (
+                f"Author with ID {author_data['ELEMENTS ID']} is "
+                f"missing required information. Please check the "
+                f"author record in Elements and confirm that all of "
+                f"the following information is present: "
+                f"{', '.join(Fields.AUTHOR_DATA)}"
+            )
+            messages.warning(self.request, msg)
+            return super(Import, self).form_invalid(form)
 
         return author.id
 
     def form_valid(self, form, **kwargs):
         author_id = form.cleaned_data["author_id"]
-        author_url = f"{settings.ELEMENTS_ENDPOINT}users/{author_id}"
-        author_data = self._get_author_data(form, author_id)
-        author = self._get_author_record_id(form, author_data)
-        result = task_import_papers_for_author.delay(author_url, author_data, author)
-        task_id = result.task_id
+        # Claim the import before anything is fetched, so that a second
+        # request for the same author (e.g. a double click) just follows the
+        # progress of the first.
+        task_id = str(uuid4())
+        if (running := claim_import(author_id, task_id)) != task_id:
+            messages.info(
+                self.request,
+                f"Author with ID {author_id} is already being imported. "
+                "Showing the progress of that import.",
+            )
+            return redirect("records:status", task_id=running)
+
+        try:
+            author_url = f"{settings.ELEMENTS_ENDPOINT}users/{author_id}"
+            author_data = self._get_author_data(form, author_id)
+            if isinstance(author_data, HttpResponse):
+                release_import(author_id, task_id)
+                return author_data
+            author = self._get_author_record_id(form, author_data)
+            if isinstance(author, HttpResponse):
+                release_import(author_id, task_id)
+                return author
+            task_import_papers_for_author.apply_async(
+                (author_url, author_data, author),
+                {"full": form.cleaned_data["full"]},
+                task_id=task_id,
+            )
+        except Exception:
+            release_import(author_id, task_id)
+            raise
         return redirect("records:status", task_id=task_id)
 
     def form_invalid(self, form):
@@ -142,3 +227,35 @@ class Import(ConditionalLoginRequiredMixin, FormView):
 
 def status(request, task_id):
     return render(request, "records/status.html", context={"task_id": task_id})
+
+
+class BulkImport(ConditionalLoginRequiredMixin, FormView):
+    """Imports many authors at once, by Elements ID or by DLC. Unlike Import,
+    nothing is fetched from Elements here; each author's data is fetched by
+    the tasks start_bulk_import queues."""
+
+    template_name = "records/bulk_import.html"
+    form_class = BulkImportForm
+
+    def form_valid(self, form):
+        group_id, task_id = start_bulk_import(
+            form.cleaned_data["elements_ids"], full=form.cleaned_data["full"]
+        )
+        return redirect("records:bulk_status", group_id=group_id, task_id=task_id)
+
+    def get_context_data(self, **kwargs):
+        context = super(BulkImport, self).get_context_data(**kwargs)
+        context["breadcrumbs"] = [
+            {"url": reverse_lazy("home"), "text": "dashboard"},
+            {"url": reverse_lazy("records:import"), "text": "import data"},
+            {"url": "#", "text": "bulk import"},
+        ]
+        return context
+
+
+def bulk_status(request, group_id, task_id):
+    return render(
+        request,
+        "records/bulk_status.html",
+        context={"group_id": group_id, "task_id": task_id},
+    )
@@ -19,6 +19,7 @@ import os
 
 import dj_database_url
 import environ
+from celery.schedules import crontab
 
 BASE_DIR = environ.Path(__file__) - 3  # get root of the project
 env = environ.Env()
@@ -51,6 +52,10 @@ if HEROKU_APP_NAME:
 # liaisons and the moira list.
 EMAIL_TESTING_MODE = env.bool("DJANGO_EMAIL_TESTING_MODE", False)
 
+# Building emails for more than this many selected records is handed to a
+# Celery task with a progress page instead of being done inside the request.
+EMAIL_BUILD_ASYNC_THRESHOLD = env.int("DJANGO_EMAIL_BUILD_ASYNC_THRESHOLD", 100)
+
 # SYMPLECTIC ELEMENTS SETTINGS
 # Set this to False if you don't want to issue API calls (e.g. during testing,
 # on localhost, on environments that don't know the password or don't have IPs
@@ -67,6 +72,80 @@ ELEMENTS_ENDPOINT = env.str(
     "DJANGO_ELEMENTS_ENDPOINT", "https://pubdata-dev.mit.edu:8091/secure-api/v5.5/"
 )
 
+# Size of the keep-alive connection pool used for Elements API calls, and the
+# timeout (in seconds) applied to each call.
+ELEMENTS_POOL_SIZE = env.int("DJANGO_ELEMENTS_POOL_SIZE", 10)
+ELEMENTS_TIMEOUT = env.int("DJANGO_ELEMENTS_TIMEOUT", 10)
+
+# Maximum number of papers fetched from Elements concurrently during an author
+# import.
+ELEMENTS_IMPORT_CONCURRENCY = env.int("DJANGO_ELEMENTS_IMPORT_CONCURRENCY", 4)
+
+# An author import checks and writes the author's papers in chunks of this
+# many, so that records are saved as the import goes.
+IMPORT_BATCH_SIZE = env.int("DJANGO_IMPORT_BATCH_SIZE", 100)
+
+# Maximum number of authors imported at the same time by a bulk import.
+ELEMENTS_BULK_IMPORT_CONCURRENCY = env.int("DJANGO_ELEMENTS_BULK_IMPORT_CONCURRENCY", 2)
+
+# Maximum number of records patched in Elements concurrently after an email is
+# sent.
+ELEMENTS_PATCH_CONCURRENCY = env.int("DJANGO_ELEMENTS_PATCH_CONCURRENCY", 4)
+
+# All processes together send at most ELEMENTS_RATE_LIMIT requests per second
+# to Elements (0 for no limit). After ELEMENTS_BREAKER_THRESHOLD failed
+# requests (retry statuses or timeouts) within ELEMENTS_BREAKER_WINDOW seconds,
+# requests stop for ELEMENTS_BREAKER_RESET seconds, and then until a single
+# trial request succeeds. See elements/traffic.py;
+# `python manage.py elements_traffic` shows their state.
+ELEMENTS_RATE_LIMIT = env.int("DJANGO_ELEMENTS_RATE_LIMIT", 10)
+ELEMENTS_BREAKER_THRESHOLD = env.int("DJANGO_ELEMENTS_BREAKER_THRESHOLD", 10)
+ELEMENTS_BREAKER_WINDOW = env.int("DJANGO_ELEMENTS_BREAKER_WINDOW", 60)
+ELEMENTS_BREAKER_RESET = env.int("DJANGO_ELEMENTS_BREAKER_RESET", 30)
+
+# Journal policies fetched from Elements are cached in the Django cache for
+# ELEMENTS_POLICY_CACHE_TTL seconds, and in each worker process (up to
+# ELEMENTS_POLICY_CACHE_SIZE journals) for ELEMENTS_POLICY_CACHE_LOCAL_TTL
+# seconds. Clear them with `python manage.py clear_journal_policy_cache`.
+ELEMENTS_POLICY_CACHE_TTL = env.int("DJANGO_ELEMENTS_POLICY_CACHE_TTL", 60 * 60 * 24)
+ELEMENTS_POLICY_CACHE_LOCAL_TTL = env.int("DJANGO_ELEMENTS_POLICY_CACHE_LOCAL_TTL", 300)
+ELEMENTS_POLICY_CACHE_SIZE = env.int("DJANGO_ELEMENTS_POLICY_CACHE_SIZE", 512)
+
+# If ELEMENTS_RESPONSE_CACHE names a cache (an alias in CACHES), Elements
+# responses of up to ELEMENTS_RESPONSE_CACHE_MAX_BYTES that come with an ETag
+# or Last-Modified header are kept there for ELEMENTS_RESPONSE_CACHE_TTL
+# seconds, and later GETs of the same URL are made conditional on them. Off by
+# default: on Heroku the default cache is the Redis that is also the Celery
+# broker, and shouldn't fill up with feed pages.
+ELEMENTS_RESPONSE_CACHE = env.str("DJANGO_ELEMENTS_RESPONSE_CACHE", "")
+ELEMENTS_RESPONSE_CACHE_TTL = env.int(
+    "DJANGO_ELEMENTS_RESPONSE_CACHE_TTL", 60 * 60 * 24 * 7
+)
+ELEMENTS_RESPONSE_CACHE_MAX_BYTES = env.int(
+    "DJANGO_ELEMENTS_RESPONSE_CACHE_MAX_BYTES", 512 * 1024
+)
+
+# Number of entries requested per page of paged Elements feeds. If unset,
+# Elements' own default is used.
+ELEMENTS_PAGE_SIZE = env.int("DJANGO_ELEMENTS_PAGE_SIZE", None)
+
+# How far an interrupted author import got is kept in the cache for
+# IMPORT_CHECKPOINT_TTL seconds, so that the next import of the author can
+# resume from there (see records/checkpoint.py).
+IMPORT_CHECKPOINT_TTL = env.int("DJANGO_IMPORT_CHECKPOINT_TTL", 60 * 60 * 24)
+
+# Only one task imports an author at a time (see records/locks.py). A task's
+# claim on an author is refreshed as the import reads each feed page and
+# paper, and lapses after IMPORT_LOCK_TIMEOUT seconds without progress, in
+# case the task dies without releasing it.
+IMPORT_LOCK_TIMEOUT = env.int("DJANGO_IMPORT_LOCK_TIMEOUT", 60 * 10)
+
+# The authors and DLCs offered as filters on the unsent citations page are
+# cached, and dropped whenever the data they count changes (see
+# records/facets.py). UNSENT_FACETS_TTL bounds how long they can be stale if a
+# change is missed.
+UNSENT_FACETS_TTL = env.int("DJANGO_UNSENT_FACETS_TTL", 60 * 15)
+
 # DSPACE SETTINGS
 DSPACE_SALT = env.str("DSPACE_AUTHOR_ID_SALT", "salty")
 
@@ -78,6 +157,20 @@ CELERY_RESULT_BACKEND = (
     env.str("REDIS_URL", "rediss://localhost:6379") + "?ssl_cert_reqs=none"
 )
 
+# The worker's beat scheduler runs an import sweep (see
+# records.tasks.task_import_sweep) at the start of every hour in
+# IMPORT_SWEEP_HOURS, a crontab hour spec in TIME_ZONE (UTC); the default is
+# 2-5am in Boston. Each sweep re-imports the authors not imported in the last
+# IMPORT_SWEEP_MAX_AGE hours. Leave IMPORT_SWEEP_HOURS blank for no sweeps.
+IMPORT_SWEEP_HOURS = env.str("DJANGO_IMPORT_SWEEP_HOURS", "6-9")
+IMPORT_SWEEP_MAX_AGE = env.int("DJANGO_IMPORT_SWEEP_MAX_AGE", 20)
+CELERY_BEAT_SCHEDULE = {}
+if IMPORT_SWEEP_HOURS:
+    CELERY_BEAT_SCHEDULE["import-sweep"] = {
+        "task": "solenoid.records.tasks.task_import_sweep",
+        "schedule": crontab(minute=0, hour=IMPORT_SWEEP_HOURS),
+    }
+
 # ============================== #
 # ==== DJANGO CORE SETTINGS ==== #
 # ============================== #
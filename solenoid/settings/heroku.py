@@ -55,6 +55,15 @@ MIDDLEWARE += ["whitenoise.middleware.WhiteNoiseMiddleware"]
 db_from_env = dj_database_url.config(conn_max_age=500)
 DATABASES["default"].update(db_from_env)
 
+# CACHES
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env.str("REDIS_URL", "rediss://localhost:6379/0"),
+        "OPTIONS": {"ssl_cert_reqs": None},
+    }
+}
+
 # STATIC FILES
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
@@ -0,0 +1,27 @@
+from django.db import connection
+
+
+def _avoid_seqscan():
+    # The test tables are tiny, so Postgres is told to avoid sequential scans
+    # so the plan matches a full-sized one.
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+
+def query_plan(queryset):
+    """EXPLAIN output for a queryset, for tests that check which indexes a
+    query uses."""
+    _avoid_seqscan()
+    return queryset.explain()
+
+
+def sql_query_plan(sql):
+    """EXPLAIN output for a query captured as it ran (e.g. with
+    CaptureQueriesContext), for checking the indexes used by code that
+    doesn't hand back its queryset."""
+    _avoid_seqscan()
+    explain = "EXPLAIN QUERY PLAN" if connection.vendor == "sqlite" else "EXPLAIN"
+    with connection.cursor() as cursor:
+        cursor.execute(f"{explain} {sql}")
+        return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())